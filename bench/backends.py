@@ -0,0 +1,108 @@
+# Parity and latency of every exported backend against the PyTorch one.
+#
+#   python -m bench.backends --weights models/best.pt --images data/images/val --limit 200
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.backends import BACKENDS, load_backend
+from src.capture import IMAGE_EXTS
+from src.geometry import EyeGeometry, gaze_from_centers
+
+
+def load_images(root, limit):
+    if root:
+        files = sorted(p for p in Path(root).rglob("*") if p.suffix.lower() in IMAGE_EXTS)[:limit]
+        return [cv2.flip(cv2.imread(str(p)), 1) for p in files]
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(limit)]
+
+
+def run(backend, images, imgsz, warmup=3):
+    for img in images[:warmup]:
+        backend(img, imgsz)
+    out, times = [], []
+    for img in images:
+        t0 = time.perf_counter()
+        res = backend(img, imgsz)
+        geo = EyeGeometry.from_result(res, "dense", imgsz)
+        times.append((time.perf_counter() - t0) * 1000)
+        out.append(geo)
+    return out, np.array(times)
+
+
+def mask_iou(a, b):
+    if a.shape != b.shape:
+        b = cv2.resize(b.astype(np.uint8), a.shape[::-1], interpolation=cv2.INTER_NEAREST).astype(bool)
+    union = np.logical_or(a, b).sum()
+    return np.logical_and(a, b).sum() / union if union else 1.0
+
+
+def compare(ref, other):
+    """Class-set match, gaze agreement, mean per-class mask IoU and max centroid error."""
+    cls_match = gaze_match = 0
+    ious, errs = [], []
+    for r, o in zip(ref, other):
+        r_cls = set(r.classes) if r is not None else set()
+        o_cls = set(o.classes) if o is not None else set()
+        cls_match += r_cls == o_cls
+        r_gaze = gaze_from_centers(r.centers) if r is not None else None
+        o_gaze = gaze_from_centers(o.centers) if o is not None else None
+        gaze_match += r_gaze == o_gaze
+        if r is None or o is None:
+            continue
+        r_masks = dict(zip(r.classes, r.masks()))
+        o_masks = dict(zip(o.classes, o.masks()))
+        for cls in r_cls & o_cls:
+            ious.append(mask_iou(r_masks[cls], o_masks[cls]))
+            rc, oc = r.centers[cls], o.centers[cls]
+            if rc is not None and oc is not None:
+                errs.append(max(abs(rc[0] - oc[0]), abs(rc[1] - oc[1])))
+    n = len(ref)
+    return (cls_match / n, gaze_match / n, float(np.mean(ious)) if ious else float("nan"),
+            max(errs) if errs else float("nan"))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--images", help="image directory (random frames when omitted)")
+    ap.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--backends", nargs="+", default=[name for name in BACKENDS if name != "remote"],
+                    help="add remote to include a running inference service (python -m src.service)")
+    args = ap.parse_args()
+
+    images = load_images(args.images, args.limit)
+    ref, ref_t = run(load_backend("torch", args.weights), images, args.imgsz)
+    rows = [("torch", ref_t, (1.0, 1.0, 1.0, 0.0))]
+    for name in args.backends:
+        if name == "torch":
+            continue
+        for int8 in (False, True):
+            try:
+                backend = load_backend(name, args.weights, int8=int8)
+            except (FileNotFoundError, ImportError) as e:
+                print(f"skip {name}{' int8' if int8 else ''}: {str(e).splitlines()[0]}")
+                continue
+            try:
+                out, t = run(backend, images, args.imgsz)
+            except ConnectionError as e:  # remote without a running service
+                print(f"skip {name}{' int8' if int8 else ''}: {str(e).splitlines()[0]}")
+                continue
+            rows.append((name + (" int8" if int8 else ""), t, compare(ref, out)))
+
+    print(f"\n{len(images)} images, imgsz {args.imgsz}\n")
+    print("| backend | mean ms | p95 ms | speedup | classes | gaze agree | mask IoU | max centroid err |")
+    print("|---|---|---|---|---|---|---|---|")
+    base = ref_t.mean()
+    for name, t, (cls_match, gaze_match, iou, err) in rows:
+        print(f"| {name} | {t.mean():.1f} | {np.percentile(t, 95):.1f} | {base / t.mean():.2f}x | "
+              f"{cls_match:.1%} | {gaze_match:.1%} | {iou:.3f} | {err:.2f} px |")
+
+
+if __name__ == "__main__":
+    main()
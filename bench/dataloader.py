@@ -0,0 +1,91 @@
+# Samples/sec of the packed shards vs the loose JPEG + .txt layout, on CPU.
+#
+#   python -m bench.dataloader --images data/images/val --limit 5000 --workers 4
+#   python -m bench.dataloader --synthetic 2000        # generated 1920x1080 JPEGs in a temp dir
+#
+# Both readers go through the same random order, batch collation and
+# DataLoader settings, so the difference is storage and decode.
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.dataloader import LooseDataset, ShardDataset, make_loader
+from utils.pack_dataset import pack
+
+
+def make_synthetic(root, n, size=(1080, 1920)):
+    rng = np.random.default_rng(0)
+    images, labels = root / "images", root / "labels"
+    images.mkdir(parents=True)
+    labels.mkdir(parents=True)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (*size, 3), dtype=np.uint8), (0, 0), 3)
+    for i in range(n):
+        img = np.roll(base, i * 7, axis=1)
+        cv2.imwrite(str(images / f"{i:06d}.jpg"), img)
+        polys = []
+        for cls in range(4):
+            pts = rng.random((12, 2))
+            polys.append(f"{cls} " + " ".join(f"{v:.6f}" for v in pts.ravel()))
+        (labels / f"{i:06d}.txt").write_text("\n".join(polys))
+    return images, labels
+
+
+def measure(dataset, batch_size, workers, limit, epochs=1):
+    from torch.utils.data import Subset
+
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(dataset))[:limit]
+    loader = make_loader(Subset(dataset, order.tolist()), batch_size=batch_size, workers=workers, shuffle=False)
+    rates = []
+    for _ in range(epochs + 1):  # the first pass warms workers (and, for the shards, the page cache)
+        n, t0 = 0, time.perf_counter()
+        for batch in loader:
+            n += len(batch["paths"])
+        rates.append(n / (time.perf_counter() - t0))
+    return rates[0], max(rates[1:])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Packed shards vs loose files, samples/sec")
+    ap.add_argument("--images", help="loose image root (labels: images -> labels)")
+    ap.add_argument("--labels")
+    ap.add_argument("--packed", help="existing pack of --images; packed into a temp dir when omitted")
+    ap.add_argument("--synthetic", type=int, default=0, help="generate this many images instead")
+    ap.add_argument("--limit", type=int, default=2000)
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.synthetic:
+            images, labels = make_synthetic(tmp, args.synthetic)
+        else:
+            images = Path(args.images)
+            labels = Path(args.labels or args.images.replace("images", "labels", 1))
+        t0 = time.perf_counter()
+        packed = Path(args.packed) if args.packed else pack(images, labels, tmp / "packed", args.imgsz,
+                                                            workers=args.workers)
+        pack_s = time.perf_counter() - t0
+
+        rows = []
+        for name, ds in (("loose jpg + txt", LooseDataset(images, labels, args.imgsz)),
+                         ("packed shards", ShardDataset(packed))):
+            cold, warm = measure(ds, args.batch, args.workers, args.limit)
+            rows.append((name, cold, warm))
+
+    print(f"\n{min(args.limit, len(ds))} random samples, imgsz {args.imgsz}, batch {args.batch}, "
+          f"{args.workers} workers (pack: {pack_s:.1f}s)\n")
+    print("| layout | first pass samples/s | warm samples/s |")
+    print("|---|---|---|")
+    for name, cold, warm in rows:
+        print(f"| {name} | {cold:.0f} | {warm:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Decision latency and spurious commands of the gaze decision filters on replayed label sequences.
+#
+#   python -m bench.decision                                     # synthetic noisy sequences
+#   python replay.py --source clip.mp4 --dump-gaze clip_gaze.csv
+#   python -m bench.decision --raw clip_gaze.csv --labels clip.csv
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from src.decision import make_filter, N_STATES
+
+CANDIDATES = [
+    {"filter": "batch", "window": 10, "agreement": 0.8},
+    {"filter": "sliding", "window": 10, "agreement": 0.8},
+    {"filter": "sliding", "window": 6, "agreement": 0.67},
+    {"filter": "ema", "alpha": 0.35, "threshold": 0.75},
+    {"filter": "ema", "alpha": 0.5, "threshold": 0.8},
+    {"filter": "hmm", "stay": 0.9, "hit": 0.7, "threshold": 0.9},
+    {"filter": "hmm", "stay": 0.95, "hit": 0.7, "threshold": 0.97},
+]
+
+
+def synthetic(n_frames, noise, dropout, seed=0):
+    """Piecewise-constant true gaze with random flips and missing frames."""
+    rng = np.random.default_rng(seed)
+    truth, raw = [], []
+    state = 2
+    while len(truth) < n_frames:
+        duration = int(rng.integers(15, 90))
+        for _ in range(duration):
+            truth.append(state)
+            if rng.random() < dropout:
+                raw.append(None)
+            elif rng.random() < noise:
+                raw.append(int(rng.choice([s for s in range(N_STATES) if s != state])))
+            else:
+                raw.append(state)
+        state = int(rng.choice([s for s in range(N_STATES) if s != state]))
+    return truth[:n_frames], raw[:n_frames]
+
+
+def load_raw(path):
+    raw = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            raw[int(row["frame"])] = int(row["raw"]) if row["raw"] not in ("", "None") else None
+    n = max(raw) + 1 if raw else 0
+    return [raw.get(i) for i in range(n)]
+
+
+def evaluate(config, truth, raw):
+    filt = make_filter(config)
+    confirmed = None
+    confirmations = []
+    t0 = time.perf_counter()
+    updates = 0
+    for i, state in enumerate(raw):
+        if state is None:
+            continue
+        updates += 1
+        decided = filt.update(state)
+        if decided is not None and decided != confirmed:
+            confirmed = decided
+            confirmations.append((i, decided))
+    us = (time.perf_counter() - t0) * 1e6 / max(updates, 1)
+
+    changes = [i for i in range(len(truth)) if truth[i] is not None and (i == 0 or truth[i] != truth[i - 1])]
+    latencies, missed = [], 0
+    for k, start in enumerate(changes):
+        end = changes[k + 1] if k + 1 < len(changes) else len(truth)
+        hit = next((f for f, s in confirmations if start <= f < end and s == truth[start]), None)
+        if hit is None:
+            missed += 1
+        else:
+            latencies.append(hit - start)
+    spurious = sum(1 for f, s in confirmations if truth[f] is not None and truth[f] != s)
+    return latencies, missed, spurious, len(changes), us
+
+
+def describe(config):
+    return config["filter"] + "(" + ", ".join(f"{k}={v}" for k, v in config.items() if k != "filter") + ")"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--raw", help="CSV with frame,raw columns (replay.py --dump-gaze)")
+    ap.add_argument("--labels", help="ground-truth label track for --raw (frame,state)")
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--noise", type=float, default=0.15)
+    ap.add_argument("--dropout", type=float, default=0.05)
+    args = ap.parse_args()
+
+    if args.raw:
+        from replay import load_labels
+
+        raw = load_raw(args.raw)
+        truth = load_labels(args.labels, len(raw))
+    else:
+        truth, raw = synthetic(args.frames, args.noise, args.dropout)
+
+    print(f"{len(raw)} frames, {sum(r is None for r in raw)} without a raw state\n")
+    print("| filter | latency p50 | latency p95 | missed | spurious | us/update |")
+    print("|---|---|---|---|---|---|")
+    for config in CANDIDATES:
+        latencies, missed, spurious, changes, us = evaluate(config, truth, raw)
+        p50 = np.percentile(latencies, 50) if latencies else float("nan")
+        p95 = np.percentile(latencies, 95) if latencies else float("nan")
+        print(f"| {describe(config)} | {p50:.0f} fr | {p95:.0f} fr | {missed}/{changes} | {spurious} | {us:.2f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# How long control_pdf blocks the tracker: synchronous key sending vs the ActionDispatcher.
+#
+#   python -m bench.dispatch --changes 300 --key-ms 10 --every 3
+#
+# A recording backend stands in for the OS (each keystroke costs --key-ms),
+# so this runs anywhere.  A confirmed gaze change is fed to control_pdf
+# every --every frames of a --fps loop, in scroll mode half of the time.
+import time
+import argparse
+
+import numpy as np
+
+import src.control as control
+from src.dispatcher import ActionDispatcher, RecordingBackend
+
+
+def gaze_sequence(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # mostly right/left/center, with an occasional mode toggle (3)
+    return rng.choice([0, 1, 2, 0, 1, 2, 0, 1, 3], size=n).tolist()
+
+
+def run(dispatcher, states, fps, every):
+    control.set_dispatcher(dispatcher)
+    control._last_command = None
+    control.pdf_mode = "fit_page"
+    stall = []
+    frame = 1.0 / fps
+    for state in states:
+        t0 = time.perf_counter()
+        control.control_pdf(state, "msedge.exe")
+        stall.append((time.perf_counter() - t0) * 1000)
+        left = every * frame - (time.perf_counter() - t0)
+        if left > 0:
+            time.sleep(left)
+    t_flush = time.perf_counter()
+    dispatcher.stop()
+    return np.array(stall), (time.perf_counter() - t_flush) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tracker stall from key sending, sync vs dispatcher")
+    ap.add_argument("--changes", type=int, default=300, help="confirmed gaze changes to send")
+    ap.add_argument("--key-ms", type=float, default=10.0, help="simulated cost of one keystroke")
+    ap.add_argument("--fps", type=float, default=30)
+    ap.add_argument("--every", type=int, default=3, help="frames between gaze changes")
+    ap.add_argument("--page-interval", type=float, default=0.35)
+    args = ap.parse_args()
+
+    states = gaze_sequence(args.changes)
+    rows = []
+    for name, threaded in (("synchronous", False), ("dispatcher", True)):
+        backend = RecordingBackend(args.key_ms)
+        dispatcher = ActionDispatcher(backend, page_interval=args.page_interval if threaded else 0,
+                                      threaded=threaded).start()
+        stall, drain_ms = run(dispatcher, states, args.fps, args.every)
+        rows.append((name, stall, drain_ms, dispatcher.stats()))
+
+    print(f"\n{args.changes} gaze changes, one every {args.every} frames @ {args.fps:.0f} fps, "
+          f"{args.key_ms:.0f} ms per key\n")
+    print("| path | stall p50 ms | stall p95 ms | stall max ms | keys | sends | coalesced | "
+          "rate delayed | delivery p95 ms | drain ms |")
+    print("|---|---|---|---|---|---|---|---|---|---|")
+    for name, stall, drain_ms, s in rows:
+        print(f"| {name} | {np.percentile(stall, 50):.3f} | {np.percentile(stall, 95):.3f} | {stall.max():.3f} | "
+              f"{s['keys']} | {s['sends']} | {s['coalesced']} | {s['rate_delayed']} | "
+              f"{s['latency_ms_p95']:.1f} | {drain_ms:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
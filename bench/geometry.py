@@ -0,0 +1,133 @@
+# Centroid geometry benchmark: dense CPU masks + get_center vs on-device moments vs polygons.
+#
+#   python -m bench.geometry                                   # synthetic masks
+#   python -m bench.geometry --record runs/geo --weights models/best.pt --source clip.mp4
+#   python -m bench.geometry --results runs/geo --device cuda
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from src.tracker import EyeTrackerThread
+from src.geometry import mask_moments, polygon_moments, gaze_from_centers
+
+
+def synthetic_results(n, h=480, w=640, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        masks = np.zeros((4, h, w), dtype=np.uint8)
+        for eye, cx in enumerate((w * 3 // 8, w * 5 // 8)):
+            cy = h // 2 + int(rng.integers(-20, 20))
+            shift = int(rng.integers(-15, 15))
+            cv2.ellipse(masks[2 + eye], (cx, cy), (w // 14, h // 22), 0, 0, 360, 1, -1)
+            cv2.circle(masks[eye], (cx + shift, cy), h // 28, 1, -1)
+        yield masks.astype(np.float32), [0, 1, 2, 3]
+
+
+def recorded_results(path):
+    for f in sorted(glob.glob(os.path.join(path, "*.npz"))):
+        data = np.load(f)
+        yield data["masks"].astype(np.float32), data["classes"].tolist()
+
+
+def record(out_dir, weights, source, limit):
+    from ultralytics import YOLO
+    from src.capture import open_source
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = YOLO(weights)
+    cap, _ = open_source(source)
+    n = 0
+    while n < limit and cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        res = model(cv2.flip(frame, 1), imgsz=640, conf=0.25, iou=0.3, verbose=False)[0]
+        if res.masks is None:
+            continue
+        np.savez_compressed(os.path.join(out_dir, f"{n:06d}.npz"),
+                            masks=res.masks.data.cpu().numpy().astype(np.float16),
+                            classes=np.array(res.boxes.cls.int().cpu().tolist()))
+        n += 1
+    cap.release()
+    print(f"recorded {n} results to {out_dir}")
+
+
+def centers_from(classes, stats):
+    centers = {}
+    for cls, (area, cx, cy) in zip(classes, stats):
+        centers[cls] = (cx, cy) if area > 0 else None
+    return centers
+
+
+def sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--results", help="directory of recorded *.npz results (masks, classes)")
+    ap.add_argument("--record", help="record results from --weights/--source into this directory")
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--source", default="0")
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--device", default="cpu")
+    args = ap.parse_args()
+
+    if args.record:
+        record(args.record, args.weights, args.source, args.frames)
+        return
+
+    from ultralytics.utils import ops
+
+    device = torch.device(args.device)
+    data = list(recorded_results(args.results) if args.results else synthetic_results(args.frames))
+    tracker = EyeTrackerThread.__new__(EyeTrackerThread)  # only detect_gaze/get_center are used
+    timings = {"dense+get_center": [], "moments": [], "polygon": []}
+    gazes = {k: [] for k in timings}
+    max_err = 0.0
+
+    for masks, classes in data:
+        t = torch.from_numpy(masks).to(device)
+        sync(device)
+
+        t0 = time.perf_counter()
+        dense = (t > 0.5).cpu().numpy()
+        gaze = tracker.detect_gaze(dense, classes)
+        timings["dense+get_center"].append(time.perf_counter() - t0)
+        gazes["dense+get_center"].append(gaze)
+        ref = {cls: tracker.get_center(m) for cls, m in zip(classes, dense)}
+
+        t0 = time.perf_counter()
+        stats = mask_moments(t).cpu().numpy()
+        centers = centers_from(classes, stats)
+        gaze = gaze_from_centers(centers)
+        timings["moments"].append(time.perf_counter() - t0)
+        gazes["moments"].append(gaze)
+        for cls, c in centers.items():
+            if c is not None and ref.get(cls) is not None:
+                max_err = max(max_err, abs(c[0] - ref[cls][0]), abs(c[1] - ref[cls][1]))
+
+        t0 = time.perf_counter()
+        polys = ops.masks2segments(t)
+        gaze = gaze_from_centers(centers_from(classes, polygon_moments(polys)))
+        timings["polygon"].append(time.perf_counter() - t0)
+        gazes["polygon"].append(gaze)
+
+    ref_gaze = np.array(gazes["dense+get_center"], dtype=object)
+    print(f"{len(data)} results, mask shape {data[0][0].shape[1:]}, device {device}")
+    print(f"{'path':<18}{'mean ms':>10}{'p95 ms':>10}{'gaze agree':>12}")
+    for name, ts in timings.items():
+        ts = np.array(ts) * 1000
+        agree = np.mean(np.array(gazes[name], dtype=object) == ref_gaze)
+        print(f"{name:<18}{ts.mean():>10.3f}{np.percentile(ts, 95):>10.3f}{agree:>12.1%}")
+    print(f"max moments centroid deviation from get_center: {max_err:.2f} px (get_center truncates to int)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# GUI event-loop latency with the tracker on a QThread vs in a worker process.
+#
+#   python -m bench.gui_latency --weights models/best.pt --source synthetic --seconds 20
+#   python -m bench.gui_latency --modes idle worker --source clip.mp4 --json gui.json
+#
+# Runs the real OverlayWindow (offscreen) with its preview and a gaze fade
+# every --fade-every seconds, and a --tick-ms precise timer on the GUI thread.
+# How late each tick fires is the event-loop latency the fade animation and the
+# preview see.  "idle" has no tracker, "thread" is EyeTrackerThread in this
+# process and "worker" is RemoteTracker.
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from main import OverlayWindow
+from src.tracker import EyeTrackerThread
+from src.worker import RemoteTracker
+
+MODES = ("idle", "thread", "worker")
+
+
+def measure(app, mode, options, seconds, tick_ms, fade_every, load_timeout=120.0):
+    overlay = OverlayWindow()
+    tracker = None
+    frames = []
+    if mode == "thread":
+        tracker = EyeTrackerThread(overlay=overlay, **options)
+    elif mode == "worker":
+        tracker = RemoteTracker(options, overlay=overlay)
+    if tracker is not None:
+        ready = []
+        tracker.preview_frame.connect(overlay.update_preview)
+        tracker.gaze_updated.connect(overlay.update_gaze)
+        tracker.status_changed.connect(lambda text: ready.append(True) if not text else None)
+        tracker.frame_processed.connect(frames.append)
+        tracker.start()
+        deadline = time.monotonic() + load_timeout
+        while not (ready and frames) and time.monotonic() < deadline:  # model loaded and frames flowing
+            app.processEvents()
+            time.sleep(0.01)
+        if not frames:
+            tracker.stop()
+            raise SystemExit(f"❌ {mode}: the tracker produced no frames within {load_timeout:.0f} s")
+
+    late = []
+    last = [None]
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+
+    def tick():
+        now = time.perf_counter()
+        if last[0] is not None:
+            late.append((now - last[0]) * 1000 - tick_ms)
+        last[0] = now
+
+    timer.timeout.connect(tick)
+    fade = QTimer()
+    fade.timeout.connect(lambda: overlay.update_gaze("NEXT PAGE"))
+    n0 = len(frames)
+    t0 = time.perf_counter()
+    timer.start(tick_ms)
+    fade.start(int(fade_every * 1000))
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+    elapsed = time.perf_counter() - t0
+    timer.stop()
+    fade.stop()
+    n = len(frames) - n0
+    if tracker is not None:
+        tracker.stop()
+    overlay.close()
+
+    late = np.maximum(np.asarray(late), 0.0)
+    gui = np.asarray(tracker.preview.gui_ms if tracker is not None else [])
+    return {
+        "mode": mode,
+        "ticks": len(late),
+        "late_ms_p50": float(np.percentile(late, 50)),
+        "late_ms_p95": float(np.percentile(late, 95)),
+        "late_ms_p99": float(np.percentile(late, 99)),
+        "late_ms_max": float(late.max()),
+        "late_over_16ms": float((late > 16).mean()),  # a missed frame at 60 Hz
+        "tracker_fps": n / elapsed,
+        "preview_paint_ms_p95": float(np.percentile(gui, 95)) if len(gui) else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Qt event-loop latency with and without the tracker worker process")
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--source", default="synthetic")
+    ap.add_argument("--backend", default="torch")
+    ap.add_argument("--modes", nargs="*", default=list(MODES), choices=MODES)
+    ap.add_argument("--seconds", type=float, default=20.0, help="measured time per mode")
+    ap.add_argument("--tick-ms", type=int, default=5, help="GUI timer period")
+    ap.add_argument("--fade-every", type=float, default=1.5, help="seconds between gaze label fades")
+    ap.add_argument("--json", help="also write the rows to this file")
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    options = dict(model_path=args.weights, source=args.source, backend=args.backend, process_name="pdf",
+                   metrics={"enabled": True})
+    rows = []
+    for mode in args.modes:
+        print(f"⏱ {mode} ...")
+        rows.append(measure(app, mode, options, args.seconds, args.tick_ms, args.fade_every))
+
+    print(f"\n{args.tick_ms} ms GUI timer, {args.seconds:g} s per mode, source {args.source}\n")
+    print("| mode | tick lateness p50 / p95 / p99 / max ms | ticks > 16 ms late | tracker fps | preview paint p95 ms |")
+    print("|---|---|---|---|---|")
+    for r in rows:
+        print(f"| {r['mode']} | {r['late_ms_p50']:.2f} / {r['late_ms_p95']:.2f} / {r['late_ms_p99']:.2f} / "
+              f"{r['late_ms_max']:.1f} | {r['late_over_16ms']:.2%} | {r['tracker_fps']:.1f} | "
+              f"{r['preview_paint_ms_p95']:.2f} |")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
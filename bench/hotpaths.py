@@ -0,0 +1,224 @@
+# Microbenchmarks of the per-frame hot paths, with stored baselines and a regression check.
+#
+#   python -m bench.hotpaths                          # measure and print
+#   python -m bench.hotpaths --save                   # store as the baseline (bench/hotpaths.json)
+#   python -m bench.hotpaths --compare --tolerance 0.25 [--only get_center detect_gaze]
+#
+# Every fixture is synthetic (generated masks, frames, gaze sequences and
+# annotation XML) and keys go to a recording backend, so no camera, GPU or
+# model weights are needed.  A case's time is the best of --repeat runs of
+# enough calls to fill --min-time, in µs per call.  --compare exits with
+# status 1 when a case is slower than its baseline by more than --tolerance
+# (after re-measuring it once, to rule out a noisy run).  Baselines are only
+# comparable on the machine that saved them; save your own before optimizing.
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import src.control as control
+from src.tracker import COLORS, EyeTrackerThread
+from src.compositor import MaskCompositor
+from src.decision import BatchVote, SlidingVote
+from src.dispatcher import ActionDispatcher, RecordingBackend
+from utils.xml2yolo_seg import convert_xml, polygon_to_yolo
+
+BASELINES = Path(__file__).with_name("hotpaths.json")
+
+
+def eye_masks(h=480, w=640, seed=0):
+    """Iris and eyelid masks of both eyes, (4, h, w) uint8, in class order 0-3."""
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((4, h, w), dtype=np.uint8)
+    for eye, cx in enumerate((w * 3 // 8, w * 5 // 8)):
+        cy = h // 2 + int(rng.integers(-20, 20))
+        cv2.ellipse(masks[2 + eye], (cx, cy), (w // 14, h // 22), 0, 0, 360, 1, -1)
+        cv2.circle(masks[eye], (cx + int(rng.integers(-15, 15)), cy), h // 28, 1, -1)
+    return masks
+
+
+def gaze_states(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    runs = rng.choice([0, 1, 2], size=n // 20)
+    states = np.repeat(runs, 20)
+    noise = rng.random(len(states)) < 0.1  # a wrong frame now and then
+    states[noise] = rng.choice([0, 1, 2, 3, 4], size=noise.sum())
+    return states.tolist()
+
+
+def annotation_xml(path, images=50, points=40, seed=0):
+    """A CVAT-style XML like the dataset's: `images` <image> tags with four eye polygons each."""
+    rng = np.random.default_rng(seed)
+    lines = ["<annotations>"]
+    for i in range(images):
+        lines.append(f'  <image id="{i}" name="frame_{i:04d}.jpg" width="1920" height="1080">')
+        for label in ("right_iris", "left_iris", "right_eyelid", "left_eyelid"):
+            cx, cy, r = rng.uniform(600, 1300), rng.uniform(400, 700), rng.uniform(30, 90)
+            a = np.linspace(0, 2 * np.pi, points, endpoint=False)
+            pts = ";".join(f"{x:.2f},{y:.2f}" for x, y in zip(cx + r * np.cos(a), cy + 0.6 * r * np.sin(a)))
+            status = '<attribute name="status">open</attribute>' if label.endswith("eyelid") else ""
+            lines.append(f'    <polygon label="{label}" points="{pts}">{status}</polygon>')
+        lines.append("  </image>")
+    lines.append("</annotations>")
+    path.write_text("\n".join(lines))
+
+
+def case_get_center(tmp):
+    tracker = EyeTrackerThread(metrics={"enabled": False})
+    mask = eye_masks()[0]
+    return lambda: tracker.get_center(mask)
+
+
+def case_detect_gaze(tmp):
+    tracker = EyeTrackerThread(metrics={"enabled": False})
+    masks, classes = eye_masks(), [0, 1, 2, 3]
+    return lambda: tracker.detect_gaze(masks, classes)
+
+
+def _vote(cls):
+    def case(tmp):
+        states = gaze_states()
+
+        def run():
+            vote = cls(window=10, agreement=0.8)
+            for state in states:
+                vote.update(state)
+        return run
+    return case
+
+
+def case_overlay_blend(tmp):
+    compositor = MaskCompositor(COLORS)
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    masks = cv2.resize(eye_masks().transpose(1, 2, 0), (160, 120), interpolation=cv2.INTER_NEAREST)
+    masks = masks.transpose(2, 0, 1).astype(bool)  # mask resolution, as the model returns them
+    return lambda: compositor.compose(frame, masks, [0, 1, 2, 3])
+
+
+def case_control_pdf(tmp):
+    backend = RecordingBackend()
+    dispatcher = ActionDispatcher(backend, page_interval=0, threaded=False)
+    states = [0, 2, 1, 2, 3, 0, 4, 1]  # alternating, so no call is a repeated command
+
+    def run():
+        control.set_dispatcher(dispatcher)
+        control._last_command = None
+        for state in states:
+            control.control_pdf(state, "msedge.exe")
+        backend.sent.clear()
+    return run
+
+
+def case_polygon_to_yolo(tmp):
+    a = np.linspace(0, 2 * np.pi, 40, endpoint=False)
+    points = list(zip((960 + 80 * np.cos(a)).tolist(), (540 + 50 * np.sin(a)).tolist()))
+    return lambda: polygon_to_yolo(points, 1920, 1080)
+
+
+def case_convert_xml(tmp):
+    src = Path(tmp) / "TL" / "G1" / "001" / "30" / "annotations.xml"
+    src.parent.mkdir(parents=True)
+    annotation_xml(src)
+    dst = Path(tmp) / "labels"
+    return lambda: convert_xml(src, dst, class_map="merged", split="TL")
+
+
+# name -> fixture builder returning the zero-argument call that is timed
+CASES = {
+    "get_center": case_get_center,
+    "detect_gaze": case_detect_gaze,
+    "vote_batch_1000": _vote(BatchVote),
+    "vote_sliding_1000": _vote(SlidingVote),
+    "overlay_blend": case_overlay_blend,
+    "control_pdf_x8": case_control_pdf,
+    "polygon_to_yolo": case_polygon_to_yolo,
+    "convert_xml_50": case_convert_xml,
+}
+
+
+def measure(fn, min_time=0.2, repeat=5):
+    """Best-of-`repeat` µs per call, each run long enough to fill `min_time` seconds."""
+    fn()  # warm caches and lazily built buffers
+    number, elapsed = 1, 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time / 4:
+            break
+        number *= 4
+    number = max(1, int(number * min_time / elapsed))
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best * 1e6
+
+
+def machine():
+    return {"platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+            "python": platform.python_version(), "numpy": np.__version__, "opencv": cv2.__version__}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Hot-path microbenchmarks with a baseline regression check")
+    ap.add_argument("--only", nargs="*", choices=list(CASES), help="run only these cases")
+    ap.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baselines", default=str(BASELINES))
+    ap.add_argument("--save", action="store_true", help="store the results as the baseline")
+    ap.add_argument("--compare", action="store_true", help="fail when a case regressed past --tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    names = args.only or list(CASES)
+    baseline = {}
+    if args.compare:
+        stored = json.loads(Path(args.baselines).read_text())
+        baseline = stored["cases"]
+        if stored.get("machine") != machine():
+            print(f"⚠️ Baselines were saved on another setup: {stored.get('machine')}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            fn = CASES[name](Path(tmp) / name)
+            results[name] = measure(fn, args.min_time, args.repeat)
+            limit = baseline.get(name, float("inf")) * (1 + args.tolerance)
+            if results[name] > limit:  # one more try before calling it a regression
+                results[name] = min(results[name], measure(fn, args.min_time, args.repeat))
+
+    print("\n| case | µs per call | baseline µs | change |")
+    print("|---|---|---|---|")
+    regressed = []
+    for name in names:
+        us, base = results[name], baseline.get(name)
+        change = f"{us / base - 1:+.1%}" if base else "-"
+        if base and us > base * (1 + args.tolerance):
+            regressed.append(name)
+            change += " ❌"
+        print(f"| {name} | {us:.2f} | {'-' if base is None else format(base, '.2f')} | {change} |")
+
+    if args.save:
+        stored = json.loads(Path(args.baselines).read_text()) if Path(args.baselines).exists() else {}
+        cases = dict(stored.get("cases", {}), **{k: round(v, 3) for k, v in results.items()})
+        Path(args.baselines).write_text(json.dumps({"machine": machine(), "cases": cases}, indent=2) + "\n")
+        print(f"\n💾 Baselines saved to {args.baselines}")
+    if args.compare:
+        if regressed:
+            print(f"\n❌ {len(regressed)} case(s) slower than baseline + {args.tolerance:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        print(f"\n✅ No case slower than baseline + {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
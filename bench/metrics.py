@@ -0,0 +1,52 @@
+# Cost of the stage instrumentation itself.
+#
+#   python -m bench.metrics --frames 200000
+#
+# Times the begin/lap/end calls of one tracker frame against the same loop
+# without them, and a snapshot() (what the HUD, dumper and endpoint call).
+import time
+import argparse
+
+from src.metrics import STAGES, NullMetrics, StageMetrics
+
+
+def frame_loop(metrics, frames, stages):
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        metrics.begin()
+        metrics.record("capture", 1.0)
+        for stage in stages:
+            metrics.lap(stage)
+        metrics.end()
+    return (time.perf_counter() - t0) / frames * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Overhead of StageMetrics")
+    ap.add_argument("--frames", type=int, default=200000)
+    ap.add_argument("--size", type=int, default=1024)
+    ap.add_argument("--frame-ms", type=float, default=33.3, help="frame budget to express overhead against")
+    args = ap.parse_args()
+
+    stages = [s for s in STAGES if s not in ("capture", "frame")]
+    base_us = frame_loop(NullMetrics(), args.frames, stages)
+    metrics = StageMetrics(size=args.size)
+    real_us = frame_loop(metrics, args.frames, stages)
+    per_frame = real_us - base_us
+
+    t0 = time.perf_counter()
+    for _ in range(200):
+        metrics.snapshot()
+    snap_us = (time.perf_counter() - t0) / 200 * 1e6
+
+    print(f"\n{args.frames} frames, {len(stages)} laps per frame, ring size {args.size}\n")
+    print("| measure | value |")
+    print("|---|---|")
+    print(f"| instrumentation per frame | {per_frame:.2f} µs |")
+    print(f"| per lap | {per_frame / (len(stages) + 2):.3f} µs |")
+    print(f"| share of a {args.frame_ms:.1f} ms frame | {per_frame / (args.frame_ms * 10):.4f} % |")
+    print(f"| snapshot() | {snap_us:.1f} µs |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Paint area and time per overlay update: the full-screen OverlayWindow vs PanelOverlay.
+#
+#   python -m bench.overlay_paint --seconds 12
+#   QT_QPA_PLATFORM=xcb python -m bench.overlay_paint     # on a real desktop instead of offscreen
+#
+# Both overlays get the same scripted session: a page turn (gaze toast with
+# its hold and fade) every --turn-every seconds, preview frames at
+# --preview-fps, a process switch every second, a mode toggle every 4 s
+# and a HUD line every 0.5 s.  An application event filter counts every
+# paint (and the area it covers) and every top-level window flush, the
+# surface a compositor re-blends.  Each update is timed together with
+# the paint it causes.
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import time
+import argparse
+from itertools import cycle
+
+import numpy as np
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from main import OVERLAYS
+
+
+class PaintCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.paints = 0
+        self.painted_px = 0
+        self.flushes = 0
+        self.surface_px = 0
+
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        if kind == QEvent.Paint:
+            r = event.rect()
+            self.paints += 1
+            self.painted_px += r.width() * r.height()
+        elif kind == QEvent.UpdateRequest and obj.isWidgetType() and obj.isWindow():
+            self.flushes += 1
+            self.surface_px += obj.width() * obj.height()
+        return False
+
+
+class FakeChannel:
+    """Stands in for the PreviewChannel: a new 320x240 frame per take()."""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 255, (240, 320, 3), dtype=np.uint8) for _ in range(8)]
+        self.n = 0
+
+    def take(self):
+        self.n += 1
+        return self.frames[self.n % len(self.frames)]
+
+    def record_gui(self, ms):
+        pass
+
+
+def run(app, name, seconds, turn_every, preview_fps):
+    overlay = OVERLAYS[name]()
+    overlay.update_pdf_mode("PAGE MODE")
+    for _ in range(5):
+        app.processEvents()  # first show and layout stay out of the numbers
+    counter = PaintCounter()
+    channel = FakeChannel()
+    timings = {}
+
+    def timed(kind, update):
+        def call():
+            t0 = time.perf_counter()
+            update()
+            app.processEvents()  # the repaint this update caused
+            timings.setdefault(kind, []).append((time.perf_counter() - t0) * 1000)
+        return call
+
+    turns = cycle(("PAGE DOWN", "PAGE UP", "SCROLL DOWN", "SCROLL UP"))
+    processes = cycle(("msedge.exe", "explorer.exe"))
+    modes = cycle(("SCROLL MODE", "PAGE MODE"))
+    schedule = [
+        (turn_every, timed("gaze", lambda: overlay.update_gaze(next(turns)))),
+        (1 / preview_fps, timed("preview", lambda: overlay.update_preview(channel))),
+        (1.0, timed("process", lambda: overlay.update_process_name(next(processes)))),
+        (4.0, timed("mode", lambda: overlay.update_pdf_mode(next(modes)))),
+        (0.5, timed("hud", lambda: overlay.update_hud(f"frame {time.perf_counter() % 100:5.1f} ms"))),
+    ]
+    timers = []
+    for every, call in schedule:
+        timer = QTimer()
+        timer.timeout.connect(call)
+        timer.start(int(every * 1000))
+        timers.append(timer)
+
+    app.installEventFilter(counter)
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec_()
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - t0
+    app.removeEventFilter(counter)
+    for timer in timers:
+        timer.stop()
+    overlay.close()
+    app.processEvents()
+
+    updates = sum(len(v) for v in timings.values())
+    return {
+        "overlay": name,
+        "updates": updates,
+        "paints": counter.paints,
+        "painted_mpx": counter.painted_px / 1e6,
+        "flushes": counter.flushes,
+        "surface_mpx": counter.surface_px / 1e6,
+        "surface_kpx_per_update": counter.surface_px / 1e3 / updates if updates else 0.0,
+        "cpu_pct": 100 * cpu / wall,
+        "update_ms": {k: (float(np.median(v)), float(np.percentile(v, 95))) for k, v in timings.items()},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Overlay paint area and update time, full-screen window vs panels")
+    ap.add_argument("--overlays", nargs="*", default=list(OVERLAYS), choices=list(OVERLAYS))
+    ap.add_argument("--seconds", type=float, default=12.0, help="scripted session length per overlay")
+    ap.add_argument("--turn-every", type=float, default=2.5, help="seconds between page turns")
+    ap.add_argument("--preview-fps", type=float, default=15.0)
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    screen = app.primaryScreen().geometry()
+    rows = [run(app, name, args.seconds, args.turn_every, args.preview_fps) for name in args.overlays]
+
+    print(f"\n{app.platformName()} screen {screen.width()}x{screen.height()}, {args.seconds:g} s session each\n")
+    print("| overlay | updates | paints | painted Mpx | window flushes | composited Mpx | "
+          "composited kpx / update | CPU % |")
+    print("|---|---|---|---|---|---|---|---|")
+    for r in rows:
+        print(f"| {r['overlay']} | {r['updates']} | {r['paints']} | {r['painted_mpx']:.2f} | {r['flushes']} | "
+              f"{r['surface_mpx']:.1f} | {r['surface_kpx_per_update']:.0f} | {r['cpu_pct']:.1f} |")
+    kinds = sorted({k for r in rows for k in r["update_ms"]})
+    print("\n| overlay | " + " | ".join(f"{k} p50 / p95 ms" for k in kinds) + " |")
+    print("|---|" + "---|" * len(kinds))
+    for r in rows:
+        print(f"| {r['overlay']} | " + " | ".join("{:.3f} / {:.3f}".format(*r["update_ms"][k]) if k in r["update_ms"]
+                                                 else "-" for k in kinds) + " |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Session recorder cost per frame and how fast an hour-long session opens.
+#
+#   python -m bench.recorder --frames 108000 --budget-us 10
+#
+# Writes --frames synthetic records (an hour at 30 fps by default) through
+# SessionRecorder.write exactly as the tracker does, then opens the file with
+# the memory-mapped reader and runs the threshold analysis of `python -m src.recorder`.
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from src.geometry import EyeGeometry
+from src.metrics import STAGES
+from src.recorder import SessionRecorder, open_session, states_at
+
+
+def synthetic_geometry(n, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        stats = np.array([[300, 250 + rng.normal(0, 5), 240], [300, 390 + rng.normal(0, 5), 240],
+                          [2000, 250, 240], [2000, 390, 240]], dtype=np.float32)
+        out.append(EyeGeometry([0, 1, 2, 3], rng.uniform(0.5, 1, 4).astype(np.float32),
+                               np.zeros((4, 4), dtype=np.float32), stats))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-frame session recorder overhead and reader speed")
+    ap.add_argument("--frames", type=int, default=108000, help="records to write (108000 = 1 h at 30 fps)")
+    ap.add_argument("--capacity", type=int, default=216000)
+    ap.add_argument("--budget-us", type=float, default=10.0, help="allowed recording cost per frame")
+    ap.add_argument("--dir", default=tempfile.gettempdir())
+    args = ap.parse_args()
+
+    geos = synthetic_geometry(256)
+    stages = [float(i) for i in range(len(STAGES))]
+    path = os.path.join(args.dir, "bench_session.eyerec")
+
+    t0 = time.perf_counter()
+    rec = SessionRecorder(path, capacity=args.capacity)
+    open_ms = (time.perf_counter() - t0) * 1000
+    cost = np.empty(args.frames)
+    t_capture = time.perf_counter()
+    for i in range(args.frames):
+        geo = geos[i % len(geos)] if i % 10 else None  # some frames without eyes
+        t = time.perf_counter()
+        rec.write(i + 1, t_capture + i / 30, geo, 1.0, 640, "full", 2, 2, 0.9, stages, 1234)
+        cost[i] = time.perf_counter() - t
+    rec.close()
+    cost_us = cost * 1e6
+
+    t0 = time.perf_counter()
+    log = open_session(path)
+    records = log.records
+    read_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    offsets = log.offsets(records)
+    sweep = {th: np.bincount(states_at(offsets, th)[~np.isnan(offsets)], minlength=3) for th in (2, 4, 6)}
+    analysis_ms = (time.perf_counter() - t0) * 1000
+    size_mb = os.path.getsize(path) / 1e6
+    os.remove(path)
+
+    p50, p99 = np.percentile(cost_us, (50, 99))
+    print(f"\n{args.frames} records, {size_mb:.1f} MB file (capacity {args.capacity})\n")
+    print("| metric | value |")
+    print("|---|---|")
+    print(f"| create + preallocate | {open_ms:.1f} ms |")
+    print(f"| write mean | {cost_us.mean():.2f} µs |")
+    print(f"| write p50 / p99 | {p50:.2f} / {p99:.2f} µs |")
+    print(f"| open hour-long session | {read_ms:.2f} ms |")
+    print(f"| dx threshold sweep (3 thresholds) | {analysis_ms:.1f} ms |")
+    assert len(records) == min(args.frames, args.capacity) and sweep
+    ok = cost_us.mean() <= args.budget_us
+    print(f"\n{'✅' if ok else '❌'} mean write {cost_us.mean():.2f} µs, budget {args.budget_us:.0f} µs per frame")
+
+
+if __name__ == "__main__":
+    main()
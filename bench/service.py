@@ -0,0 +1,116 @@
+# N synthetic camera streams against the shared inference service vs one process per stream.
+#
+#   python -m bench.service --weights models/best.pt --streams 4 --fps 30 --duration 20
+#
+# Every stream sends 640x480 frames at --fps (0 = as fast as it gets answers)
+# and records request -> EyeGeometry latency.  Reports per-stream p50/p95
+# and total throughput for both deployments.
+import sys
+import time
+import argparse
+import subprocess
+import multiprocessing as mp
+
+import numpy as np
+
+from src.service import load_authkey, parse_address
+
+
+def stream(mode, weights, address, fps, duration, imgsz, ready, start, results, idx):
+    from src.backends import load_backend
+
+    if mode == "shared":
+        backend = load_backend("remote", weights, address=address)
+    else:
+        backend = load_backend("torch", weights, device="cpu")
+    rng = np.random.default_rng(idx)
+    frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    for f in frames[:2]:
+        backend(f, imgsz=imgsz)
+    ready.release()
+    start.wait()
+
+    lat = []
+    interval = 1.0 / fps if fps else 0.0
+    t_end = time.perf_counter() + duration
+    next_t = time.perf_counter()
+    while time.perf_counter() < t_end:
+        if interval:
+            now = time.perf_counter()
+            if now < next_t:
+                time.sleep(next_t - now)
+            next_t = max(next_t + interval, time.perf_counter())
+        t0 = time.perf_counter()
+        backend(frames[len(lat) % len(frames)], imgsz=imgsz)
+        lat.append((time.perf_counter() - t0) * 1000)
+    results.put((idx, lat))
+
+
+def run_mode(mode, args):
+    ctx = mp.get_context("spawn")
+    ready, start, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=stream, args=(mode, args.weights, args.address, args.fps, args.duration,
+                                              args.imgsz, ready, start, results, i))
+             for i in range(args.streams)]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+    start.set()
+    out = dict(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return [np.asarray(out[i]) for i in range(args.streams)]
+
+
+def wait_for_service(address, timeout=120):
+    from multiprocessing.connection import Client
+
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        try:
+            Client(parse_address(address), authkey=load_authkey()).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.5)
+    raise TimeoutError(f"Inference service did not come up on {address}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shared inference service vs one process per stream")
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--streams", type=int, default=4)
+    ap.add_argument("--fps", type=float, default=30, help="per-stream frame rate, 0 = unpaced")
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--address", default="127.0.0.1:6011")
+    ap.add_argument("--max-batch", type=int, default=8)
+    ap.add_argument("--max-wait-ms", type=float, default=4)
+    args = ap.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "src.service", "--weights", args.weights,
+                               "--address", args.address, "--max-batch", str(args.max_batch),
+                               "--max-wait-ms", str(args.max_wait_ms)])
+    try:
+        wait_for_service(args.address)
+        shared = run_mode("shared", args)
+    finally:
+        server.terminate()
+        server.wait()
+    local = run_mode("local", args)
+
+    print(f"\n{args.streams} streams @ {args.fps or 'unpaced'} fps, imgsz {args.imgsz}, {args.duration:.0f}s\n")
+    print("| deployment | stream | frames | p50 ms | p95 ms |")
+    print("|---|---|---|---|---|")
+    for name, lats in (("shared service", shared), ("process per stream", local)):
+        for i, lat in enumerate(lats):
+            print(f"| {name} | {i} | {len(lat)} | {np.percentile(lat, 50):.1f} | {np.percentile(lat, 95):.1f} |")
+    print("\n| deployment | total fps | worst-stream p95 ms |")
+    print("|---|---|---|")
+    for name, lats in (("shared service", shared), ("process per stream", local)):
+        total = sum(len(lat) for lat in lats) / args.duration
+        print(f"| {name} | {total:.1f} | {max(np.percentile(lat, 95) for lat in lats):.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Train the eye-state classifier used by the runtime cascade (src/cascade.py).
+#
+#   python -m classify.train --images data/images/train --val-images data/images/val --epochs 20
+#   python -m classify.train --packed data/packed/train --val-packed data/packed/val
+#
+# Labels come from the segmentation dataset: each image's polygons go through
+# the same centroid rule as detect_gaze (Right/Left/Center/Left_Close/Right_Close)
+# and the crop is the padded eye region the segmenter's boxes would give.
+# Images without a gaze state (no eyes, one half of an eye) are skipped.
+import argparse
+import random
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset
+
+from src.cascade import (CROP_MIN_SIZE, CROP_PAD, GAZE_CLASSES, INPUT_SHAPE, build_model, eye_crop,
+                         gaze_label, segment_boxes)
+from src.roi import expand_boxes
+from utils.dataloader import LooseDataset, ShardDataset
+
+
+class EyeCropDataset(Dataset):
+    """(crop, state) pairs built from a segmentation dataset; state is -1 when undefined."""
+
+    def __init__(self, base, augment=False):
+        self.base = base
+        self.augment = augment
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, i):
+        s = self.base[i]
+        img = s["img"]
+        state = gaze_label(s["segments"], s["cls"], img.shape)
+        boxes = segment_boxes(s["segments"], img.shape)
+        region = expand_boxes(boxes, img.shape, CROP_PAD, CROP_MIN_SIZE) if len(boxes) else None
+        if state is None or region is None:
+            return torch.zeros((1,) + INPUT_SHAPE), -1
+        if self.augment:
+            region = self.jitter(region, img.shape)
+        crop = eye_crop(img, region)
+        if self.augment:
+            crop = np.clip(crop * random.uniform(0.7, 1.3) + random.uniform(-0.1, 0.1), 0, 1)
+        return torch.from_numpy(np.ascontiguousarray(crop)), state
+
+    @staticmethod
+    def jitter(region, shape, amount=0.08):
+        """Shift/scale the region a little, like the runtime region lagging a moving head."""
+        x0, y0, x1, y1 = region
+        w, h = x1 - x0, y1 - y0
+        dx0, dx1 = (random.uniform(-amount, amount) * w for _ in range(2))
+        dy0, dy1 = (random.uniform(-amount, amount) * h for _ in range(2))
+        x0, x1 = int(max(0, x0 + dx0)), int(min(shape[1], x1 + dx1))
+        y0, y1 = int(max(0, y0 + dy0)), int(min(shape[0], y1 + dy1))
+        return (x0, y0, x1, y1) if x1 - x0 > 2 and y1 - y0 > 2 else region
+
+
+def open_dataset(images=None, packed=None):
+    if packed:
+        return ShardDataset(packed)
+    return LooseDataset(images)
+
+
+def evaluate(model, loader, device, thresholds=(0.5, 0.8, 0.9, 0.95)):
+    """Accuracy, per-class accuracy and the coverage/accuracy the cascade gets at each min_conf."""
+    model.eval()
+    probs, labels = [], []
+    with torch.inference_mode():
+        for x, y in loader:
+            keep = y >= 0
+            if keep.any():
+                probs.append(torch.softmax(model(x[keep].to(device)), 1).cpu())
+                labels.append(y[keep])
+    if not probs:
+        return {}
+    probs, labels = torch.cat(probs), torch.cat(labels)
+    conf, pred = probs.max(1)
+    report = {"samples": len(labels), "accuracy": float((pred == labels).float().mean())}
+    for c, name in enumerate(GAZE_CLASSES):
+        mask = labels == c
+        if mask.any():
+            report[f"acc_{name}"] = float((pred[mask] == c).float().mean())
+    for t in thresholds:
+        sure = conf >= t
+        report[f"coverage@{t}"] = float(sure.float().mean())
+        report[f"accuracy@{t}"] = float((pred[sure] == labels[sure]).float().mean()) if sure.any() else 0.0
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the cascade's eye-state classifier")
+    ap.add_argument("--images", help="loose training images (labels: images -> labels)")
+    ap.add_argument("--packed", help="packed training shards (utils/pack_dataset.py)")
+    ap.add_argument("--val-images")
+    ap.add_argument("--val-packed")
+    ap.add_argument("--out", default="models/eye_state.pt")
+    ap.add_argument("--epochs", type=int, default=20)
+    ap.add_argument("--batch", type=int, default=256)
+    ap.add_argument("--lr", type=float, default=3e-3)
+    ap.add_argument("--width", type=int, default=16, help="channels of the first conv block")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = ap.parse_args()
+    if not (args.images or args.packed):
+        ap.error("one of --images / --packed is required")
+
+    train = EyeCropDataset(open_dataset(args.images, args.packed), augment=True)
+    loader = DataLoader(train, batch_size=args.batch, shuffle=True, num_workers=args.workers,
+                        drop_last=len(train) > args.batch)
+    val_loader = None
+    if args.val_images or args.val_packed:
+        val = EyeCropDataset(open_dataset(args.val_images, args.val_packed))
+        val_loader = DataLoader(val, batch_size=args.batch, num_workers=args.workers)
+
+    model = build_model(width=args.width).to(args.device)
+    opt = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=1e-4)
+    sched = torch.optim.lr_scheduler.OneCycleLR(opt, args.lr, total_steps=args.epochs * max(1, len(loader)))
+    loss_fn = nn.CrossEntropyLoss(ignore_index=-1, label_smoothing=0.05)
+
+    best = None
+    for epoch in range(1, args.epochs + 1):
+        model.train()
+        total, n = 0.0, 0
+        for x, y in loader:
+            x, y = x.to(args.device), y.to(args.device)
+            if (y >= 0).sum() == 0:
+                continue
+            loss = loss_fn(model(x), y)
+            opt.zero_grad()
+            loss.backward()
+            opt.step()
+            sched.step()
+            total += loss.item() * len(y)
+            n += len(y)
+        report = evaluate(model, val_loader, args.device) if val_loader else {}
+        # ties on accuracy go to the model the cascade can trust on more frames
+        score = (report.get("accuracy", -total / max(n, 1)), report.get("coverage@0.9", 0.0))
+        print(f"epoch {epoch}/{args.epochs}  loss {total / max(n, 1):.4f}  "
+              + "  ".join(f"{k} {v:.3f}" for k, v in report.items() if k != "samples"))
+        if best is None or score > best:
+            best = score
+            torch.save({"model": model.state_dict(), "width": args.width, "classes": GAZE_CLASSES,
+                        "epoch": epoch, "val": report}, args.out)
+    print(f"✅ Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
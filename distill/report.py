@@ -0,0 +1,144 @@
+# Accuracy vs CPU latency of the teacher and its distilled / pruned students.
+#
+#   python -m distill.report --teacher models/best.pt \
+#       --models runs/distill/yolo11n-seg-w0.5-320/weights/best.pt:320 models/yolo11n.pt:640 \
+#       --data data/train.yaml --limit 200 --threads 4
+#
+# Per model (path:imgsz): parameters, mask mAP50 / mAP50-95 on the first --limit
+# validation images, agreement of the gaze state (the app's centroid rule on
+# its masks) with the teacher's on the same images, and single-image CPU
+# latency through the app's TorchBackend (fused, as in main.py).  Agreement
+# needs a teacher that finds a gaze state on at least --min-decided images;
+# with fewer the report stops instead of printing a number that tests nothing.
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+import torch
+import yaml
+from ultralytics import YOLO
+from ultralytics.data.utils import check_det_dataset
+
+from src.backends import load_backend
+from src.capture import IMAGE_EXTS
+from src.geometry import EyeGeometry, gaze_from_centers
+
+
+def parse_model(spec, default_imgsz):
+    path, _, imgsz = spec.rpartition(":") if spec.rsplit(":", 1)[-1].isdigit() else (spec, "", "")
+    return path, int(imgsz) if imgsz else default_imgsz
+
+
+def val_images(data, limit):
+    """The first `limit` validation images of a dataset yaml, in a stable order."""
+    info = check_det_dataset(data)
+    roots = info["val"] if isinstance(info["val"], list) else [info["val"]]
+    images = []
+    for root in roots:
+        for dirpath, _, files in os.walk(root):
+            images.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(IMAGE_EXTS))
+    images.sort()
+    return (images[:limit] if limit else images), info["names"]
+
+
+def subset_yaml(images, names, tmp):
+    """Dataset yaml whose val split is exactly `images` (labels are found next to them as usual)."""
+    listing = os.path.join(tmp, "val.txt")
+    with open(listing, "w") as f:
+        f.write("\n".join(images) + "\n")
+    path = os.path.join(tmp, "subset.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"train": listing, "val": listing, "names": names}, f)
+    return path
+
+
+def gaze_states(backend, images, imgsz):
+    states = []
+    for path in images:
+        res = backend(cv2.imread(path), imgsz=imgsz, conf=0.25, iou=0.3)
+        geo = EyeGeometry.from_result(res, "moments", imgsz)
+        states.append(None if geo is None else gaze_from_centers(geo.centers, 640 / imgsz))
+    return states
+
+
+def latency(backend, image, imgsz, runs):
+    for _ in range(3):
+        backend(image, imgsz=imgsz, conf=0.25, iou=0.3)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        backend(image, imgsz=imgsz, conf=0.25, iou=0.3)
+        times.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mask mAP, gaze agreement with the teacher and CPU latency")
+    ap.add_argument("--teacher", default="models/best.pt")
+    ap.add_argument("--teacher-imgsz", type=int, default=640)
+    ap.add_argument("--models", nargs="*", default=[], help="candidate weights as path or path:imgsz")
+    ap.add_argument("--imgsz", type=int, default=320, help="imgsz of --models entries without one")
+    ap.add_argument("--data", default="data/train.yaml")
+    ap.add_argument("--limit", type=int, default=200, help="validation images to use (0 = all)")
+    ap.add_argument("--min-decided", type=int, default=20,
+                    help="images the teacher must find a gaze state on for agreement to mean anything")
+    ap.add_argument("--runs", type=int, default=50, help="timed inferences per model")
+    ap.add_argument("--threads", type=int, help="torch CPU threads (e.g. a typical laptop's core count)")
+    ap.add_argument("--json", help="also write the rows to this file")
+    args = ap.parse_args()
+    threads = args.threads or torch.get_num_threads()
+
+    images, names = val_images(args.data, args.limit)
+    if not images:
+        raise SystemExit(f"❌ No validation images in {args.data}")
+    probe = cv2.imread(images[0])
+    candidates = [(args.teacher, args.teacher_imgsz)] + [parse_model(m, args.imgsz) for m in args.models]
+
+    rows, teacher_states = [], None
+    with tempfile.TemporaryDirectory() as tmp:
+        data = subset_yaml(images, names, tmp)
+        for path, imgsz in candidates:
+            print(f"📏 {path} @ {imgsz}")
+            params = sum(p.numel() for p in YOLO(path, task="segment").model.parameters())
+            seg = YOLO(path, task="segment").val(data=data, imgsz=imgsz, device="cpu", plots=False,
+                                                 verbose=False, project=tmp, name="val").seg
+            backend = load_backend("torch", path, device="cpu", cache=False)
+            states = gaze_states(backend, images, imgsz)
+            if teacher_states is None:
+                teacher_states = states
+                decided = [i for i, s in enumerate(teacher_states) if s is not None]
+                if len(decided) < args.min_decided:
+                    raise SystemExit(f"❌ The teacher found a gaze state on {len(decided)} of {len(images)} "
+                                     f"images (--min-decided {args.min_decided}); gaze agreement with it "
+                                     f"would not test anything")
+            torch.set_num_threads(threads)  # validation may have changed it
+            p50, p95 = latency(backend, probe, imgsz, args.runs)
+            rows.append({
+                "model": path, "imgsz": imgsz, "params": params,
+                "mask_map50": float(seg.map50), "mask_map": float(seg.map),
+                "gaze_agreement": float(np.mean([a == b for a, b in zip(states, teacher_states)])),
+                "gaze_agreement_decided": float(np.mean([states[i] == teacher_states[i] for i in decided])),
+                "cpu_ms_p50": p50, "cpu_ms_p95": p95,
+            })
+
+    print(f"\n{len(images)} validation images ({len(decided)} with a teacher gaze state), {threads} CPU threads; "
+          f"agreement is with {args.teacher} @ {args.teacher_imgsz}\n")
+    print("| model | imgsz | params | mask mAP50 | mask mAP50-95 | gaze agreement | "
+          "agreement (teacher decided) | CPU p50 ms | CPU p95 ms |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for r in sorted(rows, key=lambda r: r["cpu_ms_p50"]):
+        print(f"| {r['model']} | {r['imgsz']} | {r['params'] / 1e6:.2f}M | {r['mask_map50']:.3f} | "
+              f"{r['mask_map']:.3f} | {r['gaze_agreement']:.1%} | "
+              f"{r['gaze_agreement_decided']:.1%} | "
+              f"{r['cpu_ms_p50']:.1f} | {r['cpu_ms_p95']:.1f} |")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
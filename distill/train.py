@@ -0,0 +1,202 @@
+# Distill the segmentation teacher (models/best.pt) into a smaller student at a lower input size.
+#
+#   python -m distill.train --teacher models/best.pt --student yolo11n-seg.yaml --width 0.5 --imgsz 320
+#   python -m distill.train --teacher models/best.pt --student models/yolo11n.pt --imgsz 320 --prune 0.3
+#   python -m distill.train --teacher models/best.pt --width 0.25 --imgsz 256 \
+#                           --epochs 2 --fraction 0.05 --batch 16 --device cpu       # CPU smoke run
+#
+# The student trains on the ground truth with the same hyperparameters as
+# train.sh.  On top of that it learns the teacher's per-anchor class scores.
+# The teacher sees the batch at --teacher-imgsz and its score maps are pooled
+# onto the student's smaller grid (per-anchor sigmoid KL, weighted by the
+# teacher's confidence so the background does not dominate).  --prune
+# removes a share of the student's channels (torch-pruning's dependency
+# graph) before training, so the fine-tune recovers the accuracy.
+# Compare the results with: python -m distill.report
+import argparse
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from ultralytics import YOLO
+from ultralytics.models.yolo.segment import SegmentationTrainer
+from ultralytics.nn.tasks import yaml_model_load
+
+# same as train.sh; fliplr stays 0 because left and right eye are different classes
+TRAIN_ARGS = dict(optimizer="AdamW", lr0=0.001, weight_decay=0.0001, box=3, mosaic=0, cos_lr=True, fliplr=0)
+
+
+def student_config(spec, width=1.0, depth=1.0):
+    """Model yaml dict of `spec` (e.g. yolo11n-seg.yaml) with its width/depth multipliers scaled."""
+    cfg = yaml_model_load(spec)
+    if width != 1.0 or depth != 1.0:
+        scale = cfg.get("scale") or "n"
+        d, w, max_channels = cfg["scales"][scale]
+        cfg["scales"] = {scale: [d * depth, w * width, max_channels]}
+        cfg["scale"] = scale
+    return cfg
+
+
+def head_scores(preds, nc):
+    """Per-level (B, nc, H, W) class logits from a segmentation model's training-mode output."""
+    if isinstance(preds, dict):  # ultralytics >= 8.4: {"scores": (B, nc, A), "feats": [...], ...}
+        preds = preds.get("one2many", preds)
+        sizes = [f.shape[-2:] for f in preds["feats"]]
+        parts = preds["scores"].split([h * w for h, w in sizes], dim=-1)
+        return [p.reshape(p.shape[0], nc, h, w) for p, (h, w) in zip(parts, sizes)]
+    return [x[:, -nc:] for x in preds[0]]  # (levels, mask coefficients, protos); box DFL bins come first
+
+
+def score_distillation(student, teacher, temperature=2.0):
+    """Confidence-weighted KL between the student's and the teacher's per-class sigmoid scores."""
+    total, weight = 0.0, 0.0
+    for s, t in zip(student, teacher):
+        if t.shape[-2:] != s.shape[-2:]:
+            t = F.adaptive_avg_pool2d(t, s.shape[-2:])  # the teacher's finer grid onto the student's
+        target = torch.sigmoid(t / temperature)
+        w = target.amax(1, keepdim=True) + 0.01
+        # BCE minus the target's own entropy: a per-anchor KL divergence, zero when they agree
+        kl = (F.binary_cross_entropy_with_logits(s / temperature, target, reduction="none")
+              - F.binary_cross_entropy_with_logits(t / temperature, target, reduction="none"))
+        total = total + (kl * w).sum()
+        weight = weight + w.sum() * s.shape[1]
+    return total / weight * temperature ** 2
+
+
+class DistillationLoss:
+    """Wraps the student's segmentation criterion and appends the distillation term."""
+
+    def __init__(self, criterion, teacher, nc, weight=1.0, temperature=2.0, scale=1.0):
+        self.criterion = criterion
+        self.teacher = teacher
+        self.nc = nc
+        self.weight = weight
+        self.temperature = temperature
+        self.scale = scale  # teacher input size / student input size
+
+    def __call__(self, preds, batch):
+        loss, items = self.criterion(preds, batch)
+        img = batch["img"]
+        with torch.no_grad():
+            if self.scale != 1.0:
+                img = F.interpolate(img, scale_factor=self.scale, mode="bilinear", align_corners=False)
+            teacher = head_scores(self.teacher(img), self.nc)
+        kd = score_distillation(head_scores(preds, self.nc), teacher, self.temperature)
+        kd = (kd * self.weight * batch["img"].shape[0]).reshape(1).to(loss.dtype)
+        return torch.cat([loss.reshape(-1), kd]), items
+
+
+def load_teacher(path, device):
+    teacher = YOLO(path, task="segment").model.float().to(device)
+    teacher.train()  # training-mode head returns the raw per-level outputs
+    for m in teacher.modules():
+        if isinstance(m, nn.modules.batchnorm._BatchNorm):
+            m.eval()  # ...but normalization keeps the trained statistics
+    for p in teacher.parameters():
+        p.requires_grad_(False)
+    return teacher
+
+
+def prune_channels(model, ratio, imgsz, round_to=8):
+    """Structured channel pruning by L2 magnitude, keeping the Segment head and the attention block whole.
+
+    The first conv of each C2f/C3k2 block is left alone too: its output is
+    chunked in two halves of a fixed size at runtime.
+    """
+    try:
+        import torch_pruning as tp
+    except ImportError:
+        raise SystemExit("❌ --prune needs torch-pruning: pip install torch-pruning")
+    from ultralytics.nn.modules.block import C2f, C2PSA
+
+    before = sum(p.numel() for p in model.parameters())
+    ignored = ([model.model[-1]] + [m for m in model.modules() if isinstance(m, C2PSA)]
+               + [m.cv1 for m in model.modules() if isinstance(m, C2f)])
+    for p in model.parameters():
+        p.requires_grad_(True)
+    model.eval()
+    pruner = tp.pruner.MetaPruner(model, torch.zeros(1, 3, imgsz, imgsz), pruning_ratio=ratio,
+                                  importance=tp.importance.GroupMagnitudeImportance(p=2),
+                                  ignored_layers=ignored, round_to=round_to)
+    pruner.step()
+    model.train()
+    after = sum(p.numel() for p in model.parameters())
+    print(f"✂️ Pruned {ratio:.0%} of the prunable channels: {before:,} -> {after:,} parameters")
+    return model
+
+
+class DistillTrainer(SegmentationTrainer):
+    """SegmentationTrainer that builds the student, optionally prunes it and adds the teacher's loss."""
+
+    def __init__(self, teacher, student_cfg=None, teacher_imgsz=640, kd_weight=1.0, temperature=2.0,
+                 prune=0.0, overrides=None):
+        super().__init__(overrides=overrides)
+        self.teacher_path = teacher
+        self.student_cfg = student_cfg
+        self.teacher_imgsz = teacher_imgsz
+        self.kd_weight = kd_weight
+        self.temperature = temperature
+        self.prune = prune
+
+    def get_model(self, cfg=None, weights=None, verbose=True):
+        model = super().get_model(self.student_cfg or cfg, weights, verbose)
+        if self.prune:
+            model = prune_channels(model, self.prune, self.args.imgsz)
+        return model
+
+    def _setup_train(self, *args, **kwargs):
+        super()._setup_train(*args, **kwargs)
+        # after the EMA copy was made, so neither the EMA nor the checkpoints carry the teacher
+        model = getattr(self.model, "module", self.model)
+        teacher = load_teacher(self.teacher_path, self.device)
+        nc = self.data["nc"]
+        if teacher.yaml.get("nc", nc) != nc:
+            raise ValueError(f"Teacher has {teacher.yaml.get('nc')} classes, the dataset {nc}")
+        model.criterion = DistillationLoss(model.init_criterion(), teacher, nc, self.kd_weight, self.temperature,
+                                           self.teacher_imgsz / self.args.imgsz)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Distill the eye segmenter into a smaller, lower-resolution student")
+    ap.add_argument("--teacher", default="models/best.pt")
+    ap.add_argument("--data", default="data/train.yaml")
+    ap.add_argument("--student", default="yolo11n-seg.yaml", help="model yaml (from scratch) or .pt to start from")
+    ap.add_argument("--width", type=float, default=1.0, help="channel multiplier on top of the yaml's scale")
+    ap.add_argument("--depth", type=float, default=1.0, help="depth multiplier on top of the yaml's scale")
+    ap.add_argument("--imgsz", type=int, default=320, help="student input size")
+    ap.add_argument("--teacher-imgsz", type=int, default=640)
+    ap.add_argument("--kd-weight", type=float, default=1.0)
+    ap.add_argument("--temperature", type=float, default=2.0)
+    ap.add_argument("--prune", type=float, default=0.0, help="share of channels to prune from a trained .pt student (needs torch-pruning)")
+    ap.add_argument("--epochs", type=int, default=50)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--fraction", type=float, default=1.0, help="train on this share of the training set")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--device", default=None)
+    ap.add_argument("--project", default="runs/distill")
+    ap.add_argument("--name", help="run name (default from student, width, imgsz, prune)")
+    args = ap.parse_args()
+
+    from_weights = args.student.endswith(".pt")
+    if from_weights and (args.width != 1.0 or args.depth != 1.0):
+        ap.error("--width/--depth apply to a model yaml, not to .pt weights (use --prune)")
+    student_cfg = None if from_weights else student_config(args.student, args.width, args.depth)
+    name = args.name or (Path(args.student).stem + ("" if from_weights else f"-w{args.width:g}")
+                         + f"-{args.imgsz}" + (f"-p{args.prune:g}" if args.prune else ""))
+    overrides = dict(TRAIN_ARGS, model=args.student, data=args.data, imgsz=args.imgsz, epochs=args.epochs,
+                     batch=args.batch, fraction=args.fraction, workers=args.workers, project=args.project,
+                     name=name, exist_ok=True, plots=False)
+    if args.device is not None:
+        overrides["device"] = args.device
+    trainer = DistillTrainer(args.teacher, student_cfg, args.teacher_imgsz, args.kd_weight, args.temperature,
+                             args.prune, overrides=overrides)
+    trainer.train()
+    best = Path(trainer.save_dir) / "weights" / "best.pt"
+    print(f"✅ Student: {best}")
+    print(f"   compare: python -m distill.report --teacher {args.teacher} --models {best}:{args.imgsz} "
+          f"--data {args.data}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,175 +1,29 @@
 import sys
-import cv2
-import torch
-import numpy as np
+import time
 import platform
 import yaml
 import threading
-from collections import deque, Counter
-import psutil
+import multiprocessing
 
 from PyQt5.QtWidgets import QApplication, QLabel, QWidget, QDesktopWidget, QGraphicsOpacityEffect
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QTimer, QPropertyAnimation
 from PyQt5.QtGui import QFont, QImage, QPixmap
-from ultralytics import YOLO
 
 from src import REGISTRY
+from src.tracker import EyeTrackerThread
+from src.foreground import ForegroundService
+from src.worker import RemoteTracker
+from src.startup import STARTUP
+from src.control import set_dispatcher
+from src.dispatcher import make_dispatcher
 from utils.path import resource_path
 
 IS_MAC = platform.system() == "Darwin"
 IS_WIN = platform.system() == "Windows"
 
-if IS_WIN:
-    import win32gui
-    import win32process
-elif IS_MAC:
-    from AppKit import NSWorkspace
-
-COLORS = [
-    (255,  64,  64),  # right_iris
-    ( 64,  64, 255),  # left_iris
-    (255, 192,   0),  # right_eyelid
-    (  0, 255, 128),  # left_eyelid
-]
-
-def get_foreground_process_name():
-    if IS_WIN:
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            return psutil.Process(pid).name()
-        except Exception:
-            return "N/A"
-    elif IS_MAC:
-        try:
-            active_app = NSWorkspace.sharedWorkspace().frontmostApplication()
-            return active_app.localizedName()
-        except Exception:
-            return "N/A"
-    else:
-        return "N/A"
-
-class EyeTrackerThread(QThread):
-    gaze_updated = pyqtSignal(str)
-    preview_frame = pyqtSignal(np.ndarray)
-    pdf_mode = pyqtSignal(str)
-
-    def __init__(self, model_path="models/best.pt", cam_id=0, overlay=None, process_name=None):
-        super().__init__()
-        model_path = resource_path(model_path)
-        self.model = YOLO(model_path)
-        self.model.fuse()
-        self.cap = cv2.VideoCapture(cam_id)
-        self.running = True
-        self.process_name = process_name
-
-        if IS_MAC:
-            self.device = "mps" if torch.backends.mps.is_available() else "cpu"
-        else:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-
-        self.required_frames = 10
-        self.min_agreement = int(self.required_frames * 0.8)
-        self.direction_buffer = deque(maxlen=self.required_frames)
-        self.gaze_directions = {0: "Right", 1: "Left", 2: "Center", 3: "Left_Close", 4: "Right_Close"}
-        self.confirmed_gaze = None
-        self.overlay = overlay
-
-    def get_center(self, mask):
-        ys, xs = np.nonzero(mask)
-        if len(xs) == 0:
-            return None
-        return int(xs.mean()), int(ys.mean())
-
-    def detect_gaze(self, masks, classes):
-        mask_dict = {cls: mask for mask, cls in zip(masks, classes)}
-        left_iris = mask_dict.get(0)
-        right_iris = mask_dict.get(1)
-        left_lid = mask_dict.get(2)
-        right_lid = mask_dict.get(3)
-
-        left_iris_c = right_iris_c = left_lid_c = right_lid_c = None
-        left_iris_mask = right_iris_mask = left_lid_mask = right_lid_mask = None
-
-        if left_iris is not None and left_lid is not None:
-            left_iris_mask, left_lid_mask = left_iris, left_lid
-            left_iris_c = self.get_center(left_iris_mask)
-            left_lid_c = self.get_center(left_lid_mask)
-        if right_iris is not None and right_lid is not None:
-            right_iris_mask, right_lid_mask = right_iris, right_lid
-            right_iris_c = self.get_center(right_iris_mask)
-            right_lid_c = self.get_center(right_lid_mask)
-
-        if right_lid is not None and right_iris is not None and (left_lid is None and left_iris is None):
-            return 3  # Right_Close
-        if left_lid is not None and left_iris is not None and (right_lid is None and right_iris is None):
-            return 4  # Left_Close
-
-        dx_values = []
-        if left_iris_c is not None and left_lid_c is not None:
-            dx_values.append(left_iris_c[0] - left_lid_c[0])
-        if right_iris_c is not None and right_lid_c is not None:
-            dx_values.append(right_iris_c[0] - right_lid_c[0])
-
-        if not dx_values:
-            return None
-
-        dx_avg = np.mean(dx_values)
-        if dx_avg > 4:
-            return 0  # Right
-        elif dx_avg < -4:
-            return 1  # Left
-        else:
-            return 2  # Center
-
-    def run(self):
-        while self.running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                continue
-            
-            frame = cv2.flip(frame, 1)
-            h, w = frame.shape[:2]
-            
-            res = self.model(frame, imgsz=640, conf=0.25, iou=0.3, device=self.device, verbose=False)[0]
-
-            if res.masks is not None:
-                masks = (res.masks.data > 0.5).cpu().numpy()
-                classes = res.boxes.cls.int().cpu().tolist()
-                current_gaze = self.detect_gaze(masks, classes)
-
-                if current_gaze is not None:
-                    self.direction_buffer.append(current_gaze)
-                    if len(self.direction_buffer) == self.required_frames:
-                        counts = Counter(self.direction_buffer)
-                        most_common, count = counts.most_common(1)[0]
-                        if count >= self.min_agreement and most_common != self.confirmed_gaze:
-                            title, pdf_mode = REGISTRY[self.process_name](most_common, self.overlay.current_process_name)
-                            self.confirmed_gaze = most_common
-                            self.pdf_mode.emit(pdf_mode)
-                            self.gaze_updated.emit(title)
-                            print("👁 Gaze:", self.gaze_directions[most_common])
-                        self.direction_buffer.clear()
-                
-                overlay = frame.copy()
-                for mask, cls in zip(masks, classes):
-                    col = COLORS[cls % len(COLORS)]
-                    mask = cv2.resize(mask.astype(np.uint8), (w, h),
-                                    interpolation=cv2.INTER_NEAREST)
-                    for c in range(3):
-                        overlay[:,:,c] = np.where(mask,
-                            0.4*col[c] + 0.6*overlay[:,:,c], overlay[:,:,c])
-                frame = overlay
-
-            self.preview_frame.emit(frame)
-        self.cap.release()
-
-    def stop(self):
-        self.running = False
-        self.quit()
-        self.wait()
-
 class OverlayWindow(QWidget):
+    process_changed = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         if IS_MAC:
@@ -203,6 +57,7 @@ class OverlayWindow(QWidget):
         self.preview_label.move(self.width() - 340, self.height() - 260)  # 위치도 조정
         self.preview_label.setStyleSheet("border: 2px solid white; background-color: black;")
         self.preview_label.hide()
+        self.preview_enabled = True
 
         self.show()
 
@@ -225,9 +80,8 @@ class OverlayWindow(QWidget):
         self.proc_label.move(screen_width - self.proc_label.width() - 20, proc_label_y)
         self.proc_label.show()
 
-        self.proc_timer = QTimer(self)
-        self.proc_timer.timeout.connect(self.update_process_name)
-        self.proc_timer.start(1000)
+        # emitted from the foreground service's thread, delivered on the GUI thread
+        self.process_changed.connect(self.update_process_name)
         
         self.mode_label = QLabel("", self)
         self.mode_label.setFont(QFont("Arial", 20, QFont.Bold))
@@ -239,6 +93,16 @@ class OverlayWindow(QWidget):
                             screen_rect.height() - self.mode_label.height() - mode_label_margin)
         self.mode_label.show()
 
+        self.status_label = QLabel("", self)  # "Loading model..." until the tracker runs
+        self.status_label.setFont(QFont("Arial", 20, QFont.Bold))
+        self.status_label.setStyleSheet("color: orange; background-color: transparent;")
+        self.status_label.hide()
+
+        self.hud_label = QLabel("", self)  # stage timings, shown once the tracker sends some
+        self.hud_label.setFont(QFont("Menlo" if IS_MAC else "Consolas", 11))
+        self.hud_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 140); padding: 2px;")
+        self.hud_label.hide()
+
     def update_gaze(self, gaze_text):
         self.label.setText(gaze_text)
         self.label.adjustSize()
@@ -264,14 +128,26 @@ class OverlayWindow(QWidget):
         self.label.show()
         QTimer.singleShot(1000, self.start_fade_out)
 
-    def update_preview(self, frame):
+    def update_preview(self, channel):
+        t0 = time.perf_counter()
+        frame = channel.take()
+        if frame is None or not self.preview_enabled:
+            return
         h, w, ch = frame.shape
         bytes_per_line = ch * w
         image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_BGR888)
         pixmap = QPixmap.fromImage(image)
-        scaled_pixmap = pixmap.scaled(320, 240, Qt.KeepAspectRatio)
-        self.preview_label.setPixmap(scaled_pixmap)
+        if w > 320 or h > 240:
+            pixmap = pixmap.scaled(320, 240, Qt.KeepAspectRatio)
+        self.preview_label.setPixmap(pixmap)
         self.preview_label.show()
+        channel.record_gui((time.perf_counter() - t0) * 1000)
+
+    def set_preview_enabled(self, enabled):
+        # Read by the tracker thread, which skips compositing while disabled.
+        self.preview_enabled = enabled
+        if not enabled:
+            self.preview_label.hide()
 
     def update_pdf_mode(self, pdf_mode):
         self.mode_label.setText(f"{pdf_mode}")
@@ -282,8 +158,23 @@ class OverlayWindow(QWidget):
         self.mode_label.move(screen_rect.width() - self.mode_label.width() - margin,
                             screen_rect.height() - self.mode_label.height() - margin)
 
-    def update_process_name(self):
-        self.current_process_name = get_foreground_process_name()
+    def update_status(self, text):
+        if not text:
+            self.status_label.hide()
+            return
+        self.status_label.setText(text)
+        self.status_label.adjustSize()
+        self.status_label.move((self.width() - self.status_label.width()) // 2, 60)
+        self.status_label.show()
+
+    def update_hud(self, text):
+        self.hud_label.setText(text)
+        self.hud_label.adjustSize()
+        self.hud_label.move(20, self.height() - self.hud_label.height() - 20)
+        self.hud_label.show()
+
+    def update_process_name(self, name):
+        self.current_process_name = name
         self.proc_label.setText(f"Process: {self.current_process_name}")
         self.proc_label.adjustSize()
 
@@ -297,6 +188,207 @@ class OverlayWindow(QWidget):
         self.fade_anim.setEndValue(0.0)
         self.fade_anim.start()
 
+class Panel(QWidget):
+    """A small frameless, click-through top-level window showing one label."""
+
+    def __init__(self, font=None, style="", size=None):
+        super().__init__()
+        flags = Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.WindowTransparentForInput
+        self.setWindowFlags(flags if IS_MAC else flags | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.label = QLabel(self)
+        if font is not None:
+            self.label.setFont(font)
+        self.label.setStyleSheet(style)
+        if size is not None:
+            self.label.setFixedSize(*size)
+            self.resize(*size)
+
+    def set_text(self, text):
+        """True when the panel changed size and has to be placed again."""
+        if text == self.label.text():
+            return False
+        self.label.setText(text)
+        self.label.adjustSize()
+        if self.label.size() == self.size():
+            return False
+        self.resize(self.label.size())
+        return True
+
+class PanelOverlay(QObject):
+    """The overlay as small independent windows instead of one full-screen translucent one.
+
+    Gaze toast, mode badge, process badge, status line, HUD, preview and the
+    four border strips are separate windows, so a label or opacity change
+    makes the compositor redraw only that window.  The toast fades through
+    its window opacity, which needs no repaint at all.  Screen geometry is
+    read once and again only when the screen signals a change; updates place
+    their panel from that cache.  Same slots as OverlayWindow.
+    """
+
+    process_changed = pyqtSignal(str)
+
+    def __init__(self, border=True):
+        super().__init__()
+        self.toast = Panel(QFont("Arial", 36, QFont.Bold), "color: red; background-color: transparent;")
+        self.toast.setWindowOpacity(0.0)
+        self.fade_anim = QPropertyAnimation(self.toast, b"windowOpacity")
+        self.fade_anim.setDuration(1000)
+        self.fade_anim.finished.connect(self.toast.hide)
+        self.hold = QTimer(self)  # restarted by every gaze update, so the newest one gets its full second
+        self.hold.setSingleShot(True)
+        self.hold.setInterval(1000)
+        self.hold.timeout.connect(self.start_fade_out)
+
+        self.preview = Panel(style="border: 2px solid white; background-color: black;", size=(320, 240))
+        self.preview_enabled = True
+        self.proc = Panel(QFont("Arial", 16, QFont.Bold), "color: lightgreen; background-color: transparent;")
+        self.mode = Panel(QFont("Arial", 20, QFont.Bold), "color: lightgreen; background-color: transparent;")
+        self.status = Panel(QFont("Arial", 20, QFont.Bold), "color: orange; background-color: transparent;")
+        self.hud = Panel(QFont("Menlo" if IS_MAC else "Consolas", 11),
+                         "color: white; background-color: rgba(0, 0, 0, 140); padding: 2px;")
+        self.border = [Panel(style="background-color: limegreen;") for _ in range(4)] if border else []
+        self.panels = [self.toast, self.preview, self.proc, self.mode, self.status, self.hud] + self.border
+
+        self.screen = None
+        self._watch(QApplication.primaryScreen())
+        QApplication.instance().primaryScreenChanged.connect(self._watch)
+        self.current_process_name = None
+        self.update_process_name("N/A")
+        for strip in self.border:
+            strip.show()
+        self.process_changed.connect(self.update_process_name)
+
+    def _watch(self, screen):
+        if self.screen is not None:
+            self.screen.geometryChanged.disconnect(self.relayout)
+            self.screen.availableGeometryChanged.disconnect(self.relayout)
+        self.screen = screen
+        screen.geometryChanged.connect(self.relayout)
+        screen.availableGeometryChanged.connect(self.relayout)
+        self.relayout()
+
+    def relayout(self, *_):
+        """Re-read the screen geometry and move every panel; only called when the screen changes."""
+        self.screen_rect = self.screen.geometry()
+        self.available = self.screen.availableGeometry()
+        r = self.screen_rect
+        self.preview.move(r.right() + 1 - 340, r.bottom() + 1 - 260)
+        if self.border:
+            width = 5
+            for strip, (x, y, w, h) in zip(self.border, (
+                    (r.x(), r.y(), r.width(), width), (r.x(), r.bottom() + 1 - width, r.width(), width),
+                    (r.x(), r.y(), width, r.height()), (r.right() + 1 - width, r.y(), width, r.height()))):
+                strip.label.setFixedSize(w, h)
+                strip.setGeometry(x, y, w, h)
+        self._place_toast()
+        self._place_proc()
+        self._place_mode()
+        self._place_status()
+        self._place_hud()
+
+    def _place_toast(self):
+        a, w, h = self.available, self.toast.width(), self.toast.height()
+        text = self.toast.label.text()
+        if text == "SCROLL UP":
+            x = int(a.width() * 0.1)
+        elif text == "SCROLL DOWN":
+            x = int(a.width() * 0.9 - w)
+        else:
+            x = (a.width() - w) // 2
+        self.toast.move(a.x() + x, a.y() + (a.height() - h) // 2)
+
+    def _place_proc(self):
+        r = self.screen_rect
+        self.proc.move(r.right() + 1 - self.proc.width() - 20, r.y() + (40 if IS_MAC else 20))
+
+    def _place_mode(self):
+        r, margin = self.screen_rect, 20
+        self.mode.move(r.right() + 1 - self.mode.width() - margin, r.bottom() + 1 - self.mode.height() - margin)
+
+    def _place_status(self):
+        r = self.screen_rect
+        self.status.move(r.x() + (r.width() - self.status.width()) // 2, r.y() + 60)
+
+    def _place_hud(self):
+        r = self.screen_rect
+        self.hud.move(r.x() + 20, r.bottom() + 1 - self.hud.height() - 20)
+
+    def update_gaze(self, gaze_text):
+        old = self.toast.label.text()
+        self.toast.set_text(gaze_text)
+        if gaze_text != old:  # the x position depends on the text, not only on the size
+            self._place_toast()
+        self.fade_anim.stop()
+        self.toast.setWindowOpacity(1.0)
+        self.toast.show()
+        self.hold.start()
+
+    def start_fade_out(self):
+        self.fade_anim.setStartValue(1.0)
+        self.fade_anim.setEndValue(0.0)
+        self.fade_anim.start()
+
+    def update_preview(self, channel):
+        t0 = time.perf_counter()
+        frame = channel.take()
+        if frame is None or not self.preview_enabled:
+            return
+        h, w, ch = frame.shape
+        image = QImage(frame.data, w, h, ch * w, QImage.Format_BGR888)
+        pixmap = QPixmap.fromImage(image)
+        if w > 320 or h > 240:
+            pixmap = pixmap.scaled(320, 240, Qt.KeepAspectRatio)
+        self.preview.label.setPixmap(pixmap)
+        self.preview.show()
+        channel.record_gui((time.perf_counter() - t0) * 1000)
+
+    def set_preview_enabled(self, enabled):
+        # Read by the tracker thread, which skips compositing while disabled.
+        self.preview_enabled = enabled
+        if not enabled:
+            self.preview.hide()
+
+    def update_pdf_mode(self, pdf_mode):
+        if self.mode.set_text(f"{pdf_mode}"):
+            self._place_mode()
+        self.mode.setVisible(bool(pdf_mode))
+
+    def update_status(self, text):
+        if not text:
+            self.status.hide()
+            return
+        if self.status.set_text(text):
+            self._place_status()
+        self.status.show()
+
+    def update_hud(self, text):
+        if self.hud.set_text(text):
+            self._place_hud()
+        self.hud.show()
+
+    def update_process_name(self, name):
+        if name == self.current_process_name:
+            return
+        self.current_process_name = name
+        if self.proc.set_text(f"Process: {name}"):
+            self._place_proc()
+        self.proc.show()
+
+    def close(self):
+        self.fade_anim.stop()
+        self.hold.stop()
+        for panel in self.panels:
+            panel.close()
+
+# "overlay" in keymap/config.yaml
+OVERLAYS = {
+    "fullscreen": OverlayWindow,
+    "panels": PanelOverlay,
+}
+
 class ConsoleInputThread(threading.Thread):
     def __init__(self, app, tracker):
         super().__init__(daemon=True)
@@ -313,6 +405,8 @@ class ConsoleInputThread(threading.Thread):
                 break
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # the worker process of a frozen build starts here
+    STARTUP.mark("imports")
     app = QApplication(sys.argv)
 
     config_path = resource_path("keymap/config.yaml")
@@ -325,15 +419,48 @@ if __name__ == "__main__":
         raise ValueError(f"❌ REGISTRY가 '{process_name}'에 해당하는 컨트롤러가 등록되어 있지 않습니다.\n"
                          f"가능한 키: {list(REGISTRY.keys())}")
 
-    overlay = OverlayWindow()
-    tracker = EyeTrackerThread(overlay=overlay, process_name=process_name)
+    overlay_mode = config.get("overlay", "fullscreen")
+    if overlay_mode not in OVERLAYS:
+        raise ValueError(f"❌ Unknown overlay '{overlay_mode}', expected one of {list(OVERLAYS)}")
+    overlay = OVERLAYS[overlay_mode]()
+    overlay.set_preview_enabled(config.get("preview", True))
+    overlay.update_status("Loading model...")
+    app.processEvents()
+    STARTUP.mark("overlay shown")
+    foreground = ForegroundService()
+    foreground.subscribe(lambda snapshot: overlay.process_changed.emit(snapshot.name))
+    foreground.start()
+    options = dict(process_name=process_name, source=config.get("source"), roi=config.get("roi"),
+                   geometry=config.get("geometry", "moments"),
+                   backend=config.get("backend", "torch"), int8=config.get("int8", False),
+                   duty_cycle=config.get("duty_cycle"), decision=config.get("decision"),
+                   preview_fps=config.get("preview_fps", 15),
+                   service=config.get("service"), cascade=config.get("cascade"),
+                   metrics=config.get("metrics"), resolution=config.get("resolution"),
+                   record=config.get("record"), motion=config.get("motion"))
+    worker = dict(config.get("worker") or {})
+    if worker.pop("enabled", False):
+        dispatcher = None  # keys are sent from the worker process
+        tracker = RemoteTracker(options, overlay=overlay, dispatch=config.get("dispatch"),
+                                get_process_name=foreground.process_name,
+                                get_process_id=lambda: foreground.snapshot.pid, **worker)
+    else:
+        dispatcher = make_dispatcher(config.get("dispatch"))
+        set_dispatcher(dispatcher)
+        tracker = EyeTrackerThread(overlay=overlay, get_process_name=foreground.process_name,
+                                   get_process_id=lambda: foreground.snapshot.pid, **options)
     tracker.gaze_updated.connect(overlay.update_gaze)
     tracker.preview_frame.connect(overlay.update_preview)
     tracker.pdf_mode.connect(overlay.update_pdf_mode)
+    tracker.metrics_updated.connect(overlay.update_hud)
+    tracker.status_changed.connect(overlay.update_status)
 
     tracker.start()
     console_input_thread = ConsoleInputThread(app, tracker)
     console_input_thread.start()
     exit_code = app.exec_()
     tracker.stop()
+    foreground.stop()
+    if dispatcher is not None:
+        dispatcher.stop()
     sys.exit(exit_code)
\ No newline at end of file
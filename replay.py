@@ -0,0 +1,200 @@
+# Headless replay of the gaze pipeline on a video file or image directory.
+#
+#   python replay.py --source clip.mp4 --labels clip.csv
+#   python replay.py --source data/images/val/G1/001/30/RGB --backend onnx --json report.json
+#   python replay.py --source clip.mp4 --labels clip.csv --motion shadow   # what motion gating would change
+#
+# The label track is a CSV of `frame,state` rows (state 0-4 as in gaze_directions, empty when
+# unknown); a row applies until the next one.
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import csv
+import sys
+import json
+import time
+import types
+
+import numpy as np
+import yaml
+
+import src.control as control
+from src.dispatcher import RecordingBackend, make_dispatcher
+from src.startup import STARTUP
+from src.tracker import EyeTrackerThread
+from src.foreground import ForegroundService, FakeProvider
+from utils.path import resource_path
+
+
+def load_labels(path, n_frames):
+    labels = [None] * n_frames
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().isdigit():
+                continue  # header / blank
+            state = row[1].strip() if len(row) > 1 else ""
+            rows.append((int(row[0]), int(state) if state else None))
+    rows.sort()
+    for i, (start, state) in enumerate(rows):
+        end = rows[i + 1][0] if i + 1 < len(rows) else n_frames
+        for f in range(start, min(end, n_frames)):
+            labels[f] = state
+    return labels
+
+
+def decision_latency(labels, confirmations, fps, frame_done):
+    """Frames/ms from each labelled gaze change to the matching confirmed gaze.
+
+    `confirmations` is a list of (frame, state) in frame order; a confirmation that
+    does not match the label of its frame counts as spurious.
+    """
+    changes = [i for i in range(len(labels)) if labels[i] is not None and (i == 0 or labels[i] != labels[i - 1])]
+    latencies, missed = [], 0
+    for k, start in enumerate(changes):
+        end = changes[k + 1] if k + 1 < len(changes) else len(labels)
+        hit = next((f for f, s in confirmations if start <= f < end and s == labels[start]), None)
+        if hit is None:
+            missed += 1
+            continue
+        lat_ms = (hit - start) * 1000.0 / fps + frame_done.get(hit, 0.0)
+        latencies.append((hit - start, lat_ms))
+    spurious = sum(1 for f, s in confirmations if f < len(labels) and labels[f] is not None and labels[f] != s)
+    return latencies, missed, spurious, len(changes)
+
+
+def percentiles(values):
+    if not len(values):
+        return {}
+    values = np.asarray(values)
+    return {"mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)), "p99": float(np.percentile(values, 99))}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", required=True, help="video file, image directory or synthetic[:WxH[@fps][:frames]]")
+    ap.add_argument("--labels", help="CSV label track: frame,state")
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--config", default="keymap/config.yaml")
+    ap.add_argument("--backend", help="override the config backend")
+    ap.add_argument("--process", default="msedge.exe", help="fake foreground process name")
+    ap.add_argument("--realtime", action="store_true",
+                    help="pace the source at its fps and drop frames like a live camera")
+    ap.add_argument("--no-preview", action="store_true", help="skip preview compositing")
+    ap.add_argument("--motion", choices=("off", "on", "shadow"),
+                    help="override the motion gate: shadow segments every frame and reports what gating changes")
+    ap.add_argument("--json", help="write the report to this file")
+    ap.add_argument("--dump-gaze", help="write per-frame raw/confirmed gaze states to this CSV")
+    args = ap.parse_args()
+
+    with open(resource_path(args.config), "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    motion = dict(config.get("motion") or {})
+    if args.motion:
+        motion.update(enabled=args.motion != "off", shadow=args.motion == "shadow")
+
+    keys = RecordingBackend()
+    dispatch = dict(config.get("dispatch") or {}, backend="recording")
+    if not args.realtime:
+        dispatch["page_interval"] = 0  # wall-clock rate limits don't apply to a faster-than-live replay
+    control.set_dispatcher(make_dispatcher(dispatch, backend=keys))
+
+    foreground = ForegroundService(FakeProvider(args.process)).start()
+    overlay = types.SimpleNamespace(preview_enabled=False) if args.no_preview else None
+    tracker = EyeTrackerThread(model_path=args.weights, overlay=overlay,
+                               process_name=config.get("control", "pdf"),
+                               source=args.source, realtime=args.realtime, lossless=not args.realtime,
+                               roi=config.get("roi"), geometry=config.get("geometry", "moments"),
+                               backend=args.backend or config.get("backend", "torch"),
+                               int8=config.get("int8", False),
+                               get_process_name=foreground.process_name,
+                               get_process_id=lambda: foreground.snapshot.pid,
+                               duty_cycle=config.get("duty_cycle"), decision=config.get("decision"),
+                               preview_fps=config.get("preview_fps", 15),
+                               service=config.get("service"), cascade=config.get("cascade"),
+                               metrics=config.get("metrics"), resolution=config.get("resolution"),
+                               record=config.get("record"), motion=motion)
+
+    if not tracker.load():  # model load and warm-up stay out of the timed run
+        sys.exit("❌ Tracker did not start")
+    fps = tracker.capture.fps
+
+    records = []
+    tracker.frame_processed.connect(records.append)
+
+    t0 = time.perf_counter()
+    tracker.run()  # same loop as the QThread, on this thread
+    wall = time.perf_counter() - t0
+    control.get_dispatcher().stop()
+
+    # (source frame, state) wherever the confirmed gaze changed; capture seq starts at 1
+    confirmations = []
+    previous = None
+    for r in records:
+        if r[5] != previous:
+            confirmations.append((r[0] - 1, r[5]))
+            previous = r[5]
+    pipeline_ms = np.array([(r[3] - r[1]) * 1000 for r in records])
+    process_ms = np.array([(r[3] - r[2]) * 1000 for r in records])
+    report = {
+        "source": args.source,
+        "frames": len(records),
+        "source_frames": tracker.capture.stats()["pushed"],
+        "wall_s": wall,
+        "throughput_fps": len(records) / wall if wall else 0.0,
+        "pipeline_ms": percentiles(pipeline_ms),
+        "processing_ms": percentiles(process_ms),
+        "confirmations": len(confirmations),
+        "keys": sum(repeat for _, kind, _, repeat in keys.sent if kind == "key"),
+        "dispatch": control.get_dispatcher().stats(),
+        "stages": tracker.metrics.snapshot(),
+        "startup": [{"stage": name, "at_s": at, "delta_s": delta} for name, at, delta in STARTUP.breakdown()],
+        "capture": tracker.capture.stats(),
+        "preview": tracker.preview.stats(),
+    }
+    if tracker.roi is not None:
+        report["roi"] = tracker.roi.summary()
+    if tracker.scheduler is not None:
+        report["duty_cycle"] = tracker.scheduler.metrics()
+    if tracker.cascade is not None:
+        report["cascade"] = tracker.cascade.summary()
+    if tracker.motion is not None:
+        report["motion"] = tracker.motion.summary()
+    if tracker.resolution is not None:
+        report["resolution"] = tracker.resolution.summary()
+    if tracker.recorder is not None:
+        report["session_log"] = tracker.recorder.path
+
+    if args.labels:
+        n = report["source_frames"]
+        labels = load_labels(args.labels, n)
+        frame_done = {r[0] - 1: (r[3] - r[1]) * 1000 for r in records}
+        latencies, missed, spurious, changes = decision_latency(
+            labels, confirmations, fps, frame_done)
+        report["decision"] = {
+            "gaze_changes": changes,
+            "detected": len(latencies),
+            "missed": missed,
+            "spurious": spurious,
+            "latency_frames": percentiles([l[0] for l in latencies]),
+            "latency_ms": percentiles([l[1] for l in latencies]),
+        }
+
+    if args.dump_gaze:
+        with open(args.dump_gaze, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "raw", "confirmed"])
+            writer.writerows((r[0] - 1, "" if r[4] is None else r[4], "" if r[5] is None else r[5])
+                             for r in records)
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
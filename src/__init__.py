@@ -1,11 +1,15 @@
 REGISTRY = {}
+CAN_ACT = {}  # controller -> predicate on the foreground process name
 
 from .control import control_pdf
 from .control import control_youtube
 from .control import control_web
 from .control import control_ppt
+from .control import pdf_can_act
 
 REGISTRY['pdf'] = control_pdf
 REGISTRY['youtube'] = control_youtube
 REGISTRY['web'] = control_web
-REGISTRY['ppt'] = control_ppt
\ No newline at end of file
+REGISTRY['ppt'] = control_ppt
+
+CAN_ACT['pdf'] = pdf_can_act
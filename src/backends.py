@@ -0,0 +1,136 @@
+import os
+import copy
+import hashlib
+import platform
+
+from .service import RemoteBackend
+
+IS_MAC = platform.system() == "Darwin"
+# fused models are cached here, keyed by the weights' sha256 (the bundle directory may be read-only)
+CACHE_DIR = os.environ.get("EYETRACK_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "EbookControlHelper"))
+
+
+def default_device():
+    import torch
+
+    if IS_MAC:
+        return "mps" if torch.backends.mps.is_available() else "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def artifact_path(model_path, fmt, int8=False):
+    """Where `utils/export.py` writes the `fmt` artifact for `model_path`."""
+    stem = os.path.splitext(model_path)[0] + ("_int8" if int8 else "")
+    if fmt == "onnx":
+        return stem + ".onnx"
+    if fmt == "openvino":
+        return stem + "_openvino_model"
+    raise ValueError(f"Unknown export format '{fmt}'")
+
+
+def weights_hash(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fused_cache_path(model_path, cache_dir=None):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f"{stem}-{weights_hash(model_path)[:16]}-fused.pt")
+
+
+class TorchBackend:
+    """PyTorch weights through ultralytics, on cuda / mps / cpu.
+
+    The fused model is cached under CACHE_DIR, so later starts skip fusing;
+    a changed weights file gets a new cache entry.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_path, device=None, int8=False, cache=True):
+        from ultralytics import YOLO
+
+        if int8:
+            print("⚠️ int8 only applies to the onnx and openvino exports; the torch backend runs full precision")
+        self.device = device or default_device()
+        self.cache_hit = False
+        cached = fused_cache_path(model_path) if cache else None
+        if cached and os.path.exists(cached):
+            try:
+                self.model = YOLO(cached, task="segment")
+                self.cache_hit = True
+                return
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable model cache {cached}: {e}")
+        self.model = YOLO(model_path)
+        self.model.fuse()
+        if cached:
+            self._save_fused(cached)
+
+    def _save_fused(self, path):
+        import torch
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ckpt = {**(self.model.ckpt or {}), "model": copy.deepcopy(self.model.model).float(),
+                    "ema": None, "optimizer": None}
+            tmp = f"{path}.{os.getpid()}.tmp"
+            torch.save(ckpt, tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Could not cache the fused model: {e}")
+
+    def __call__(self, image, imgsz=640, conf=0.25, iou=0.3):
+        return self.model(image, imgsz=imgsz, conf=conf, iou=iou, device=self.device, verbose=False)[0]
+
+    def batch(self, images, imgsz=640, conf=0.25, iou=0.3):
+        """One forward pass over a list of images; returns one result per image."""
+        return self.model(images, imgsz=imgsz, conf=conf, iou=iou, device=self.device, verbose=False)
+
+
+class ExportedBackend(TorchBackend):
+    """An exported artifact run by ultralytics' AutoBackend; results match TorchBackend."""
+
+    fmt = None
+
+    def __init__(self, model_path, device=None, int8=False):
+        from ultralytics import YOLO
+
+        path = model_path if not model_path.endswith(".pt") else artifact_path(model_path, self.fmt, int8)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{self.name} model not found: {path}\n"
+                                    f"Export it first: python -m utils.export --weights {model_path} "
+                                    f"--formats {self.fmt}" + (" --int8" if int8 else ""))
+        if model_path.endswith(".pt") and os.path.getmtime(path) < os.path.getmtime(model_path):
+            print(f"⚠️ {path} is older than {model_path}; re-export it to pick up the new weights")
+        self.path = path
+        self.device = device or "cpu"
+        self.cache_hit = None
+        self.model = YOLO(path, task="segment")
+
+
+class OnnxBackend(ExportedBackend):
+    name = "onnx"
+    fmt = "onnx"
+
+
+class OpenVINOBackend(ExportedBackend):
+    name = "openvino"
+    fmt = "openvino"
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "openvino": OpenVINOBackend,
+    "remote": RemoteBackend,  # the shared service, see src/service.py
+}
+
+
+def load_backend(name, model_path, device=None, int8=False, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {list(BACKENDS)}")
+    return BACKENDS[name](model_path, device=device, int8=int8, **options)
@@ -0,0 +1,207 @@
+import os
+import time
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+SYNTHETIC_FRAMES = 300  # length of a "synthetic" source without a frame count when it has to end
+
+
+class LatestFrameBuffer:
+    """Frame hand-off between the capture and inference stages.
+
+    In the default mode the buffer keeps at most `capacity` frames and drops the
+    oldest one when a new frame arrives, and `get()` returns only the newest
+    frame (everything older is discarded).  With `lossless=True` the producer
+    blocks instead, which is what offline replay wants.
+    """
+
+    def __init__(self, capacity=1, lossless=False):
+        self.capacity = max(1, int(capacity))
+        self.lossless = lossless
+        self._frames = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.seq = 0
+        self.pushed = 0
+        self.dropped = 0
+        self.consumed = 0
+
+    def put(self, frame, timestamp=None):
+        with self._cond:
+            if self.lossless:
+                while len(self._frames) >= self.capacity and not self.closed:
+                    self._cond.wait()
+            if self.closed:
+                return False
+            if len(self._frames) >= self.capacity:
+                self._frames.popleft()
+                self.dropped += 1
+            self.seq += 1
+            ts = time.perf_counter() if timestamp is None else timestamp
+            self._frames.append((self.seq, ts, frame))
+            self.pushed += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Return `(seq, timestamp, frame)` or None on timeout / end of stream."""
+        with self._cond:
+            if not self._frames and not self.closed:
+                self._cond.wait(timeout)
+            if not self._frames:
+                return None
+            if self.lossless:
+                item = self._frames.popleft()
+            else:
+                item = self._frames.pop()
+                self.dropped += len(self._frames)
+                self._frames.clear()
+            self.consumed += 1
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"pushed": self.pushed, "dropped": self.dropped,
+                    "consumed": self.consumed, "pending": len(self._frames)}
+
+
+class ImageDirSource:
+    """cv2.VideoCapture-like source over the images of a directory (sorted by name)."""
+
+    def __init__(self, path, fps=30.0):
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.lower().endswith(IMAGE_EXTS))
+        self.fps = fps
+        self.index = 0
+
+    def isOpened(self):
+        return self.index < len(self.files)
+
+    def read(self):
+        while self.index < len(self.files):
+            frame = cv2.imread(self.files[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        self.index = len(self.files)
+
+
+class SyntheticSource:
+    """Generated frames with two moving dark "eyes", for tests without a webcam."""
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=None):
+        self.width, self.height = width, height
+        self.fps = fps
+        self.frames = frames
+        self.index = 0
+        self._base = np.full((height, width, 3), 180, dtype=np.uint8)
+
+    def isOpened(self):
+        return self.frames is None or self.index < self.frames
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        frame = self._base.copy()
+        w, h = self.width, self.height
+        shift = int(0.05 * w * np.sin(self.index / 15.0))
+        for cx in (w * 3 // 8, w * 5 // 8):
+            cv2.ellipse(frame, (cx, h // 2), (w // 12, h // 20), 0, 0, 360, (235, 235, 235), -1)
+            cv2.circle(frame, (cx + shift, h // 2), h // 24, (40, 40, 40), -1)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        self.frames = self.index
+
+
+def open_source(source, finite=False):
+    """Open a frame source.
+
+    `source` is a camera index, a video file, a directory of images or
+    "synthetic[:WxH[@fps][:frames]]".  Returns `(source, live)`; live sources
+    are paced by the device, file sources end when they run out of frames.
+    A synthetic source without a frame count runs until stopped, or for
+    SYNTHETIC_FRAMES frames when `finite` (lossless replay).
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        cap = cv2.VideoCapture(int(source))
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # keep the driver queue short
+        return cap, True
+    if source.startswith("synthetic"):
+        spec = source.split(":")[1:] + ["", ""]
+        size, _, fps = spec[0].partition("@")
+        width, height = (int(v) for v in size.split("x")) if size else (640, 480)
+        frames = int(spec[1]) if spec[1] else (SYNTHETIC_FRAMES if finite else None)
+        return SyntheticSource(width, height, float(fps) if fps else 30.0, frames), False
+    if os.path.isdir(source):
+        return ImageDirSource(source), False
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Frame source not found: {source}")
+    return cv2.VideoCapture(source), False
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames as fast as the source delivers them into a LatestFrameBuffer."""
+
+    def __init__(self, source, live=True, realtime=None, lossless=False):
+        super().__init__(daemon=True)
+        self.source = source
+        self.live = live
+        # File sources are paced to their fps unless we replay as fast as possible.
+        self.realtime = (not live) if realtime is None else realtime
+        self.frames = LatestFrameBuffer(capacity=1, lossless=lossless)
+        self.running = True
+        self.read_failures = 0
+
+    @property
+    def fps(self):
+        fps = getattr(self.source, "fps", None)
+        if fps is None and hasattr(self.source, "get"):
+            fps = self.source.get(cv2.CAP_PROP_FPS)
+        return fps or 30.0
+
+    def run(self):
+        interval = 1.0 / self.fps
+        next_t = time.perf_counter()
+        try:
+            while self.running and self.source.isOpened():
+                ret, frame = self.source.read()
+                if not ret:
+                    if self.live:
+                        self.read_failures += 1
+                        continue
+                    break
+                if self.realtime and not self.live:
+                    next_t += interval
+                    delay = next_t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self.frames.put(frame)
+        finally:
+            self.frames.close()
+            self.source.release()
+
+    def stop(self):
+        self.running = False
+        self.frames.close()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=1.0)
+
+    def stats(self):
+        stats = self.frames.stats()
+        stats["read_failures"] = self.read_failures
+        return stats
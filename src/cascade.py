@@ -0,0 +1,138 @@
+import time
+
+import cv2
+import numpy as np
+
+from .geometry import gaze_from_centers, polygon_moments
+from .roi import expand_boxes
+
+GAZE_CLASSES = ("Right", "Left", "Center", "Left_Close", "Right_Close")  # same ids as detect_gaze
+INPUT_SHAPE = (48, 96)  # grayscale crop fed to the classifier, (h, w)
+CROP_PAD = 0.6
+CROP_MIN_SIZE = 96
+
+
+def gaze_label(segments, classes, shape, imgsz=640):
+    """Gaze state of one labelled image, by the same rule detect_gaze applies to masks.
+
+    `segments` are normalized polygons of the merged 4-class dataset; they are
+    measured in the mask pixels of a full-frame `imgsz` pass.
+    """
+    h, w = shape[:2]
+    pixels = [np.asarray(seg, dtype=np.float64) * (w, h) for seg in segments]
+    stats = polygon_moments(pixels, imgsz / max(h, w))
+    centers = {}
+    for cls, (area, cx, cy) in zip(classes, stats):
+        centers[int(cls)] = (cx, cy) if area > 0 else None
+    return gaze_from_centers(centers)
+
+
+def segment_boxes(segments, shape):
+    h, w = shape[:2]
+    boxes = [(s[:, 0].min() * w, s[:, 1].min() * h, s[:, 0].max() * w, s[:, 1].max() * h)
+             for s in map(np.asarray, segments) if len(s)]
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def eye_crop(frame, region):
+    """The classifier input for `region` of a BGR frame: (1, h, w) float32 in [0, 1]."""
+    x0, y0, x1, y1 = region
+    gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, INPUT_SHAPE[::-1], interpolation=cv2.INTER_AREA)
+    return (small.astype(np.float32) / 255.0)[None]
+
+
+def build_model(n_classes=len(GAZE_CLASSES), width=16):
+    import torch.nn as nn
+
+    def block(c_in, c_out):
+        return nn.Sequential(nn.Conv2d(c_in, c_out, 3, 2, 1, bias=False), nn.BatchNorm2d(c_out), nn.ReLU(inplace=True))
+
+    return nn.Sequential(
+        block(1, width), block(width, width * 2), block(width * 2, width * 4), block(width * 4, width * 4),
+        nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(width * 4, n_classes),
+    )
+
+
+class EyeStateClassifier:
+    """The tiny eye-state CNN trained by classify/train.py, on the CPU by default."""
+
+    def __init__(self, weights, device="cpu"):
+        import torch
+
+        ckpt = torch.load(weights, map_location=device)
+        self.model = build_model(width=ckpt.get("width", 16))
+        self.model.load_state_dict(ckpt["model"])
+        self.model.to(device).eval()
+        self.device = device
+        self._torch = torch
+
+    def __call__(self, crop):
+        """Return `(state, confidence)` for one `eye_crop`."""
+        with self._torch.inference_mode():
+            x = self._torch.from_numpy(crop[None]).to(self.device)
+            probs = self._torch.softmax(self.model(x), 1)[0]
+            conf, state = probs.max(0)
+        return int(state), float(conf)
+
+
+class Cascade:
+    """Serves frames from the classifier while it is sure, the segmenter otherwise.
+
+    The classifier needs an eye region, which comes from the last segmenter
+    boxes.  The segmenter runs when there is no region, when the classifier's
+    confidence is below `min_conf`, and at least every `max_streak` frames so
+    the region follows the head.
+    """
+
+    def __init__(self, weights, min_conf=0.9, max_streak=15, device="cpu"):
+        self.classifier = EyeStateClassifier(weights, device)
+        self.min_conf = min_conf
+        self.max_streak = max_streak
+        self.region = None
+        self.streak = 0
+        self.counts = {"cheap": 0, "uncertain": 0, "no_region": 0}
+        self.cheap_ms = 0.0
+        self.segment_ms = 0.0
+        self.frame_ms = 0.0
+
+    def classify(self, frame):
+        """`(state, conf)` when the cheap path can serve this frame, else None."""
+        if self.region is None or self.streak >= self.max_streak:
+            self.counts["no_region"] += 1
+            return None
+        t0 = time.perf_counter()
+        state, conf = self.classifier(eye_crop(frame, self.region))
+        ms = (time.perf_counter() - t0) * 1000
+        self.cheap_ms += ms
+        self.frame_ms += ms
+        if conf < self.min_conf:
+            self.counts["uncertain"] += 1
+            return None
+        self.counts["cheap"] += 1
+        self.streak += 1
+        return state, conf
+
+    def update(self, boxes, frame_shape, infer_ms):
+        """After a segmenter pass: move the region to its boxes (full-frame xyxy)."""
+        self.segment_ms += infer_ms
+        self.frame_ms += infer_ms
+        self.streak = 0
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.region = expand_boxes(boxes, frame_shape, CROP_PAD, CROP_MIN_SIZE) if len(boxes) else None
+
+    def summary(self):
+        frames = sum(self.counts.values())
+        segmented = frames - self.counts["cheap"]
+        seg_mean = self.segment_ms / segmented if segmented else 0.0
+        frame_mean = self.frame_ms / frames if frames else 0.0
+        return {
+            "frames": frames,
+            "cheap_fraction": self.counts["cheap"] / frames if frames else 0.0,
+            "uncertain": self.counts["uncertain"],
+            "no_region": self.counts["no_region"],
+            "cheap_ms": self.cheap_ms / (self.counts["cheap"] + self.counts["uncertain"] or 1),
+            "segment_ms": seg_mean,
+            # inference fps against segmenting every frame
+            "fps_gain": seg_mean / frame_mean if frame_mean and seg_mean else 1.0,
+        }
@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+
+
+class MaskCompositor:
+    """Draws the segmentation masks over a (downscaled) frame for the preview.
+
+    All masks are first merged into one class-label map at mask resolution,
+    the label map is resized once, and the colours are blended in a single
+    integer pass over the labelled pixels only.  Output frames come from a
+    small pool of reused buffers.
+    """
+
+    def __init__(self, colors, alpha=0.4, size=(320, 240), pool=3):
+        self.colors = colors
+        self.size = size  # (w, h) box the preview must fit in, None for camera resolution
+        a = int(round(alpha * 256))
+        self.keep = 256 - a
+        self.lut = np.zeros((len(colors) + 1, 3), dtype=np.uint16)
+        self.lut[1:] = np.asarray(colors, dtype=np.uint16) * a
+        self.pool = pool
+        self._buffers = []
+        self._next = 0
+        self._labels = None
+        self._region_labels = None
+
+    def output_shape(self, frame_shape):
+        h, w = frame_shape[:2]
+        if self.size is None:
+            return h, w
+        r = min(self.size[0] / w, self.size[1] / h)
+        return max(1, int(round(h * r))), max(1, int(round(w * r)))
+
+    def _buffer(self, shape):
+        if not self._buffers or self._buffers[0].shape != shape:
+            self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.pool)]
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % self.pool
+        return buf
+
+    def compose(self, frame, masks=None, classes=None, region=None, out=None):
+        """Return the preview image.
+
+        `masks` is an (N, mh, mw) boolean array covering the whole frame, or the
+        `region` crop `(x0, y0, x1, y1)` of it when the result came from an ROI pass.
+        """
+        h, w = frame.shape[:2]
+        oh, ow = self.output_shape(frame.shape)
+        if out is None:
+            out = self._buffer((oh, ow, 3))
+        if (oh, ow) == (h, w):
+            np.copyto(out, frame)
+        else:
+            cv2.resize(frame, (ow, oh), dst=out, interpolation=cv2.INTER_AREA)
+
+        if masks is None or len(masks) == 0:
+            return out
+
+        mh, mw = masks.shape[1:3]
+        if self._labels is None or self._labels.shape != (mh, mw):
+            self._labels = np.zeros((mh, mw), dtype=np.uint8)
+        else:
+            self._labels.fill(0)
+        n = len(self.colors)
+        for mask, cls in zip(masks, classes):
+            np.copyto(self._labels, cls % n + 1, where=mask.astype(bool, copy=False))
+
+        sx, sy = ow / w, oh / h
+        if region is None:
+            x0, y0, x1, y1 = 0, 0, ow, oh
+        else:
+            x0, y0 = int(region[0] * sx), int(region[1] * sy)
+            x1, y1 = max(x0 + 1, int(region[2] * sx)), max(y0 + 1, int(region[3] * sy))
+        if self._region_labels is None or self._region_labels.shape != (y1 - y0, x1 - x0):
+            self._region_labels = np.empty((y1 - y0, x1 - x0), dtype=np.uint8)
+        labels = cv2.resize(self._labels, (x1 - x0, y1 - y0), dst=self._region_labels,
+                            interpolation=cv2.INTER_NEAREST)
+
+        target = out[y0:y1, x0:x1]
+        sel = labels != 0
+        px = target[sel].astype(np.uint16)
+        px *= self.keep
+        px += self.lut[labels[sel]]
+        px >>= 8
+        target[sel] = px
+        if region is not None:
+            cv2.rectangle(out, (x0, y0), (x1 - 1, y1 - 1), (255, 255, 255), 1)
+        return out
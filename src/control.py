@@ -2,17 +2,14 @@ import os
 import yaml
 import platform
 from utils.path import resource_path
+from .dispatcher import make_dispatcher
 
 IS_WIN = platform.system() == "Windows"
 IS_MAC = platform.system() == "Darwin"
 
-if IS_WIN:
-    import keyboard
-elif IS_MAC:
-    import pyautogui
-    from AppKit import NSWorkspace
 pdf_mode = "fit_page"
 _last_command = None
+_dispatcher = None
 
 
 def _load_gaze_actions(config_path="keymap/config.yaml"):
@@ -26,36 +23,34 @@ _gaze_config = _load_gaze_actions()
 _gaze_actions = {k: v for k, v in _gaze_config.items() if isinstance(k, int)}
 
 
+def set_dispatcher(dispatcher):
+    """Route every controller's keys through `dispatcher` (see src/dispatcher.py)."""
+    global _dispatcher
+    _dispatcher = dispatcher
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = make_dispatcher(_gaze_config.get("dispatch"))
+    return _dispatcher
+
 def focus_app_by_name(app_name):
-    apps = NSWorkspace.sharedWorkspace().runningApplications()
-    for app in apps:
-        if app.localizedName().lower() == app_name.lower():
-            app.activateWithOptions_(1 << 1)
-            break
+    get_dispatcher().focus(app_name)
 
 def _send_key(key: str, repeat: int = 1):
-    for _ in range(repeat):
-        if IS_WIN:
-            keyboard.send(key)
-        elif IS_MAC:
-            if "+" in key:
-                keys = key.split("+")
-                for k in keys:
-                    pyautogui.keyDown(k)
-                for k in reversed(keys):
-                    pyautogui.keyUp(k)
-            else:
-                pyautogui.press(key)
+    get_dispatcher().send_key(key, repeat)
+
+def pdf_can_act(process_name: str):
+    if IS_WIN:
+        return process_name.lower() == "msedge.exe"
+    if IS_MAC:
+        return process_name.lower() == "microsoft edge"
+    return True
 
 def control_pdf(gaze_state: int, process_name: str):
     global _last_command, pdf_mode
 
-    if IS_WIN and process_name.lower() != "msedge.exe":
-        if pdf_mode == "fit_page":
-            return None, "PAGE MODE"
-        else:
-            return None, "SCROLL MODE"
-    if IS_MAC and process_name.lower() != "microsoft edge":
+    if not pdf_can_act(process_name):
         if pdf_mode == "fit_page":
             return None, "PAGE MODE"
         else:
@@ -0,0 +1,121 @@
+from collections import deque, Counter
+
+import numpy as np
+
+N_STATES = 5  # Right, Left, Center, Left_Close, Right_Close
+
+
+class BatchVote:
+    """The original decision rule: a full window of frames, majority at `agreement`, then clear."""
+
+    def __init__(self, window=10, agreement=0.8):
+        self.window = window
+        self.min_agreement = int(window * agreement)
+        self.buffer = deque(maxlen=window)
+
+    def update(self, state, weight=1.0):
+        self.buffer.append(state)
+        if len(self.buffer) < self.window:
+            return None
+        most_common, count = Counter(self.buffer).most_common(1)[0]
+        self.buffer.clear()
+        return most_common if count >= self.min_agreement else None
+
+    def reset(self):
+        self.buffer.clear()
+
+
+class SlidingVote:
+    """Majority over the last `window` frames, re-evaluated on every frame.
+
+    A new state is confirmed as soon as it holds `agreement` of the window,
+    so a change needs `window * agreement` frames instead of one to two full windows.
+    """
+
+    def __init__(self, window=10, agreement=0.8):
+        self.window = window
+        self.min_agreement = max(1, int(window * agreement))
+        self.buffer = deque()
+        self.counts = [0] * N_STATES
+
+    def update(self, state, weight=1.0):
+        self.buffer.append(state)
+        self.counts[state] += 1
+        if len(self.buffer) > self.window:
+            self.counts[self.buffer.popleft()] -= 1
+        return state if self.counts[state] >= self.min_agreement else None
+
+    def reset(self):
+        self.buffer.clear()
+        self.counts = [0] * N_STATES
+
+
+class EMAFilter:
+    """Confidence-weighted exponential filter over the state indicators.
+
+    Each frame moves the scores toward the observed state by `alpha * weight`;
+    a state is confirmed once its score reaches `threshold`.  Higher alpha means
+    faster decisions, a higher threshold means fewer false triggers.
+    """
+
+    def __init__(self, alpha=0.35, threshold=0.75):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.scores = np.zeros(N_STATES)
+
+    def update(self, state, weight=1.0):
+        a = min(1.0, self.alpha * weight)
+        self.scores *= 1 - a
+        self.scores[state] += a
+        return state if self.scores[state] >= self.threshold else None
+
+    def reset(self):
+        self.scores[:] = 0
+
+
+class HMMFilter:
+    """Forward filter of a five-state HMM with sticky transitions.
+
+    `stay` is the probability that the true gaze does not change between frames
+    and `hit` the probability that a frame's raw state is correct.  The weight
+    tempers the observation likelihood.  A state is confirmed when its posterior
+    reaches `threshold`.
+    """
+
+    def __init__(self, stay=0.9, hit=0.7, threshold=0.9):
+        self.threshold = threshold
+        off = (1 - stay) / (N_STATES - 1)
+        self.transition = np.full((N_STATES, N_STATES), off)
+        np.fill_diagonal(self.transition, stay)
+        self.hit = hit
+        self.miss = (1 - hit) / (N_STATES - 1)
+        self.posterior = np.full(N_STATES, 1.0 / N_STATES)
+
+    def update(self, state, weight=1.0):
+        prior = self.posterior @ self.transition
+        likelihood = np.full(N_STATES, self.miss)
+        likelihood[state] = self.hit
+        post = prior * likelihood ** weight
+        self.posterior = post / post.sum()
+        best = int(self.posterior.argmax())
+        return best if self.posterior[best] >= self.threshold else None
+
+    def reset(self):
+        self.posterior[:] = 1.0 / N_STATES
+
+
+DECISION_FILTERS = {
+    "batch": BatchVote,
+    "sliding": SlidingVote,
+    "ema": EMAFilter,
+    "hmm": HMMFilter,
+}
+
+
+def make_filter(config=None):
+    """Build a filter from `{"filter": name, **params}`; defaults to the sliding vote."""
+    config = dict(config or {})
+    name = config.pop("filter", "sliding")
+    if name not in DECISION_FILTERS:
+        raise ValueError(f"Unknown decision filter '{name}', expected one of {list(DECISION_FILTERS)}")
+    return DECISION_FILTERS[name](**config)
@@ -0,0 +1,234 @@
+import time
+import platform
+import threading
+from collections import deque
+
+import numpy as np
+
+IS_WIN = platform.system() == "Windows"
+IS_MAC = platform.system() == "Darwin"
+
+PAGE_KEYS = ("pagedown", "pageup")
+
+
+class OSKeyBackend:
+    """Real keystrokes: `keyboard` on Windows, `pyautogui` + AppKit on macOS, nothing elsewhere."""
+
+    def __init__(self):
+        self._apps = {}
+        if IS_WIN:
+            import keyboard
+
+            self._keyboard = keyboard
+        elif IS_MAC:
+            import pyautogui
+
+            pyautogui.PAUSE = 0  # pacing is the dispatcher's job, not a sleep after every call
+            self._pyautogui = pyautogui
+
+    def send(self, key, repeat=1):
+        if IS_WIN:
+            for _ in range(repeat):
+                self._keyboard.send(key)
+        elif IS_MAC:
+            if "+" in key:
+                keys = key.split("+")
+                for _ in range(repeat):
+                    for k in keys:
+                        self._pyautogui.keyDown(k)
+                    for k in reversed(keys):
+                        self._pyautogui.keyUp(k)
+            else:
+                self._pyautogui.press(key, presses=repeat)  # one bulk call
+
+    def focus(self, app_name):
+        if not IS_MAC:
+            return
+        name = app_name.lower()
+        app = self._apps.get(name)
+        if app is None or app.isTerminated():
+            app = self._find_app(name)
+            if app is None:
+                return
+        app.activateWithOptions_(1 << 1)
+
+    def _find_app(self, name):
+        from AppKit import NSWorkspace
+
+        for app in NSWorkspace.sharedWorkspace().runningApplications():
+            if (app.localizedName() or "").lower() == name:
+                self._apps[name] = app
+                return app
+        return None
+
+
+class RecordingBackend:
+    """Records `(time, kind, value, repeat)` instead of touching the OS.
+
+    `key_ms` simulates the cost of one keystroke, so benchmarks on Linux see
+    what a slow OS backend does to the tracker thread.
+    """
+
+    def __init__(self, key_ms=0.0):
+        self.key_ms = key_ms
+        self.sent = []
+
+    def send(self, key, repeat=1):
+        if self.key_ms:
+            time.sleep(self.key_ms * repeat / 1000)
+        self.sent.append((time.perf_counter(), "key", key, repeat))
+
+    def focus(self, app_name):
+        self.sent.append((time.perf_counter(), "focus", app_name, 1))
+
+
+class NullBackend:
+    def send(self, key, repeat=1):
+        pass
+
+    def focus(self, app_name):
+        pass
+
+
+KEY_BACKENDS = {
+    "os": OSKeyBackend,
+    "recording": RecordingBackend,
+    "null": NullBackend,
+}
+
+
+class ActionDispatcher:
+    """Queue between the controllers and the key backend.
+
+    Controllers call `send_key()` / `focus()`, which only enqueue an intent;
+    a worker thread delivers them.  Consecutive intents for the same key
+    that pile up while the backend is busy are merged into one bulk send
+    (except page keys), a page turn is held back until `page_interval`
+    seconds have passed since the previous one, and repeated focus
+    requests for the same app collapse into one.  With
+    `threaded=False` intents are delivered inline (the old behaviour).
+    """
+
+    def __init__(self, backend=None, page_interval=0.35, coalesce=True, threaded=True,
+                 page_keys=PAGE_KEYS):
+        self.backend = backend or OSKeyBackend()
+        self.page_interval = page_interval
+        self.coalesce = coalesce
+        self.threaded = threaded
+        self.page_keys = set(page_keys)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._busy = False
+        self._last_page = -1e9
+        self._thread = None
+        self.counts = {"intents": 0, "sends": 0, "keys": 0, "coalesced": 0, "rate_delayed": 0, "focus": 0}
+        self.latency_ms = deque(maxlen=10000)
+
+    def start(self):
+        if self.threaded and self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def send_key(self, key, repeat=1):
+        self._submit(("key", key, repeat, time.perf_counter()))
+
+    def focus(self, app_name):
+        self._submit(("focus", app_name, 1, time.perf_counter()))
+
+    def _submit(self, intent):
+        self.counts["intents"] += 1
+        if not self.threaded:
+            self._deliver(intent)
+            return
+        with self._cond:
+            if not (self.coalesce and self._merge(intent)):
+                self._queue.append(intent)
+            self._cond.notify()
+
+    def _merge(self, intent):
+        """Fold `intent` into the last queued intent when both are the same key or the same focus.
+
+        Page keys are never merged, so each page turn passes the rate limit on
+        its own, and nothing merges across a queued focus.
+        """
+        kind, value, repeat, _ = intent
+        if not self._queue or (kind == "key" and value in self.page_keys):
+            return False
+        q_kind, q_value, q_repeat, q_t = self._queue[-1]
+        if (q_kind, q_value) != (kind, value):
+            return False
+        if kind == "key":  # repeated scrolls become one bulk send
+            self._queue[-1] = (q_kind, q_value, q_repeat + repeat, q_t)
+        self.counts["coalesced"] += 1  # a repeated focus is a no-op
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                intent = self._queue.popleft()
+                self._busy = True
+            try:
+                self._deliver(intent)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _deliver(self, intent):
+        kind, value, repeat, t_enqueue = intent
+        if kind == "focus":
+            self.backend.focus(value)
+            self.counts["focus"] += 1
+        else:
+            if value in self.page_keys:
+                # held back rather than dropped: the overlay already announced this turn
+                wait = self._last_page + self.page_interval - time.perf_counter()
+                if wait > 0:
+                    self.counts["rate_delayed"] += 1
+                    time.sleep(wait)
+                self._last_page = time.perf_counter()
+            self.backend.send(value, repeat)
+            self.counts["keys"] += repeat
+        self.counts["sends"] += 1
+        self.latency_ms.append((time.perf_counter() - t_enqueue) * 1000)
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued intent has been delivered."""
+        if not self.threaded:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def stop(self, timeout=5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        lat = np.asarray(self.latency_ms) if self.latency_ms else np.zeros(1)
+        return dict(self.counts, latency_ms_p50=float(np.percentile(lat, 50)),
+                    latency_ms_p95=float(np.percentile(lat, 95)))
+
+
+def make_dispatcher(config=None, backend=None):
+    """Build and start a dispatcher from the "dispatch" config block."""
+    config = dict(config or {})
+    if backend is None:
+        name = config.pop("backend", "os")
+        if name not in KEY_BACKENDS:
+            raise ValueError(f"Unknown key backend '{name}', expected one of {list(KEY_BACKENDS)}")
+        backend = KEY_BACKENDS[name]()
+    else:
+        config.pop("backend", None)
+    return ActionDispatcher(backend, **config).start()
@@ -0,0 +1,272 @@
+import os
+import re
+import time
+import shutil
+import platform
+import threading
+import subprocess
+from collections import OrderedDict, namedtuple
+
+IS_WIN = platform.system() == "Windows"
+IS_MAC = platform.system() == "Darwin"
+
+Snapshot = namedtuple("Snapshot", ["name", "pid", "timestamp"])
+
+
+class ForegroundService:
+    """Tracks the foreground process through a provider and publishes snapshots.
+
+    Providers call `publish(pid, name=None)` from whatever thread their event
+    source uses.  The current `Snapshot` is replaced atomically, so any thread
+    can read `snapshot` / `process_name()` without locking.  pid -> name
+    lookups are cached per (pid, start time), so a reused pid is looked up
+    again; a pid whose start time can't be read is not cached.
+    """
+
+    def __init__(self, provider=None, cache_size=256):
+        self.provider = provider or default_provider()
+        self.snapshot = Snapshot("N/A", 0, time.monotonic())
+        self.cache_size = cache_size
+        self._names = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.switches = 0
+
+    def subscribe(self, callback):
+        """`callback(snapshot)` is called on the provider's thread after every switch."""
+        self._listeners.append(callback)
+
+    def process_name(self):
+        return self.snapshot.name
+
+    def resolve(self, pid):
+        key = (pid, process_start_of(pid))
+        if key[1] is None:
+            return process_name_of(pid)
+        with self._lock:
+            name = self._names.get(key)
+            if name is not None:
+                self._names.move_to_end(key)
+                return name
+        name = process_name_of(pid)
+        with self._lock:
+            self._names[key] = name
+            while len(self._names) > self.cache_size:
+                self._names.popitem(last=False)
+        return name
+
+    def publish(self, pid, name=None):
+        if name is None:
+            name = self.resolve(pid) if pid else "N/A"
+        if name == self.snapshot.name and pid == self.snapshot.pid:
+            return
+        self.snapshot = Snapshot(name, pid, time.monotonic())
+        self.switches += 1
+        for callback in self._listeners:
+            callback(self.snapshot)
+
+    def start(self):
+        self.provider.start(self.publish)
+        return self
+
+    def stop(self):
+        self.provider.stop()
+
+
+def process_name_of(pid):
+    try:
+        import psutil
+
+        return psutil.Process(pid).name()
+    except ImportError:
+        pass
+    except Exception:
+        return "N/A"
+    try:
+        with open(f"/proc/{pid}/comm", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return "N/A"
+
+
+def process_start_of(pid):
+    """When `pid` started (tells a reused pid apart), or None when it can't be read."""
+    try:
+        import psutil
+
+        return psutil.Process(pid).create_time()
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return int(f.read().rpartition(")")[2].split()[19])  # starttime, clock ticks since boot
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class FakeProvider:
+    """Scriptable provider for tests and headless replay.
+
+    `script` is a list of `(delay_seconds, name)` steps played on a thread;
+    without a script the initial name stays until `set()` is called.
+    """
+
+    def __init__(self, name="N/A", pid=1, script=None):
+        self.name, self.pid = name, pid
+        self.script = script or []
+        self._publish = None
+        self._stop = threading.Event()
+
+    def set(self, name, pid=None):
+        self.name = name
+        self.pid = pid if pid is not None else self.pid + 1
+        if self._publish is not None:
+            self._publish(self.pid, self.name)
+
+    def start(self, publish):
+        self._publish = publish
+        publish(self.pid, self.name)
+        if self.script:
+            threading.Thread(target=self._play, daemon=True).start()
+
+    def _play(self):
+        for delay, name in self.script:
+            if self._stop.wait(delay):
+                return
+            self.set(name)
+
+    def stop(self):
+        self._stop.set()
+
+
+class WindowsProvider:
+    """EVENT_SYSTEM_FOREGROUND WinEvent hook with its own message loop."""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    @staticmethod
+    def _pid_of(hwnd):
+        import ctypes
+        from ctypes import wintypes
+
+        pid = wintypes.DWORD()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return pid.value
+
+    def start(self, publish):
+        threading.Thread(target=self._run, args=(publish,), daemon=True).start()
+        self._ready.wait(1.0)
+
+    def _run(self, publish):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            publish(self._pid_of(hwnd))
+
+        self._callback = WinEventProc(callback)  # keep a reference for the hook's lifetime
+        hook = user32.SetWinEventHook(self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+                                      0, self._callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        publish(self._pid_of(user32.GetForegroundWindow()))
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self._thread_id is not None:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+
+class MacProvider:
+    """NSWorkspace app-activation notifications (delivered on the main run loop)."""
+
+    def __init__(self):
+        self._observer = None
+
+    def start(self, publish):
+        from AppKit import (NSWorkspace, NSWorkspaceApplicationKey,
+                            NSWorkspaceDidActivateApplicationNotification)
+
+        workspace = NSWorkspace.sharedWorkspace()
+
+        def activated(note):
+            app = note.userInfo()[NSWorkspaceApplicationKey]
+            publish(app.processIdentifier(), app.localizedName())
+
+        self._observer = workspace.notificationCenter().addObserverForName_object_queue_usingBlock_(
+            NSWorkspaceDidActivateApplicationNotification, None, None, activated)
+        app = workspace.frontmostApplication()
+        if app is not None:
+            publish(app.processIdentifier(), app.localizedName())
+
+    def stop(self):
+        if self._observer is not None:
+            from AppKit import NSWorkspace
+
+            NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(self._observer)
+            self._observer = None
+
+
+class X11Provider:
+    """`xprop -spy` on _NET_ACTIVE_WINDOW, resolved to the window's _NET_WM_PID."""
+
+    _window = re.compile(r"window id # (0x[0-9a-fA-F]+)")
+    _pid = re.compile(r"_NET_WM_PID\(CARDINAL\) = (\d+)")
+
+    def __init__(self):
+        self._proc = None
+
+    @staticmethod
+    def available():
+        return bool(os.environ.get("DISPLAY")) and shutil.which("xprop") is not None
+
+    def _pid_of(self, window):
+        out = subprocess.run(["xprop", "-id", window, "_NET_WM_PID"],
+                             capture_output=True, text=True).stdout
+        match = self._pid.search(out)
+        return int(match.group(1)) if match else 0
+
+    def start(self, publish):
+        self._proc = subprocess.Popen(["xprop", "-root", "-spy", "_NET_ACTIVE_WINDOW"],
+                                      stdout=subprocess.PIPE, text=True)
+
+        def loop():
+            for line in self._proc.stdout:
+                match = self._window.search(line)
+                publish(self._pid_of(match.group(1)) if match else 0)
+
+        threading.Thread(target=loop, daemon=True).start()
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc = None
+
+
+def default_provider():
+    if IS_WIN:
+        return WindowsProvider()
+    if IS_MAC:
+        return MacProvider()
+    if X11Provider.available():
+        return X11Provider()
+    return FakeProvider("N/A", pid=0)
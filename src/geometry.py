@@ -0,0 +1,148 @@
+import numpy as np
+
+GEOMETRY_METHODS = ("moments", "polygon", "dense")
+
+
+def mask_moments(masks, threshold=0.5):
+    """Area and centroid of every mask, computed on the masks' own device.
+
+    `masks` is an (N, H, W) tensor of mask probabilities; returns an (N, 3)
+    tensor of `[area, cx, cy]` in mask pixels.
+    """
+    import torch
+
+    m = (masks > threshold).to(torch.float32)
+    h, w = m.shape[1:]
+    xs = torch.arange(w, device=m.device, dtype=m.dtype)
+    ys = torch.arange(h, device=m.device, dtype=m.dtype)
+    area = m.sum((1, 2))
+    denom = area.clamp(min=1)
+    cx = (m.sum(1) @ xs) / denom
+    cy = (m.sum(2) @ ys) / denom
+    return torch.stack([area, cx, cy], 1)
+
+
+def polygon_moments(polygons, scale=1.0):
+    """Area and centroid of every polygon (shoelace formula), as an (N, 3) array.
+
+    Polygon points are multiplied by `scale`, which maps image pixels to mask pixels.
+    """
+    out = np.zeros((len(polygons), 3), dtype=np.float64)
+    for i, poly in enumerate(polygons):
+        if len(poly) < 3:
+            continue
+        x = poly[:, 0].astype(np.float64) * scale
+        y = poly[:, 1].astype(np.float64) * scale
+        xn, yn = np.roll(x, -1), np.roll(y, -1)
+        cross = x * yn - xn * y
+        a = cross.sum() / 2
+        if abs(a) < 1e-9:
+            out[i] = (0.0, x.mean(), y.mean())
+            continue
+        out[i] = (abs(a), ((x + xn) * cross).sum() / (6 * a), ((y + yn) * cross).sum() / (6 * a))
+    return out
+
+
+def dense_moments(masks):
+    """Same as `mask_moments` for boolean CPU masks, the way `get_center` does it."""
+    out = np.zeros((len(masks), 3), dtype=np.float64)
+    for i, mask in enumerate(masks):
+        ys, xs = np.nonzero(mask)
+        if len(xs):
+            out[i] = (len(xs), xs.mean(), ys.mean())
+    return out
+
+
+class EyeGeometry:
+    """Per-class centroids and areas of one result, plus lazily fetched dense masks.
+
+    Only a handful of floats per detection leave the inference device; the
+    dense masks are copied to the CPU the first time `masks()` is called.
+    """
+
+    def __init__(self, classes, confs, boxes, stats, loader=None, dense=None):
+        self.classes = classes
+        self.confs = confs
+        self.boxes = boxes
+        self.stats = stats
+        self.centers = {}
+        self.areas = {}
+        for cls, (area, cx, cy) in zip(classes, stats):
+            # the last mask of a class wins, like the mask_dict in detect_gaze
+            self.centers[cls] = (cx, cy) if area > 0 else None
+            self.areas[cls] = area
+        self._loader = loader
+        self._dense = dense
+
+    @classmethod
+    def from_result(cls, res, method="moments", imgsz=640):
+        """Build from an ultralytics segmentation result, or return None when it has no masks.
+
+        Backends that already return an EyeGeometry (or None) are passed through.
+        """
+        if res is None or isinstance(res, EyeGeometry):
+            return res
+        if res.masks is None:
+            return None
+        import torch
+
+        boxes = res.boxes
+        loader = lambda: (res.masks.data > 0.5).cpu().numpy()
+        if method == "moments":
+            # one small device-to-host copy: [cls, conf, x0, y0, x1, y1, area, cx, cy]
+            packed = torch.cat([boxes.cls[:, None].float(), boxes.conf[:, None].float(),
+                                boxes.xyxy.float(), mask_moments(res.masks.data)], 1).cpu().numpy()
+            return cls(packed[:, 0].astype(int).tolist(), packed[:, 1], packed[:, 2:6],
+                       packed[:, 6:9], loader)
+        packed = torch.cat([boxes.cls[:, None].float(), boxes.conf[:, None].float(),
+                            boxes.xyxy.float()], 1).cpu().numpy()
+        classes = packed[:, 0].astype(int).tolist()
+        if method == "polygon":
+            r = imgsz / max(res.orig_shape)
+            stats = polygon_moments(res.masks.xy, r)
+            return cls(classes, packed[:, 1], packed[:, 2:6], stats, loader)
+        if method == "dense":
+            dense = (res.masks.data > 0.5).cpu().numpy()
+            return cls(classes, packed[:, 1], packed[:, 2:6], dense_moments(dense), dense=dense)
+        raise ValueError(f"Unknown geometry method '{method}', expected one of {GEOMETRY_METHODS}")
+
+    def masks(self):
+        """Dense (N, H, W) boolean masks on the CPU, fetched on first use."""
+        if self._dense is None:
+            self._dense = self._loader()
+        return self._dense
+
+
+def gaze_offset(centers, scale=1.0):
+    """Mean iris-minus-eyelid x offset in full-frame 640px mask pixels, or None."""
+    dx_values = []
+    for iris, lid in ((0, 2), (1, 3)):
+        iris_c, lid_c = centers.get(iris), centers.get(lid)
+        if iris_c is not None and lid_c is not None:
+            dx_values.append(iris_c[0] - lid_c[0])
+
+    if not dx_values:
+        return None
+
+    # scale converts mask pixels to full-frame 640px mask pixels (ROI crops)
+    return np.mean(dx_values) * scale
+
+
+def gaze_from_centers(centers, scale=1.0, threshold=4):
+    """Gaze state from per-class centroids (`{cls: (x, y) or None}`), see detect_gaze."""
+    left_iris, right_iris, left_lid, right_lid = (c in centers for c in range(4))
+
+    if right_lid and right_iris and not (left_lid or left_iris):
+        return 3  # Right_Close
+    if left_lid and left_iris and not (right_lid or right_iris):
+        return 4  # Left_Close
+
+    dx_avg = gaze_offset(centers, scale)
+    if dx_avg is None:
+        return None
+    if dx_avg > threshold:
+        return 0  # Right
+    elif dx_avg < -threshold:
+        return 1  # Left
+    else:
+        return 2  # Center
@@ -0,0 +1,198 @@
+import os
+import csv
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# stages of EyeTrackerThread.run, in order; "frame" is the whole iteration
+STAGES = ("capture", "flip", "classify", "motion", "inference", "transfer", "gaze", "decision", "overlay", "emit", "frame")
+HUD_STAGES = ("inference", "transfer", "overlay", "frame")
+
+
+class StageMetrics:
+    """Per-stage timings of the tracker loop in fixed-size ring buffers.
+
+    `begin()` starts a frame, `lap(stage)` charges the time since the
+    previous lap to `stage` and `end()` records the whole frame.  Each stage
+    keeps the last `size` samples (ms) for percentiles plus running totals,
+    so memory stays fixed however long the tracker runs.  Recording happens
+    on the tracker thread only; readers take a `snapshot()`.  `last` holds
+    the current frame's ms per stage (NaN for stages it skipped).
+    """
+
+    def __init__(self, stages=STAGES, size=1024, clock=time.perf_counter):
+        self.size = size
+        self.clock = clock
+        self._buffers = {s: np.zeros(size, dtype=np.float32) for s in stages}
+        self._counts = dict.fromkeys(stages, 0)
+        self._totals = dict.fromkeys(stages, 0.0)
+        self._max = dict.fromkeys(stages, 0.0)
+        self._index = {s: i for i, s in enumerate(stages)}
+        self._blank = [float("nan")] * len(stages)
+        self.last = self._blank[:]
+        self._t = self._t_frame = 0.0
+        self.started = clock()
+        self.frames = 0
+
+    def begin(self, t=None):
+        self._t = self._t_frame = self.clock() if t is None else t
+        self.last = self._blank[:]
+
+    def lap(self, stage):
+        now = self.clock()
+        self.record(stage, (now - self._t) * 1000)
+        self._t = now
+
+    def end(self):
+        now = self.clock()
+        self.record("frame", (now - self._t_frame) * 1000)
+        self._t = now
+        self.frames += 1
+
+    def record(self, stage, ms):
+        n = self._counts[stage]
+        self._buffers[stage][n % self.size] = ms
+        self._counts[stage] = n + 1
+        self._totals[stage] += ms
+        self.last[self._index[stage]] = ms
+        if ms > self._max[stage]:
+            self._max[stage] = ms
+
+    def snapshot(self):
+        """`{stage: {n, mean, p50, p95, p99, max}}` plus overall fps."""
+        out = {}
+        for stage, buf in self._buffers.items():
+            n = self._counts[stage]
+            if not n:
+                continue
+            recent = buf[:min(n, self.size)]
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            out[stage] = {"n": n, "mean": self._totals[stage] / n, "p50": float(p50),
+                          "p95": float(p95), "p99": float(p99), "max": self._max[stage]}
+        elapsed = self.clock() - self.started
+        out["fps"] = self.frames / elapsed if elapsed > 0 else 0.0
+        return out
+
+
+class NullMetrics:
+    """Same interface, records nothing ("metrics": {"enabled": false})."""
+
+    frames = 0
+    last = None
+
+    def begin(self, t=None):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end(self):
+        pass
+
+    def record(self, stage, ms):
+        pass
+
+    def snapshot(self):
+        return {}
+
+
+def format_hud(snapshot, stages=HUD_STAGES):
+    """One short line of p50 ms per stage for the overlay."""
+    parts = [f"{snapshot.get('fps', 0.0):.1f} fps"]
+    for stage in stages:
+        if stage in snapshot:
+            parts.append(f"{stage} {snapshot[stage]['p50']:.1f}")
+    return " | ".join(parts) + " ms"
+
+
+def format_text(snapshot):
+    """Plain-text `stage stat value` lines, one per metric (the HTTP endpoint's format)."""
+    lines = [f"fps {snapshot.get('fps', 0.0):.3f}"]
+    for stage, stats in snapshot.items():
+        if stage == "fps":
+            continue
+        lines.extend(f"{stage}_ms {key} {value:.3f}" for key, value in stats.items() if key != "n")
+        lines.append(f"{stage}_count {stats['n']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsDumper:
+    """Appends a snapshot to `path` every `interval` seconds: JSON lines, or CSV for *.csv."""
+
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        snap = self.metrics.snapshot()
+        if not snap:
+            return
+        ts = time.time()
+        if self.path.endswith(".csv"):
+            new = not os.path.exists(self.path)
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new:
+                    writer.writerow(["time", "stage", "n", "mean", "p50", "p95", "p99", "max"])
+                for stage, s in snap.items():
+                    if stage != "fps":
+                        writer.writerow([f"{ts:.3f}", stage, s["n"]] +
+                                        [f"{s[k]:.3f}" for k in ("mean", "p50", "p95", "p99", "max")])
+                writer.writerow([f"{ts:.3f}", "fps", self.metrics.frames, f"{snap['fps']:.3f}", "", "", "", ""])
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"time": ts, **snap}) + "\n")
+
+    def stop(self):
+        self._stop.set()
+        self.dump()
+
+
+class MetricsServer:
+    """`GET /` (plain text) or `GET /json` of the live snapshot on 127.0.0.1:`port`."""
+
+    def __init__(self, metrics, port=8765, host="127.0.0.1"):
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                snap = metrics_ref.snapshot()
+                if self.path.startswith("/json"):
+                    body, ctype = json.dumps(snap).encode(), "application/json"
+                else:
+                    body, ctype = format_text(snap).encode(), "text/plain; charset=utf-8"
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        print(f"📈 Metrics on http://{self.server.server_address[0]}:{self.server.server_address[1]}/")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,131 @@
+import time
+
+import cv2
+import numpy as np
+
+from .geometry import gaze_from_centers
+from .roi import expand_boxes
+
+THUMB_SHAPE = (48, 96)  # downsampled grayscale eye region that gets compared, (h, w)
+
+
+def thumbnail(frame, region=None, shape=THUMB_SHAPE):
+    """Small grayscale image of `region` (x0, y0, x1, y1) of a BGR frame, or of the whole frame."""
+    if region is not None:
+        x0, y0, x1, y1 = region
+        frame = frame[y0:y1, x0:x1]
+    small = cv2.resize(frame, shape[::-1], interpolation=cv2.INTER_AREA)  # averaging also removes sensor noise
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+class MotionGate:
+    """Skips the segmenter while the eye region looks the same as when it last ran.
+
+    After each segmenter pass the padded region around the detected eyes (the
+    whole frame when none were found) is kept as a small grayscale reference.
+    A later frame is "still" when less than `threshold` of that thumbnail's
+    pixels differ from the reference by more than `noise` grey levels; the
+    tracker then reuses the reference pass's masks and gaze.  Comparing with
+    the reference rather than the previous frame means slow drift still adds
+    up to a change.  The segmenter runs again at the latest after `max_age`
+    reused frames.
+
+    With a `shadow` decision filter the segmenter runs on every frame anyway
+    (the tracker acts on the fresh results), and `compare()` feeds the gated
+    stream to the shadow filter to count where the two paths disagree.
+    """
+
+    def __init__(self, threshold=0.01, noise=12, max_age=10, pad=0.6, min_size=96, shadow=None):
+        self.threshold = threshold
+        self.noise = noise
+        self.max_age = max_age
+        self.pad = pad
+        self.min_size = min_size
+        self.shadow = shadow
+        self.region = None
+        self.reference = None
+        self.result = None  # (geo, crop, imgsz, scale) of the reference pass
+        self.age = 0
+        self.score = 1.0
+        self.counts = {"checked": 0, "still": 0, "moved": 0, "too_old": 0, "no_reference": 0}
+        self.check_ms = 0.0
+        self.scores = []
+        self.shadow_confirmed = None
+        self.mismatch = {"compared": 0, "raw": 0, "confirmed": 0}
+        self.confirmations = {"actual": 0, "gated": 0}
+        self._confirmed = None
+
+    def still(self, frame):
+        """True when the previous segmenter result can stand in for this frame."""
+        if self.reference is None:
+            self.counts["no_reference"] += 1
+            return False
+        if self.age >= self.max_age:
+            self.counts["too_old"] += 1
+            return False
+        t0 = time.perf_counter()
+        diff = cv2.absdiff(thumbnail(frame, self.region), self.reference)
+        self.score = float(np.count_nonzero(diff > self.noise)) / diff.size
+        self.check_ms += (time.perf_counter() - t0) * 1000
+        self.counts["checked"] += 1
+        if len(self.scores) < 100000:
+            self.scores.append(self.score)
+        if self.score > self.threshold:
+            self.counts["moved"] += 1
+            return False
+        self.counts["still"] += 1
+        self.age += 1
+        return True
+
+    def update(self, frame, boxes, result):
+        """After a segmenter pass: its full-frame xyxy eye boxes and `(geo, crop, imgsz, scale)` become the reference."""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.region = expand_boxes(boxes, frame.shape, self.pad, self.min_size) if len(boxes) else None
+        self.reference = thumbnail(frame, self.region)
+        self.result = result
+        self.age = 0
+
+    def reset(self):
+        if self.shadow is not None:
+            self.shadow.reset()
+
+    def compare(self, skipped, gaze, weight, confirmed):
+        """Shadow mode, per frame the decision filter sees: what the gated path would have decided vs what was."""
+        if skipped:
+            geo, _, _, scale = self.result
+            gated = (None, 0.0) if geo is None else (gaze_from_centers(geo.centers, scale), float(geo.confs.mean()))
+            self.mismatch["raw"] += gated[0] != gaze
+            gaze, weight = gated
+        if gaze is not None:
+            decided = self.shadow.update(gaze, weight)
+            if decided is not None and decided != self.shadow_confirmed:
+                self.shadow_confirmed = decided
+                self.confirmations["gated"] += 1
+        if confirmed != self._confirmed:
+            self._confirmed = confirmed
+            self.confirmations["actual"] += 1
+        self.mismatch["compared"] += 1
+        self.mismatch["confirmed"] += self.shadow_confirmed != confirmed
+
+    def summary(self):
+        frames = self.counts["checked"] + self.counts["too_old"] + self.counts["no_reference"]
+        scores = np.asarray(self.scores) if self.scores else np.zeros(1)
+        out = {
+            "frames": frames,
+            "skip_ratio": self.counts["still"] / frames if frames else 0.0,
+            **self.counts,
+            "check_ms": self.check_ms / self.counts["checked"] if self.counts["checked"] else 0.0,
+            "score_p50": float(np.percentile(scores, 50)),
+            "score_p95": float(np.percentile(scores, 95)),
+        }
+        if self.shadow is not None:
+            compared = self.mismatch["compared"]
+            out["shadow"] = {
+                **self.mismatch,
+                # skipped frames whose reused gaze state differs from a fresh pass
+                "raw_mismatch_rate": self.mismatch["raw"] / self.counts["still"] if self.counts["still"] else 0.0,
+                # frames where the confirmed (acted on) state differs from always inferring
+                "confirmed_mismatch_rate": self.mismatch["confirmed"] / compared if compared else 0.0,
+                "confirmations": dict(self.confirmations),
+            }
+        return out
@@ -0,0 +1,86 @@
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class PreviewChannel:
+    """Hands preview frames from the tracker thread to the GUI without queueing.
+
+    The producer asks `due()` before compositing (rate cap), writes into a
+    buffer from `acquire()` and calls `publish()`.  Only the newest frame is
+    kept: if the GUI has not taken the previous one yet it is replaced, and no
+    extra signal is needed.  Three buffers are enough: the one the GUI shows,
+    the pending one and the one being written.
+    """
+
+    def __init__(self, max_fps=15.0, pool=3, clock=time.perf_counter):
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.pool = pool
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buffers = []
+        self._free = []
+        self._pending = None
+        self._shown = None
+        self._next_due = 0.0
+        self.published = 0
+        self.rate_skipped = 0
+        self.replaced = 0
+        self.taken = 0
+        self.gui_ms = deque(maxlen=600)
+
+    def due(self):
+        now = self.clock()
+        if now < self._next_due:
+            self.rate_skipped += 1
+            return False
+        self._next_due = max(self._next_due + self.interval, now)
+        return True
+
+    def acquire(self, shape):
+        """Return `(index, buffer)` of a buffer the GUI is not using."""
+        with self._lock:
+            if not self._buffers or self._buffers[0].shape != shape:
+                self._buffers = [np.zeros(shape, dtype=np.uint8) for _ in range(self.pool)]
+                self._free = list(range(self.pool))
+                self._pending = self._shown = None
+            idx = self._free.pop()
+            return idx, self._buffers[idx]
+
+    def publish(self, idx):
+        """Make buffer `idx` the newest frame; True when the GUI must be notified."""
+        with self._lock:
+            self.published += 1
+            notify = self._pending is None
+            if not notify:
+                self._free.append(self._pending)
+                self.replaced += 1
+            self._pending = idx
+            return notify
+
+    def take(self):
+        """GUI side: the newest frame, or None.  It stays valid until the next take()."""
+        with self._lock:
+            if self._pending is None:
+                return None
+            if self._shown is not None:
+                self._free.append(self._shown)
+            self._shown, self._pending = self._pending, None
+            self.taken += 1
+            return self._buffers[self._shown]
+
+    def record_gui(self, ms):
+        self.gui_ms.append(ms)
+
+    def stats(self):
+        gui = np.asarray(self.gui_ms) if self.gui_ms else np.zeros(1)
+        return {
+            "published": self.published,
+            "shown": self.taken,
+            "replaced": self.replaced,
+            "rate_skipped": self.rate_skipped,
+            "gui_ms_mean": float(gui.mean()),
+            "gui_ms_p95": float(np.percentile(gui, 95)),
+        }
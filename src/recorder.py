@@ -0,0 +1,226 @@
+# Per-frame session log: one fixed-width record per tracker frame in a preallocated ring file.
+#
+#   python -m src.recorder sessions/20260101-120000.eyerec
+#   python -m src.recorder session.eyerec --thresholds 2 3 4 5 6 --csv session.csv
+#
+# File layout: a HEADER_SIZE-byte header (magic, capacity, records written, JSON
+# metadata) followed by `capacity` RECORD_DTYPE rows.  Once full, the oldest rows
+# are overwritten.  `open_session()` maps it read-only; nothing is parsed, so an
+# hour-long session opens instantly.
+import os
+import csv
+import json
+import time
+import struct
+import argparse
+import warnings
+
+import numpy as np
+
+from .metrics import STAGES
+
+MAGIC = b"EYEREC01"
+HEADER_SIZE = 4096
+NO_STATE = -1
+MASK_CLASSES = ("right_iris", "left_iris", "right_eyelid", "left_eyelid")  # segmenter class ids 0-3
+SOURCES = ("none", "full", "roi", "probe", "cascade", "reused")  # which pass produced the frame's gaze
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),                          # seconds since the session started (capture time)
+    ("seq", "<u4"),                        # capture sequence number
+    ("pid", "<u4"),                        # foreground process id
+    ("centers", "<f4", (4, 2)),            # per class, mask pixels of the pass; NaN when missing
+    ("areas", "<f4", (4,)),
+    ("confs", "<f4", (4,)),                # per class detection confidence; NaN when missing
+    ("scale", "<f4"),                      # mask pixels -> full-frame 640px units (gaze threshold units)
+    ("weight", "<f4"),                     # weight given to the decision filter
+    ("imgsz", "<u2"),
+    ("source", "u1"),                      # index into SOURCES
+    ("raw", "i1"),                         # per-frame gaze state, NO_STATE when none
+    ("confirmed", "i1"),                   # confirmed gaze state, NO_STATE when none
+    ("stages", "<f4", (len(STAGES),)),     # ms per STAGES entry; NaN when the stage did not run
+], align=True)
+# RECORD_DTYPE as a struct, for writing one row with a single call (plus its tail padding)
+RECORD_FORMAT = f"<dII8f4f4fffHBbb3x{len(STAGES)}f"
+RECORD = struct.Struct(RECORD_FORMAT + "x" * (RECORD_DTYPE.itemsize - struct.calcsize(RECORD_FORMAT)))
+assert RECORD.size == RECORD_DTYPE.itemsize
+HEADER = struct.Struct("<8sQQI")  # magic, capacity, records written, metadata length; JSON follows
+COUNT = struct.Struct("<Q")
+COUNT_OFFSET = 16
+BLANK_GEOMETRY = [float("nan")] * 8 + [0.0] * 4 + [float("nan")] * 4
+NO_STAGES = [float("nan")] * len(STAGES)
+
+
+class SessionRecorder:
+    """Appends one RECORD_DTYPE row per frame to a preallocated, memory-mapped ring file.
+
+    `write()` fills the next row in place and bumps the row counter in the
+    header; the OS writes the pages back, so the tracker never blocks on disk.
+    The file holds the last `capacity` frames (two hours at 30 fps by default).
+    """
+
+    def __init__(self, path, capacity=216000):
+        path = time.strftime(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.capacity = capacity
+        self.t0 = time.perf_counter()
+        meta = {"version": 1, "dtype": RECORD_DTYPE.descr, "stages": list(STAGES),
+                "classes": list(MASK_CLASSES), "sources": list(SOURCES),
+                "start_time": time.time(), "capacity": capacity}
+        blob = json.dumps(meta).encode()
+        if len(blob) > HEADER_SIZE - HEADER.size:
+            raise ValueError("session metadata does not fit in the header")
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        with open(path, "wb") as f:
+            f.truncate(size)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, size)  # reserve the blocks now, not on first touch
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r+", shape=(size,))
+        self._buf = memoryview(self._mm)
+        HEADER.pack_into(self._buf, 0, MAGIC, capacity, 0, len(blob))
+        self._buf[HEADER.size:HEADER.size + len(blob)] = blob
+        self.count = 0
+
+    def write(self, seq, t_capture, geo=None, scale=1.0, imgsz=0, source="none", raw=None,
+              confirmed=None, weight=0.0, stages=None, pid=0):
+        # one struct.pack_into straight into the map: a few µs, no numpy temporaries
+        values = BLANK_GEOMETRY[:]  # 8 center coords, 4 areas, 4 confidences
+        if geo is not None:
+            # the last detection of a class wins, like EyeGeometry.centers
+            for cls, conf, (area, cx, cy) in zip(geo.classes, geo.confs.tolist(), geo.stats.tolist()):
+                if 0 <= cls < 4:
+                    if area > 0:
+                        values[2 * cls], values[2 * cls + 1] = cx, cy
+                    values[8 + cls], values[12 + cls] = area, conf
+        RECORD.pack_into(self._buf, HEADER_SIZE + (self.count % self.capacity) * RECORD.size,
+                         t_capture - self.t0, seq, pid, *values, scale, weight, imgsz, SOURCES.index(source),
+                         NO_STATE if raw is None else raw, NO_STATE if confirmed is None else confirmed,
+                         *(NO_STAGES if stages is None else stages))
+        self.count += 1
+        COUNT.pack_into(self._buf, COUNT_OFFSET, self.count)
+
+    def close(self):
+        if self._mm is not None:
+            self._buf.release()
+            self._mm.flush()
+            self._mm = self._buf = None
+            print(f"💾 Session log: {self.path} ({min(self.count, self.capacity)} frames)")
+
+
+class SessionLog:
+    """Read-only view of a session file; `records` is in frame order.
+
+    Until the ring wraps `records` is a slice of the memory map (no copy).
+    Afterwards it is the two halves concatenated, which reads the whole file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        magic, self.capacity, self.count, n = HEADER.unpack_from(head)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        self.path = path
+        self.meta = json.loads(head[HEADER.size:HEADER.size + n])
+        # the file's own layout: logs written before STAGES or SOURCES grew still open
+        self.ring = np.memmap(path, dtype=stored_dtype(self.meta["dtype"]), mode="r", offset=HEADER_SIZE,
+                              shape=(self.capacity,))
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def wrapped(self):
+        return self.count > self.capacity
+
+    @property
+    def records(self):
+        if not self.wrapped:
+            return self.ring[:self.count]
+        start = self.count % self.capacity
+        return np.concatenate([self.ring[start:], self.ring[:start]])
+
+    def offsets(self, records=None):
+        """Per-frame iris-minus-eyelid x offset in 640px units (what the ±4 threshold compares)."""
+        r = self.records if records is None else records
+        dx = r["centers"][:, :2, 0] - r["centers"][:, 2:, 0]  # (iris 0 - lid 2, iris 1 - lid 3)
+        n = (~np.isnan(dx)).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.nansum(dx, axis=1) / n * r["scale"]  # NaN where neither eye has iris and lid
+
+
+def stored_dtype(descr):
+    """The record dtype of a file from its JSON metadata (lists where numpy has tuples)."""
+    return np.dtype([(name, fmt, tuple(shape[0])) if shape else (name, fmt) for name, fmt, *shape in descr])
+
+
+def open_session(path):
+    return SessionLog(path)
+
+
+def states_at(offsets, threshold):
+    """The gaze rule's Right/Left/Center states for `offsets` at another dx threshold."""
+    states = np.full(len(offsets), NO_STATE, dtype=np.int8)
+    valid = ~np.isnan(offsets)
+    states[valid] = 2
+    states[valid & (offsets > threshold)] = 0
+    states[valid & (offsets < -threshold)] = 1
+    return states
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize a per-frame session log")
+    ap.add_argument("path")
+    ap.add_argument("--thresholds", type=float, nargs="*", default=[2, 3, 4, 5, 6],
+                    help="dx thresholds to compare against the recorded raw states")
+    ap.add_argument("--csv", help="also export the records to this CSV")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    log = open_session(args.path)
+    r = log.records
+    print(f"📂 {args.path}: {len(log)} frames ({log.count} written, capacity {log.capacity}), "
+          f"opened in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    if not len(r):
+        return
+    duration = float(r["t"][-1] - r["t"][0])
+    print(f"   {duration:.1f} s, {len(r) / duration if duration else 0.0:.1f} fps, "
+          f"{len(np.unique(r['pid']))} foreground process(es)")
+    sources = np.bincount(r["source"], minlength=len(log.meta["sources"]))
+    print("   passes:", {name: int(n) for name, n in zip(log.meta["sources"], sources) if n})
+    stages = r["stages"]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # stages that never ran are all NaN
+        p50 = np.nanpercentile(stages, 50, axis=0)
+    print("   stage p50 ms:", {s: round(float(v), 2) for s, v in zip(log.meta["stages"], p50) if not np.isnan(v)})
+    confs = r["confs"][~np.isnan(r["confs"])]
+    if len(confs):
+        print("   detection conf p5/p50:", np.round(np.percentile(confs, (5, 50)), 3).tolist())
+
+    offsets = log.offsets(r)
+    raw = r["raw"]
+    print("\n| dx threshold | Right | Left | Center | changed vs recorded |")
+    print("|---|---|---|---|---|")
+    horizontal = np.isin(raw, (0, 1, 2)) & ~np.isnan(offsets)  # frames the segmenter decided by dx
+    for threshold in args.thresholds:
+        states = states_at(offsets, threshold)
+        counts = np.bincount(states[states >= 0], minlength=3)
+        changed = int((states[horizontal] != raw[horizontal]).sum())
+        print(f"| {threshold:g} | {counts[0]} | {counts[1]} | {counts[2]} | {changed} |")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["t", "seq", "pid", "source", "imgsz", "raw", "confirmed", "weight", "dx"]
+                            + [f"conf_{c}" for c in log.meta["classes"]]
+                            + [f"{s}_ms" for s in log.meta["stages"]])
+            for row, dx in zip(r, offsets):
+                writer.writerow([f"{row['t']:.4f}", row["seq"], row["pid"], log.meta["sources"][row["source"]],
+                                 row["imgsz"], row["raw"], row["confirmed"], f"{row['weight']:.3f}",
+                                 f"{dx:.3f}"] + [f"{c:.3f}" for c in row["confs"]]
+                                + [f"{s:.3f}" for s in row["stages"]])
+        print(f"✅ Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
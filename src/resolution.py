@@ -0,0 +1,140 @@
+import csv
+from collections import deque
+
+import numpy as np
+
+from .geometry import gaze_offset
+
+LADDER = (256, 320, 416, 512, 640)
+
+
+class ResolutionController:
+    """Picks the full-frame inference size from `ladder` to meet `target_ms`.
+
+    Each size is judged on the median of its last `window` inference times.
+    The controller steps down when that median is over the target, and steps
+    up when the next size is expected to stay under `headroom * target_ms`.
+    The expectation is the last median measured at that size, or the current
+    median scaled by pixel count once that measurement is older than `retry`
+    frames.  After any change it waits `cooldown` frames before deciding
+    again (hysteresis).
+
+    Mask quality is watched as well.  At each size it tracks how much the
+    iris-to-eyelid offset that the gaze rule thresholds changes from one
+    frame to the next (640px units).  When the median change exceeds
+    `max_jitter` the centroids are too unstable at this size.  The
+    controller then steps up, and the larger size becomes a floor for
+    `hold` frames.  The hold doubles each time the same size fails again, up
+    to 16x.
+    """
+
+    def __init__(self, ladder=LADDER, target_ms=50.0, start=None, window=15, cooldown=30, headroom=0.8,
+                 retry=900, max_jitter=2.0, hold=300, log_size=100000, log=None):
+        self.ladder = sorted(int(s) for s in ladder)
+        self.target_ms = target_ms
+        self.window = window
+        self.cooldown = cooldown
+        self.headroom = headroom
+        self.retry = retry
+        self.max_jitter = max_jitter
+        self.hold = hold
+        self.log_path = log
+        self.level = len(self.ladder) - 1 if start is None else self.ladder.index(start)
+        self.floor = 0
+        self.floor_until = 0
+        self.frames = 0
+        self.since_change = 0
+        self.latency = deque(maxlen=window)
+        self.jumps = deque(maxlen=window)
+        self._offset = None
+        self.measured = {}  # size -> (median inference ms seen there, frame it was measured)
+        self.counts = dict.fromkeys(self.ladder, 0)
+        self.total_ms = dict.fromkeys(self.ladder, 0.0)
+        self.jitter = {}  # size -> last median offset change seen there
+        self.strikes = {}  # size -> times it was left for being too jittery
+        self.changes = deque(maxlen=1000)  # (seq, from, to, reason)
+        self.log = deque(maxlen=log_size)
+
+    @property
+    def imgsz(self):
+        return self.ladder[self.level]
+
+    def seed(self, timings):
+        """Start at the largest size whose warm-up time (`{imgsz: ms}`) fits the target."""
+        self.measured.update({s: (ms, self.frames) for s, ms in timings.items() if s in self.counts})
+        fits = [i for i, s in enumerate(self.ladder) if self.measured.get(s, (np.inf,))[0] <= self.target_ms]
+        self._move(fits[-1] if fits else 0, None, "warm-up")
+
+    def observe(self, imgsz, infer_ms, geo=None, scale=1.0, seq=None):
+        """Record one full-frame inference and maybe choose a new size for the next one."""
+        if imgsz != self.imgsz:
+            return
+        self.frames += 1
+        self.since_change += 1
+        self.counts[imgsz] += 1
+        self.total_ms[imgsz] += infer_ms
+        self.latency.append(infer_ms)
+
+        offset = None if geo is None else gaze_offset(geo.centers, scale)
+        if offset is not None and self._offset is not None:
+            self.jumps.append(abs(offset - self._offset))
+        self._offset = offset
+        jitter = float(np.median(self.jumps)) if len(self.jumps) >= self.window // 2 else None
+        if jitter is not None:
+            self.jitter[imgsz] = jitter
+        self.log.append((seq, imgsz, infer_ms, "" if jitter is None else jitter))
+
+        if self.frames >= self.floor_until:
+            self.floor = 0
+        if self.since_change < self.cooldown or len(self.latency) < self.window:
+            return
+        median = float(np.median(self.latency))
+        self.measured[imgsz] = (median, self.frames)
+
+        top = len(self.ladder) - 1
+        if jitter is not None and jitter > self.max_jitter and self.level < top:
+            strikes = self.strikes[imgsz] = self.strikes.get(imgsz, 0) + 1
+            self.floor, self.floor_until = self.level + 1, self.frames + self.hold * 2 ** min(strikes - 1, 4)
+            self._move(self.level + 1, seq, "jitter")
+        elif median > self.target_ms and self.level > self.floor:
+            self._move(self.level - 1, seq, "latency")
+        elif self.level < top:
+            bigger = self.ladder[self.level + 1]
+            expected, at = self.measured.get(bigger, (None, None))
+            if expected is None or self.frames - at > self.retry:
+                expected = median * (bigger / imgsz) ** 2
+            if expected <= self.headroom * self.target_ms:
+                self._move(self.level + 1, seq, "headroom")
+
+    def _move(self, level, seq, reason):
+        if level == self.level:
+            return
+        self.changes.append((seq, self.imgsz, self.ladder[level], reason))
+        self.level = level
+        self.since_change = 0
+        self.latency.clear()
+        self.jumps.clear()
+        self._offset = None
+
+    def summary(self):
+        total = sum(self.counts.values())
+        return {
+            "imgsz": self.imgsz,
+            "target_ms": self.target_ms,
+            "frames": total,
+            "share": {s: n / total for s, n in self.counts.items() if n} if total else {},
+            "mean_ms": {s: self.total_ms[s] / n for s, n in self.counts.items() if n},
+            "jitter": dict(self.jitter),
+            "switches": len(self.changes),
+            # chosen size over time: [seq, from, to, reason] per change
+            "timeline": [list(c) for c in self.changes],
+        }
+
+    def save_log(self, path=None):
+        path = path or self.log_path
+        if not path:
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seq", "imgsz", "infer_ms", "jitter"])
+            writer.writerows(self.log)
@@ -0,0 +1,103 @@
+import csv
+from collections import deque
+
+import numpy as np
+
+
+def expand_boxes(boxes, frame_shape, pad=0.6, min_size=96):
+    """Padded `(x0, y0, x1, y1)` crop around xyxy eye boxes, or None when it is degenerate."""
+    h, w = frame_shape[:2]
+    x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+    x1, y1 = boxes[:, 2].max(), boxes[:, 3].max()
+    # Margin relative to the largest single eye box, not the two-eye union.
+    margin = pad * max((boxes[:, 2] - boxes[:, 0]).max(), (boxes[:, 3] - boxes[:, 1]).max())
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    half_w = max((x1 - x0) / 2 + margin, min_size / 2)
+    half_h = max((y1 - y0) / 2 + margin, min_size / 2)
+    x0, x1 = int(max(0, cx - half_w)), int(min(w, cx + half_w))
+    y0, y1 = int(max(0, cy - half_h)), int(min(h, cy + half_h))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return x0, y0, x1, y1
+
+
+class EyeROITracker:
+    """Keeps a padded crop around the last detected eyes.
+
+    After a full-frame detection the following frames are segmented only inside
+    the crop at a smaller `imgsz`.  A full-frame pass is forced every
+    `redetect_interval` frames, and whenever the crop result is empty or its
+    confidence drops below `min_conf`.
+    """
+
+    def __init__(self, imgsz=256, pad=0.6, redetect_interval=30, min_conf=0.4,
+                 min_size=96, log_size=10000, log=None):
+        self.imgsz = imgsz
+        self.pad = pad
+        self.redetect_interval = redetect_interval
+        self.min_conf = min_conf
+        self.min_size = min_size
+        self.log_path = log
+        self.roi = None
+        self.frames_since_full = 0
+        self.counts = {"full": 0, "roi": 0}
+        self.total_ms = {"full": 0.0, "roi": 0.0}
+        self.lost = 0
+        self.log = deque(maxlen=log_size)
+
+    def plan(self):
+        """Crop `(x0, y0, x1, y1)` for the next frame, or None for a full-frame pass."""
+        if self.roi is None or self.frames_since_full >= self.redetect_interval:
+            return None
+        return self.roi
+
+    def update(self, boxes, confs, crop, frame_shape, infer_ms, seq=None):
+        """Record one inference and move the crop.
+
+        `boxes` are xyxy in the coordinates of the image that was segmented,
+        i.e. relative to `crop` when one was used.
+        """
+        mode = "full" if crop is None else "roi"
+        self.counts[mode] += 1
+        self.total_ms[mode] += infer_ms
+        self.frames_since_full = 0 if crop is None else self.frames_since_full + 1
+
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confs = np.asarray(confs, dtype=np.float32).reshape(-1)
+        if len(boxes) == 0 or confs.min() < self.min_conf:
+            if self.roi is not None:
+                self.lost += 1
+            self.roi = None
+        else:
+            if crop is not None:
+                boxes = boxes + np.array([crop[0], crop[1], crop[0], crop[1]], dtype=np.float32)
+            self.roi = self._expand(boxes, frame_shape)
+        self.log.append((seq, mode, infer_ms, len(boxes), float(confs.min()) if len(confs) else 0.0))
+
+    def _expand(self, boxes, frame_shape):
+        return expand_boxes(boxes, frame_shape, self.pad, self.min_size)
+
+    def summary(self):
+        n_full, n_roi = self.counts["full"], self.counts["roi"]
+        mean_full = self.total_ms["full"] / n_full if n_full else 0.0
+        mean_roi = self.total_ms["roi"] / n_roi if n_roi else 0.0
+        total = n_full + n_roi
+        mean_all = (self.total_ms["full"] + self.total_ms["roi"]) / total if total else 0.0
+        return {
+            "frames": total,
+            "roi_ratio": n_roi / total if total else 0.0,
+            "full_ms": mean_full,
+            "roi_ms": mean_roi,
+            "lost": self.lost,
+            # Speedup against running every frame at full resolution.
+            "speedup": mean_full / mean_all if mean_all and mean_full else 1.0,
+        }
+
+    def save_log(self, path=None):
+        path = path or self.log_path
+        if not path:
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seq", "mode", "infer_ms", "boxes", "min_conf"])
+            writer.writerows(self.log)
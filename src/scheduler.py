@@ -0,0 +1,82 @@
+import time
+
+ACTIVE = "active"
+IDLE = "idle"        # the controller cannot act on the foreground app
+ABSENT = "absent"    # no eyes found for a while
+
+
+class DutyCycleScheduler:
+    """Decides per frame whether to run inference, and at which size.
+
+    While the registered controller can act and eyes are visible every frame
+    is segmented at full size.  Otherwise only a low-resolution probe runs
+    every `probe_interval` seconds.  Relevance is checked on every frame, so
+    the tracker is back at full rate on the first frame after the target app
+    returns to the foreground or a probe finds the eyes again.
+    """
+
+    def __init__(self, probe_interval=0.5, probe_imgsz=320, absent_after=30, clock=time.perf_counter):
+        self.probe_interval = probe_interval
+        self.probe_imgsz = probe_imgsz
+        self.absent_after = absent_after
+        self.clock = clock
+        self.state = ACTIVE
+        self.since = clock()
+        self.last_probe = float("-inf")
+        self.misses = 0
+        self.time_in = {ACTIVE: 0.0, IDLE: 0.0, ABSENT: 0.0}
+        self.frames = {ACTIVE: 0, IDLE: 0, ABSENT: 0}
+        self.probes = 0
+        self.skipped = 0
+        self.transitions = {}
+
+    def _enter(self, state, now):
+        if state == self.state:
+            return
+        self.time_in[self.state] += now - self.since
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state, self.since = state, now
+        self.last_probe = float("-inf")  # probe right away in the new state
+
+    def plan(self, relevant, now=None):
+        """Return `(run, imgsz)`; imgsz is None for the normal full-rate size."""
+        now = self.clock() if now is None else now
+        if not relevant:
+            self._enter(IDLE, now)
+        elif self.misses >= self.absent_after:
+            self._enter(ABSENT, now)
+        else:
+            self._enter(ACTIVE, now)
+        self.frames[self.state] += 1
+
+        if self.state == ACTIVE:
+            return True, None
+        if now - self.last_probe >= self.probe_interval:
+            self.last_probe = now
+            self.probes += 1
+            return True, self.probe_imgsz
+        self.skipped += 1
+        return False, None
+
+    def observe(self, eyes_found):
+        """Report whether the last inference found eyes."""
+        if eyes_found:
+            self.misses = 0
+            if self.state == ABSENT:
+                self._enter(ACTIVE, self.clock())
+        else:
+            self.misses += 1
+
+    def metrics(self):
+        now = self.clock()
+        time_in = dict(self.time_in)
+        time_in[self.state] += now - self.since
+        return {
+            "state": self.state,
+            "time_s": time_in,
+            "frames": dict(self.frames),
+            "probes": self.probes,
+            "skipped": self.skipped,
+            "transitions": dict(self.transitions),
+        }
@@ -0,0 +1,384 @@
+# Shared inference service: one model per machine, micro-batched across reading stations.
+#
+#   python -m src.service --weights models/best.pt --max-batch 8 --max-wait-ms 4
+#
+# Stations then use `"backend": "remote"` in keymap/config.yaml.  Frames
+# travel through a shared-memory slot per client; only the small
+# request/reply tuples go over the local socket.  Replies carry the
+# centroids plus mask outlines the client fills in for the preview, or for
+# the "dense" geometry the packed masks themselves.  Connections are
+# authenticated with "authkey" from the service config or, without one, a
+# random per-user secret in KEY_FILE that the service and stations on this
+# machine share.
+import os
+import time
+import queue
+import secrets
+import argparse
+import threading
+from collections import deque
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import cv2
+import numpy as np
+
+from .geometry import EyeGeometry
+
+DEFAULT_ADDRESS = "127.0.0.1:6010"
+KEY_FILE = os.environ.get("EYETRACK_AUTHKEY_FILE",
+                          os.path.join(os.path.expanduser("~"), ".config", "EbookControlHelper", "service.key"))
+MASK_BYTES = 16 * 640 * 640 // 8  # packed dense masks that fit in the slot; more are sent inline
+
+
+class ServiceError(RuntimeError):
+    """The service answered a request with an error instead of a result."""
+
+
+def parse_address(address):
+    if isinstance(address, (tuple, list)):
+        return tuple(address)
+    host, _, port = str(address).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def load_authkey(authkey=None, path=KEY_FILE):
+    """`authkey` as bytes, or this user's random secret from `path`, created readable only by them on first use."""
+    if authkey:
+        return authkey.encode() if isinstance(authkey, str) else authkey
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:  # created by the other side meanwhile
+        with open(path, "rb") as f:
+            return f.read()
+    key = secrets.token_hex(32).encode()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class _Request:
+    __slots__ = ("client", "seq", "image", "imgsz", "conf", "iou", "method", "t_arrive")
+
+    def __init__(self, client, seq, image, imgsz, conf, iou, method):
+        self.client, self.seq, self.image = client, seq, image
+        self.imgsz, self.conf, self.iou, self.method = imgsz, conf, iou, method
+        self.t_arrive = time.perf_counter()
+
+
+class _ClientSlot:
+    """Server side of one connected station: its socket and its shared-memory slot."""
+
+    def __init__(self, conn, shm_name, frame_bytes):
+        self.conn = conn
+        self.shm = SharedMemory(shm_name)
+        # the client owns the segment; don't let this process' tracker unlink it
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.frame_bytes = frame_bytes
+        self.send_lock = threading.Lock()
+
+    def frame(self, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def send(self, msg):
+        with self.send_lock:
+            self.conn.send(msg)
+
+    def close(self):
+        self.shm.close()
+        self.conn.close()
+
+
+class InferenceServer:
+    """Loads the model once and serves every connected station.
+
+    Requests from all clients go into one queue.  The batcher takes the first
+    waiting request and keeps collecting until `max_batch` requests are in hand
+    or `max_wait_ms` has passed since that request arrived, then runs one
+    forward pass per (imgsz, conf, iou) group and replies to each client.
+    """
+
+    def __init__(self, backend, address=DEFAULT_ADDRESS, authkey=None,
+                 max_batch=8, max_wait_ms=4.0, weights=None):
+        self.backend = backend
+        self.address = parse_address(address)
+        self.authkey = load_authkey(authkey)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.weights = weights
+        self.requests = queue.Queue()
+        self.running = True
+        self.clients = 0
+        self.batch_sizes = deque(maxlen=10000)
+        self.wait_ms = deque(maxlen=10000)
+        self.infer_ms = deque(maxlen=10000)
+
+    def serve_forever(self):
+        threading.Thread(target=self._batcher, daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"🛰 Inference service on {self.address[0]}:{self.address[1]} "
+                  f"(max_batch={self.max_batch}, max_wait={self.max_wait * 1000:.1f}ms)")
+            while self.running:
+                try:
+                    conn = listener.accept()
+                except Exception as e:  # bad authkey, client gone mid-handshake
+                    print(f"⚠️ Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._reader, args=(conn,), daemon=True).start()
+
+    def _reader(self, conn):
+        client = None
+        try:
+            kind, shm_name, frame_bytes, weights = conn.recv()
+            if kind != "hello":
+                raise ValueError(f"expected hello, got {kind}")
+            if self.weights and weights and os.path.basename(weights) != os.path.basename(self.weights):
+                print(f"⚠️ Client asked for {weights}, service runs {self.weights}")
+            client = _ClientSlot(conn, shm_name, frame_bytes)
+            self.clients += 1
+            client.send(("ready", self.max_batch))
+            while True:
+                kind, seq, shape, imgsz, conf, iou, method = conn.recv()
+                # a copy: after a timeout the client writes its next frame into the slot
+                self.requests.put(_Request(client, seq, client.frame(shape).copy(), imgsz, conf, iou, method))
+        except (EOFError, OSError):
+            pass
+        finally:
+            if client is not None:
+                self.clients -= 1
+                client.close()
+            else:
+                conn.close()
+
+    def _collect(self):
+        first = self.requests.get()
+        batch = [first]
+        deadline = first.t_arrive + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0
+                             else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _batcher(self):
+        while self.running:
+            batch = self._collect()
+            t_start = time.perf_counter()
+            groups = {}
+            for req in batch:
+                groups.setdefault((req.imgsz, req.conf, req.iou), []).append(req)
+            for (imgsz, conf, iou), reqs in groups.items():
+                try:
+                    results = self.backend.batch([r.image for r in reqs], imgsz=imgsz, conf=conf, iou=iou)
+                except Exception as e:
+                    for r in reqs:
+                        self._reply(r, ("error", r.seq, repr(e)))
+                    continue
+                infer_ms = (time.perf_counter() - t_start) * 1000
+                for r, res in zip(reqs, results):
+                    self._reply(r, self._pack(r, res, len(reqs), infer_ms))
+            self.batch_sizes.append(len(batch))
+            self.wait_ms.extend((t_start - r.t_arrive) * 1000 for r in batch)
+            self.infer_ms.append((time.perf_counter() - t_start) * 1000)
+
+    def _pack(self, req, res, batch_size, infer_ms):
+        geo = EyeGeometry.from_result(res, req.method, req.imgsz)
+        timing = (batch_size, (time.perf_counter() - req.t_arrive) * 1000, infer_ms)
+        if geo is None:
+            return ("result", req.seq, None, timing)
+        if req.method != "dense":  # outlines are a fraction of the dense masks' size
+            masks = ("outlines", [outlines(m) for m in geo.masks()])
+        else:
+            packed = np.packbits(geo.masks(), axis=None)
+            slot = req.client
+            if packed.nbytes <= slot.shm.size - slot.frame_bytes:
+                slot.shm.buf[slot.frame_bytes:slot.frame_bytes + packed.nbytes] = packed.tobytes()
+                masks = ("packed", packed.nbytes, None)
+            else:
+                masks = ("packed", packed.nbytes, packed)
+        payload = (geo.classes, geo.confs, geo.boxes, np.asarray(geo.stats), geo.masks().shape, masks)
+        return ("result", req.seq, payload, timing)
+
+    @staticmethod
+    def _reply(req, msg):
+        try:
+            req.client.send(msg)
+        except (OSError, ValueError):
+            pass  # client disconnected; its reader thread cleans up
+
+    def stats(self):
+        sizes = np.asarray(self.batch_sizes) if self.batch_sizes else np.zeros(1)
+        wait = np.asarray(self.wait_ms) if self.wait_ms else np.zeros(1)
+        infer = np.asarray(self.infer_ms) if self.infer_ms else np.zeros(1)
+        return {
+            "clients": self.clients,
+            "batches": len(self.batch_sizes),
+            "batch_mean": float(sizes.mean()),
+            "queue_wait_ms_p95": float(np.percentile(wait, 95)),
+            "batch_ms_mean": float(infer.mean()),
+        }
+
+
+def outlines(mask):
+    """Outer and hole contours of a boolean mask, in mask pixels."""
+    contours, _ = cv2.findContours(mask.astype(np.uint8), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def fill_outlines(contours, shape):
+    """(N, H, W) boolean masks back from N masks' `outlines()`."""
+    masks = np.zeros(shape, dtype=np.uint8)
+    for mask, mask_contours in zip(masks, contours):
+        if len(mask_contours):
+            cv2.fillPoly(mask, mask_contours, 1)
+    return masks.astype(bool)
+
+
+class RemoteBackend:
+    """Client of an `InferenceServer`; a drop-in for the local backends.
+
+    Frames are written into this client's shared-memory slot and the call
+    returns an `EyeGeometry` (or None) whose `masks()` fills in the outlines
+    (or unpacks the dense masks) the service sent back.  The slot grows when
+    a larger frame comes along.
+    Once connected, a reply that misses `timeout`, an error reply or a
+    lost connection counts as a missed frame (None) rather than an error;
+    the next call reconnects if needed, and replies to earlier frames are
+    discarded.
+    """
+
+    name = "remote"
+
+    def __init__(self, model_path=None, device=None, int8=False, address=DEFAULT_ADDRESS,
+                 authkey=None, geometry="moments", timeout=5.0, **server_options):
+        self.model_path = model_path
+        self.address = parse_address(address)
+        self.authkey = load_authkey(authkey)
+        self.method = geometry
+        self.timeout = timeout
+        self.conn = None
+        self.shm = None
+        self.frame_bytes = 0
+        self.seq = 0
+        self.last_timing = None
+        self.missed = 0
+        self._streak = 0
+
+    def _connect(self, frame_bytes):
+        self.close()
+        self.shm = SharedMemory(create=True, size=frame_bytes + MASK_BYTES)
+        self.frame_bytes = frame_bytes
+        try:
+            self.conn = Client(self.address, authkey=self.authkey)
+        except ConnectionRefusedError:
+            self.close()
+            raise ConnectionRefusedError(f"No inference service on {self.address[0]}:{self.address[1]}\n"
+                                         f"Start it first: python -m src.service --weights {self.model_path}")
+        self.conn.send(("hello", self.shm.name, frame_bytes, self.model_path))
+        self.conn.recv()
+
+    def __call__(self, image, imgsz=640, conf=0.25, iou=0.3):
+        try:
+            if self.conn is None or image.nbytes > self.frame_bytes:
+                self._connect(image.nbytes)
+            self.seq += 1
+            np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=self.shm.buf), image)
+            self.conn.send(("infer", self.seq, image.shape, imgsz, conf, iou, self.method))
+            kind, seq, payload, *rest = self._reply()
+            if kind == "error":
+                raise ServiceError(f"failed: {payload}")
+        except (TimeoutError, EOFError, ConnectionError, ServiceError) as e:
+            if not self.seq:
+                raise  # never connected: a setup problem, not a missed frame
+            if isinstance(e, (EOFError, ConnectionError)):
+                self.close()
+            self.missed += 1
+            self._streak += 1
+            if self._streak == 1:
+                print(f"⚠️ Inference service: {str(e) or type(e).__name__}; frames are missed until it answers again")
+            return None
+        if self._streak:
+            print(f"✅ Inference service answering again after {self._streak} missed frame(s)")
+            self._streak = 0
+        self.last_timing = rest[0]
+        if payload is None:
+            return None
+        classes, confs, boxes, stats, shape, (kind, *masks) = payload
+        if kind == "outlines":
+            loader = lambda: fill_outlines(masks[0], shape)
+        else:
+            nbytes, inline = masks
+            if inline is None:
+                inline = np.frombuffer(self.shm.buf[self.frame_bytes:self.frame_bytes + nbytes], np.uint8).copy()
+            loader = lambda: np.unpackbits(inline, count=int(np.prod(shape))).reshape(shape).astype(bool)
+        return EyeGeometry(classes, confs, boxes, stats, loader)
+
+    def _reply(self):
+        """The reply to the current seq; late replies to frames that already timed out are dropped."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.conn.poll(remaining):
+                raise TimeoutError(f"no answer within {self.timeout}s")
+            reply = self.conn.recv()
+            if reply[1] == self.seq:
+                return reply
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def main():
+    import yaml
+
+    from utils.path import resource_path
+
+    from .backends import load_backend
+
+    with open(resource_path("keymap/config.yaml"), "r", encoding="utf-8") as f:
+        service = yaml.safe_load(f).get("service") or {}
+
+    parser = argparse.ArgumentParser(description="Shared micro-batching inference service")
+    parser.add_argument("--weights", default="models/best.pt")
+    parser.add_argument("--backend", default=service.get("backend", "torch"))
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--address", default=service.get("address", DEFAULT_ADDRESS))
+    parser.add_argument("--authkey", default=service.get("authkey"), help=f"shared secret (default: {KEY_FILE})")
+    parser.add_argument("--max-batch", type=int, default=service.get("max_batch", 8))
+    parser.add_argument("--max-wait-ms", type=float, default=service.get("max_wait_ms", 4.0))
+    args = parser.parse_args()
+
+    weights = resource_path(args.weights)
+    backend = load_backend(args.backend, weights, int8=args.int8)
+    backend.batch([np.zeros((480, 640, 3), np.uint8)] * 2, imgsz=640)  # warm-up
+    server = InferenceServer(backend, args.address, args.authkey, args.max_batch, args.max_wait_ms, weights)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Inference service stopped:", server.stats())
+
+
+if __name__ == "__main__":
+    main()
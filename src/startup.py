@@ -0,0 +1,58 @@
+import time
+import threading
+
+
+def _process_start():
+    """perf_counter() value of the moment the process started (psutil), else of this import."""
+    now = time.perf_counter()
+    try:
+        import psutil
+
+        return now - (time.time() - psutil.Process().create_time())
+    except Exception:
+        return now
+
+
+class StartupTimer:
+    """Named milestones from process start to the first confirmed gaze.
+
+    `mark()` may be called from any thread; only the first mark of each
+    name counts.  `report()` prints the breakdown once, when `final` is
+    marked (or on demand).
+    """
+
+    def __init__(self, t0=None, final="first confirmed gaze"):
+        self.t0 = _process_start() if t0 is None else t0
+        self.final = final
+        self.marks = []
+        self._names = set()
+        self._lock = threading.Lock()
+        self.reported = False
+
+    def mark(self, name):
+        with self._lock:
+            if name in self._names:
+                return
+            self._names.add(name)
+            self.marks.append((name, time.perf_counter()))
+        if name == self.final:
+            self.report()
+
+    def breakdown(self):
+        """`[(name, seconds since start, seconds since the previous mark)]`."""
+        out, prev = [], self.t0
+        for name, t in self.marks:
+            out.append((name, t - self.t0, t - prev))
+            prev = t
+        return out
+
+    def report(self):
+        if self.reported:
+            return
+        self.reported = True
+        print("🚀 Startup:")
+        for name, at, delta in self.breakdown():
+            print(f"   {at:7.2f}s  (+{delta:5.2f}s)  {name}")
+
+
+STARTUP = StartupTimer()
@@ -0,0 +1,343 @@
+import time
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from utils.path import resource_path
+from . import REGISTRY, CAN_ACT
+from .capture import CaptureThread, open_source
+from .roi import EyeROITracker
+from .compositor import MaskCompositor
+from .geometry import EyeGeometry, gaze_from_centers
+from .backends import load_backend
+from .scheduler import DutyCycleScheduler, ACTIVE
+from .decision import make_filter
+from .preview import PreviewChannel
+from .cascade import INPUT_SHAPE, Cascade
+from .motion import MotionGate
+from .resolution import ResolutionController
+from .recorder import SessionRecorder
+from .startup import STARTUP
+from .metrics import MetricsDumper, MetricsServer, NullMetrics, StageMetrics, format_hud
+
+COLORS = [
+    (255,  64,  64),  # right_iris
+    ( 64,  64, 255),  # left_iris
+    (255, 192,   0),  # right_eyelid
+    (  0, 255, 128),  # left_eyelid
+]
+
+
+class EyeTrackerThread(QThread):
+    gaze_updated = pyqtSignal(str)
+    preview_frame = pyqtSignal(object)  # the PreviewChannel holding the newest frame
+    pdf_mode = pyqtSignal(str)
+    frame_processed = pyqtSignal(object)
+    status_changed = pyqtSignal(str)  # startup progress for the overlay; "" once running
+    metrics_updated = pyqtSignal(str)  # HUD line, at most every hud_interval seconds
+
+    def __init__(self, model_path="models/best.pt", cam_id=0, overlay=None, process_name=None,
+                 source=None, realtime=None, lossless=False, roi=None, geometry="moments",
+                 backend="torch", int8=False, get_process_name=None, duty_cycle=None, decision=None,
+                 preview_fps=15, service=None, cascade=None, metrics=None, resolution=None, record=None,
+                 get_process_id=None, motion=None):
+        super().__init__()
+        # the model and the camera are opened in run(), off the GUI thread
+        self.model_path = resource_path(model_path)
+        self.backend = backend
+        self.int8 = int8
+        self.backend_options = dict(service or {}, geometry=geometry) if backend == "remote" else {}
+        self.source = cam_id if source is None else source
+        self.capture_options = dict(realtime=realtime, lossless=lossless)
+        self.model = None
+        self.capture = None
+        self.running = True
+        self.process_name = process_name
+
+        self.decision = make_filter(decision)
+        self.gaze_directions = {0: "Right", 1: "Left", 2: "Center", 3: "Left_Close", 4: "Right_Close"}
+        self.confirmed_gaze = None
+        self.overlay = overlay
+        self.get_process_name = get_process_name or (lambda: "N/A")
+        self.get_process_id = get_process_id or (lambda: 0)
+        self.can_act = CAN_ACT.get(process_name, lambda name: True)
+        duty_cycle = dict(duty_cycle or {})
+        if lossless:  # replay: probe intervals count source frames, not how fast this machine gets through them
+            duty_cycle["clock"] = self.source_clock
+        self._source_time = 0.0
+        self.scheduler = DutyCycleScheduler(**duty_cycle) if duty_cycle.pop("enabled", False) else None
+
+        self.imgsz = 640  # full-frame size; also the 640px mask units the gaze threshold is in
+        resolution = dict(resolution or {})
+        self.resolution = ResolutionController(**resolution) if resolution.pop("enabled", False) else None
+        self.geometry = geometry
+        self.compositor = MaskCompositor(COLORS)
+        self.preview = PreviewChannel(max_fps=preview_fps)
+        roi = dict(roi or {})
+        self.roi = EyeROITracker(**roi) if roi.pop("enabled", False) else None
+        self.cascade_options = dict(cascade or {})
+        self.cascade = None
+        motion = dict(motion or {})
+        if motion.pop("enabled", False):
+            # shadow: segment every frame anyway and count where gating would have decided otherwise
+            shadow = make_filter(decision) if motion.pop("shadow", False) else None
+            self.motion = MotionGate(**motion, shadow=shadow)
+        else:
+            self.motion = None
+
+        metrics = dict(metrics or {})
+        enabled = metrics.get("enabled", True)
+        self.metrics = StageMetrics(size=metrics.get("size", 1024)) if enabled else NullMetrics()
+        self.hud = enabled and metrics.get("hud", False)
+        self.hud_interval = metrics.get("hud_interval", 0.5)
+        self._next_hud = 0.0
+        self.metric_services = []
+        if enabled and metrics.get("dump"):
+            self.metric_services.append(MetricsDumper(self.metrics, metrics["dump"],
+                                                      metrics.get("dump_interval", 10)).start())
+        if enabled and metrics.get("port"):
+            self.metric_services.append(MetricsServer(self.metrics, metrics["port"]).start())
+        record = dict(record or {})
+        self.record_options = record if record.pop("enabled", False) else None
+        self.recorder = None
+
+    def get_center(self, mask):
+        ys, xs = np.nonzero(mask)
+        if len(xs) == 0:
+            return None
+        return int(xs.mean()), int(ys.mean())
+
+    def detect_gaze(self, masks, classes, scale=1.0):
+        mask_dict = {cls: mask for mask, cls in zip(masks, classes)}
+        centers = {cls: self.get_center(mask) for cls, mask in mask_dict.items()}
+        return gaze_from_centers(centers, scale)
+
+    def source_clock(self):
+        """Seconds into the source by frame count (the duty-cycle clock in lossless replay)."""
+        return self._source_time
+
+    def load(self):
+        """Open the camera, load the model and warm it up; True when the loop can start."""
+        self.status_changed.emit("Loading model...")
+        opened = {}
+
+        def open_camera():  # runs while the model loads; cv2.VideoCapture can take seconds
+            try:
+                opened["source"] = open_source(self.source, finite=self.capture_options["lossless"])
+            except Exception as e:
+                opened["error"] = e
+
+        camera = threading.Thread(target=open_camera, daemon=True)
+        camera.start()
+        try:
+            self.model = load_backend(self.backend, self.model_path, int8=self.int8, **self.backend_options)
+            cached = getattr(self.model, "cache_hit", None)
+            STARTUP.mark("model loaded" + {True: " (fused cache hit)", False: " (fused, cached)"}.get(cached, ""))
+            cascade = dict(self.cascade_options)
+            if cascade.pop("enabled", False):
+                cascade["weights"] = resource_path(cascade.get("weights", "models/eye_state.pt"))
+                self.cascade = Cascade(**cascade)
+            if not self.running:
+                return False
+            self.status_changed.emit("Warming up...")
+            self.warm_up()
+            STARTUP.mark("warm-up")
+        except Exception as e:
+            print(f"❌ Model load failed: {e}")
+            self.status_changed.emit(f"❌ Model load failed: {e}")
+            return False
+
+        camera.join()
+        if "error" in opened:
+            print(f"❌ Camera open failed: {opened['error']}")
+            self.status_changed.emit(f"❌ Camera open failed: {opened['error']}")
+            return False
+        cap, live = opened["source"]
+        self.capture = CaptureThread(cap, live=live, **self.capture_options)
+        STARTUP.mark("camera open")
+        if self.record_options is not None:
+            self.recorder = SessionRecorder(**self.record_options)
+        self.status_changed.emit("")
+        return self.running
+
+    def warm_up(self, runs=2):
+        """Pay for lazy kernel/graph initialization at every input size before real frames arrive."""
+        sizes = {self.imgsz}
+        if self.resolution is not None:
+            sizes.update(self.resolution.ladder)
+        if self.scheduler is not None:
+            sizes.add(self.scheduler.probe_imgsz)
+        if self.roi is not None:
+            sizes.add(self.roi.imgsz)
+        dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+        timings = {}
+        for imgsz in sorted(sizes, reverse=True):
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                self.model(dummy, imgsz=imgsz, conf=0.25, iou=0.3)
+                timings[imgsz] = (time.perf_counter() - t0) * 1000
+        if self.resolution is not None:
+            self.resolution.seed(timings)  # start at the largest size that already fits the budget
+        if self.cascade is not None:
+            self.cascade.classifier(np.zeros((1,) + INPUT_SHAPE, dtype=np.float32))
+
+    def run(self):
+        if self.capture is None and not self.load():
+            return
+        self.capture.start()
+        while self.running:
+            item = self.capture.frames.get(timeout=0.5)
+            if item is None:
+                if self.capture.is_alive():
+                    continue
+                break
+            seq, t_capture, frame = item
+            self._source_time = seq / self.capture.fps
+            t_start = time.perf_counter()
+            STARTUP.mark("first frame")
+
+            probe_imgsz = None
+            if self.scheduler is not None:
+                run, probe_imgsz = self.scheduler.plan(self.can_act(self.get_process_name()))
+                if not run:
+                    continue
+                if self.scheduler.state != ACTIVE:
+                    self.decision.reset()
+                    if self.motion is not None:
+                        self.motion.reset()
+            # skipped frames leave no sample; the scheduler's time still counts towards "flip"
+            self.metrics.begin(t_start)
+            self.metrics.record("capture", (t_start - t_capture) * 1000)  # frame age when picked up
+
+            frame = cv2.flip(frame, 1)
+            h, w = frame.shape[:2]
+            self.metrics.lap("flip")
+
+            # the cascade's classifier answers first; None means the segmenter has to run
+            cheap = None
+            if self.cascade is not None and probe_imgsz is None:
+                cheap = self.cascade.classify(frame)
+                self.metrics.lap("classify")
+
+            # a still eye region reuses the last segmenter pass (in shadow mode it only counts)
+            still = False
+            if cheap is None and self.motion is not None and probe_imgsz is None:
+                still = self.motion.still(frame)
+                self.metrics.lap("motion")
+            reused = still and self.motion.shadow is None
+
+            geo = crop = None
+            imgsz, scale = 0, 1.0
+            if reused:
+                geo, crop, imgsz, scale = self.motion.result
+            elif cheap is None:
+                crop = self.roi.plan() if self.roi is not None and probe_imgsz is None else None
+                if crop is None:
+                    full = self.resolution.imgsz if self.resolution is not None else self.imgsz
+                    image, imgsz, side = frame, probe_imgsz or full, max(h, w)
+                else:
+                    x0, y0, x1, y1 = crop
+                    image, imgsz, side = frame[y0:y1, x0:x1], self.roi.imgsz, max(y1 - y0, x1 - x0)
+                # converts mask pixels of this pass to full-frame 640px mask pixels
+                scale = (self.imgsz / max(h, w)) / (imgsz / side)
+
+                t_infer = time.perf_counter()
+                res = self.model(image, imgsz=imgsz, conf=0.25, iou=0.3)
+                self.metrics.lap("inference")
+                geo = EyeGeometry.from_result(res, self.geometry, imgsz)
+                self.metrics.lap("transfer")  # on cuda/mps this includes waiting for the device
+                infer_ms = (time.perf_counter() - t_infer) * 1000
+                if self.resolution is not None and crop is None and probe_imgsz is None:
+                    self.resolution.observe(imgsz, infer_ms, geo, scale, seq)
+                if self.roi is not None and probe_imgsz is None:  # low-res probes would skew the crop state
+                    if geo is None:
+                        self.roi.update([], [], crop, frame.shape, infer_ms, seq)
+                    else:
+                        self.roi.update(geo.boxes, geo.confs, crop, frame.shape, infer_ms, seq)
+                boxes = [] if geo is None else geo.boxes
+                if crop is not None and geo is not None:
+                    boxes = boxes + np.array([crop[0], crop[1], crop[0], crop[1]], dtype=np.float32)
+                if self.cascade is not None and probe_imgsz is None:
+                    self.cascade.update(boxes, frame.shape, infer_ms)
+                if self.motion is not None and not still and probe_imgsz is None:
+                    self.motion.update(frame, boxes, (geo, crop, imgsz, scale))
+
+            if self.scheduler is not None:
+                self.scheduler.observe(geo is not None or cheap is not None)
+
+            current_gaze, weight = cheap if cheap is not None else (None, 0.0)
+            if geo is not None:
+                current_gaze = gaze_from_centers(geo.centers, scale)
+                weight = float(geo.confs.mean())
+            self.metrics.lap("gaze")
+            if current_gaze is not None:
+                STARTUP.mark("first gaze")
+
+            if current_gaze is not None and probe_imgsz is None:
+                decided = self.decision.update(current_gaze, weight)
+                if decided is not None and decided != self.confirmed_gaze:
+                    title, pdf_mode = REGISTRY[self.process_name](decided, self.get_process_name())
+                    self.confirmed_gaze = decided
+                    STARTUP.mark("first confirmed gaze")
+                    self.pdf_mode.emit(pdf_mode)
+                    self.gaze_updated.emit(title)
+                    print("👁 Gaze:", self.gaze_directions[decided])
+            if self.motion is not None and self.motion.shadow is not None and probe_imgsz is None:
+                self.motion.compare(still, current_gaze, weight, self.confirmed_gaze)
+            self.metrics.lap("decision")
+
+            if (self.overlay is None or self.overlay.preview_enabled) and self.preview.due():
+                idx, buf = self.preview.acquire(self.compositor.output_shape(frame.shape) + (3,))
+                if geo is None:
+                    self.compositor.compose(frame, out=buf)
+                else:
+                    self.compositor.compose(frame, geo.masks(), geo.classes, crop, out=buf)
+                if self.preview.publish(idx):
+                    self.preview_frame.emit(self.preview)
+            self.metrics.lap("overlay")
+            self.frame_processed.emit((seq, t_capture, t_start, time.perf_counter(),
+                                       current_gaze, self.confirmed_gaze))
+            self.metrics.lap("emit")
+            self.metrics.end()
+            if self.recorder is not None:
+                source = ("cascade" if cheap is not None else "reused" if reused else "roi" if crop is not None
+                          else "probe" if probe_imgsz is not None else "full")
+                self.recorder.write(seq, t_capture, geo, scale, imgsz, source, current_gaze,
+                                    self.confirmed_gaze, weight, self.metrics.last, self.get_process_id())
+            if self.hud and t_start >= self._next_hud:
+                self._next_hud = t_start + self.hud_interval
+                self.metrics_updated.emit(format_hud(self.metrics.snapshot()))
+        self.capture.stop()
+        STARTUP.report()  # when no gaze was ever confirmed
+        print("📷 Capture:", self.capture.stats())
+        print("🖼 Preview:", self.preview.stats())
+        if self.roi is not None:
+            print("🎯 ROI:", self.roi.summary())
+            self.roi.save_log()
+        if self.scheduler is not None:
+            print("🔋 Duty cycle:", self.scheduler.metrics())
+        if self.cascade is not None:
+            print("🪜 Cascade:", self.cascade.summary())
+        if self.motion is not None:
+            print("🧊 Motion gate:", self.motion.summary())
+        if self.resolution is not None:
+            summary = self.resolution.summary()
+            print("📐 Resolution:", {k: v for k, v in summary.items() if k != "timeline"})
+            self.resolution.save_log()
+        for service in self.metric_services:
+            service.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        snap = self.metrics.snapshot()
+        if snap:
+            print("⏱ Stages (p50/p95 ms):", {k: (round(v["p50"], 2), round(v["p95"], 2))
+                                              for k, v in snap.items() if k != "fps"})
+
+    def stop(self):
+        self.running = False
+        if self.capture is not None:
+            self.capture.stop()
+        self.quit()
+        self.wait()
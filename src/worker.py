@@ -0,0 +1,377 @@
+# Out-of-process tracker: capture, inference, compositing and key dispatch run in a worker process.
+#
+# Enabled with `"worker": {"enabled": true}` in keymap/config.yaml.  The Qt
+# process keeps the overlay and a RemoteTracker thread that only turns the
+# worker's messages into the usual EyeTrackerThread signals, so the tracker
+# never holds the GUI's GIL.  Preview frames and per-frame results travel
+# through shared-memory rings; gaze/status/HUD text and the control messages
+# (stop, preview on/off, foreground process) go over a pipe.
+import time
+import types
+import struct
+import threading
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .preview import PreviewChannel
+from .recorder import NO_STATE
+from .tracker import EyeTrackerThread
+
+RING_HEADER = struct.Struct("<QII")  # publishes so far, slots, payload bytes per slot
+HEAD = struct.Struct("<Q")
+SLOT_HEADER = struct.Struct("<Q3I4x")  # publish number (0 while being written), payload shape
+RESULT = struct.Struct("<Idddbb")  # frame_processed: seq, t_capture, t_start, t_end, gaze, confirmed
+PREVIEW_BYTES = 320 * 240 * 3  # MaskCompositor's default preview box
+
+
+class SharedRing:
+    """Fixed-size slots in one shared-memory segment; one process writes, others read.
+
+    The writer fills slot `n % slots` for its n-th publish and stamps the
+    slot with n once done (0 while writing).  Readers check the stamp before
+    and after copying a slot out, so a slot that was overwritten meanwhile is
+    dropped instead of read torn.  Attaching by `name` continues the count,
+    so a restarted writer picks up where the previous one stopped.
+    """
+
+    def __init__(self, slot_bytes=0, slots=4, name=None):
+        self.owner = name is None
+        self.closed = False
+        if self.owner:
+            size = RING_HEADER.size + slots * (SLOT_HEADER.size + slot_bytes)
+            self.shm = SharedMemory(create=True, size=size)
+            RING_HEADER.pack_into(self.shm.buf, 0, 0, slots, slot_bytes)
+        else:
+            self.shm = SharedMemory(name)
+        self.written, self.slots, self.slot_bytes = RING_HEADER.unpack_from(self.shm.buf)
+        self._stride = SLOT_HEADER.size + self.slot_bytes
+        self._payload = [np.ndarray((self.slot_bytes,), dtype=np.uint8, buffer=self.shm.buf,
+                                    offset=self._offset(i) + SLOT_HEADER.size) for i in range(self.slots)]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        """Number of the newest complete slot (0 before the first)."""
+        return HEAD.unpack_from(self.shm.buf)[0]
+
+    def _offset(self, n):
+        return RING_HEADER.size + (n % self.slots) * self._stride
+
+    def begin(self):
+        """Writer: `(n, payload)` of the next slot, marked as being written."""
+        n = self.written + 1
+        SLOT_HEADER.pack_into(self.shm.buf, self._offset(n), 0, 0, 0, 0)
+        return n, self._payload[n % self.slots]
+
+    def commit(self, n, shape=(0, 0, 0)):
+        SLOT_HEADER.pack_into(self.shm.buf, self._offset(n), n, *shape)
+        self.written = n
+        HEAD.pack_into(self.shm.buf, 0, n)
+
+    def read(self, n, copy):
+        """`copy(payload, shape)` on slot n; its result, or None when slot n no longer holds publish n."""
+        off = self._offset(n)
+        stamp, *shape = SLOT_HEADER.unpack_from(self.shm.buf, off)
+        if stamp != n:
+            return None
+        result = copy(self._payload[n % self.slots], shape)
+        return result if SLOT_HEADER.unpack_from(self.shm.buf, off)[0] == n else None
+
+    def close(self):
+        self.closed = True
+        self._payload = []
+        try:
+            self.shm.close()
+        except BufferError:  # a view is still held somewhere; the mapping goes with the process
+            return
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedPreview(PreviewChannel):
+    """PreviewChannel over a SharedRing: the worker composites straight into a slot, the GUI copies it out.
+
+    Only the newest frame is shown, as with PreviewChannel; frames the GUI
+    did not take in time are simply overwritten.
+    """
+
+    def __init__(self, ring, max_fps=15.0):
+        super().__init__(max_fps=max_fps, pool=ring.slots)
+        self.ring = ring
+        self._shapes = {}
+        self._frame = None
+        self._shown = ring.head
+        self.pending = False  # GUI side: a preview_frame signal is queued and not yet taken
+
+    def acquire(self, shape):
+        size = int(np.prod(shape))
+        if size > self.ring.slot_bytes:
+            raise ValueError(f"preview frame {shape} does not fit a {self.ring.slot_bytes}-byte slot")
+        n, payload = self.ring.begin()
+        self._shapes[n] = shape
+        return n, payload[:size].reshape(shape)
+
+    def publish(self, idx):
+        self.ring.commit(idx, self._shapes.pop(idx))
+        self.published += 1
+        return True
+
+    def _copy(self, payload, shape):
+        shape = tuple(shape)
+        if self._frame is None or self._frame.shape != shape:
+            self._frame = np.empty(shape, dtype=np.uint8)
+        np.copyto(self._frame, payload[:self._frame.size].reshape(shape))
+        return self._frame
+
+    def take(self):
+        self.pending = False
+        if self.ring.closed:  # a preview_frame signal still queued after stop()
+            return None
+        n = self.ring.head
+        if n == self._shown:
+            return None
+        self.replaced += max(0, n - self._shown - 1)
+        self._shown = n
+        frame = self.ring.read(n, self._copy)
+        if frame is not None:
+            self.taken += 1
+        return frame
+
+
+def serve(conn, frames, results, options, dispatch=None, preview=True, process=("N/A", 0)):
+    """Worker process body: the EyeTrackerThread loop with its signals forwarded to the GUI."""
+    from .control import set_dispatcher
+    from .dispatcher import make_dispatcher
+
+    dispatcher = make_dispatcher(dispatch)
+    set_dispatcher(dispatcher)
+    frames, results = SharedRing(name=frames), SharedRing(name=results)
+    state = types.SimpleNamespace(preview_enabled=preview, process=tuple(process))
+    tracker = EyeTrackerThread(overlay=state, get_process_name=lambda: state.process[0],
+                               get_process_id=lambda: state.process[1], **options)
+    # composite straight into shared memory instead of the in-process channel
+    tracker.preview = SharedPreview(frames, options.get("preview_fps", 15))
+
+    def send(*message):
+        try:
+            conn.send(message)
+        except (OSError, EOFError):  # the GUI is gone
+            tracker.running = False
+
+    def result(record):
+        seq, t_capture, t_start, t_end, gaze, confirmed = record
+        n, payload = results.begin()
+        RESULT.pack_into(payload, 0, seq, t_capture, t_start, t_end, NO_STATE if gaze is None else gaze,
+                         NO_STATE if confirmed is None else confirmed)
+        results.commit(n)
+
+    tracker.gaze_updated.connect(lambda text: send("gaze", text))
+    tracker.pdf_mode.connect(lambda mode: send("pdf_mode", mode))
+    tracker.status_changed.connect(lambda text: send("status", text))
+    tracker.metrics_updated.connect(lambda text: send("hud", text))
+    tracker.preview_frame.connect(lambda channel: send("preview"))
+    tracker.frame_processed.connect(result)
+
+    def control():
+        while True:
+            try:
+                kind, *args = conn.recv()
+            except (OSError, EOFError):
+                kind, args = "stop", ()
+            if kind == "stop":
+                tracker.stop()
+                return
+            if kind == "preview":
+                state.preview_enabled = args[0]
+            elif kind == "process":
+                state.process = tuple(args)
+
+    threading.Thread(target=control, daemon=True).start()
+    try:
+        tracker.run()  # same loop as the QThread, on this process' main thread
+    finally:
+        dispatcher.stop()
+        send("exit")
+        frames.close()
+        results.close()
+
+
+class RemoteTracker(QThread):
+    """Drop-in for EyeTrackerThread that runs the tracker in a worker process.
+
+    `options` are the EyeTrackerThread keyword arguments (picklable ones;
+    the overlay and the foreground-process getters stay here and are
+    forwarded).  This thread only waits on the worker's pipe, re-emits its
+    messages as signals and drains the results ring into `frame_processed`.
+    A worker that dies is started again after `restart_delay` seconds, up to
+    `max_restarts` times in a row (a worker that ran for `stable` seconds
+    resets the count).  A worker that returns normally (the source ended)
+    is not restarted.
+    """
+
+    gaze_updated = pyqtSignal(str)
+    preview_frame = pyqtSignal(object)
+    pdf_mode = pyqtSignal(str)
+    frame_processed = pyqtSignal(object)
+    status_changed = pyqtSignal(str)
+    metrics_updated = pyqtSignal(str)
+
+    def __init__(self, options, overlay=None, get_process_name=None, get_process_id=None, dispatch=None,
+                 max_restarts=5, restart_delay=1.0, stable=60.0, poll_interval=0.02, result_slots=256,
+                 stop_timeout=5.0):
+        super().__init__()
+        self.options = dict(options)
+        self.overlay = overlay
+        self.get_process_name = get_process_name or (lambda: "N/A")
+        self.get_process_id = get_process_id or (lambda: 0)
+        self.dispatch = dispatch
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.stable = stable
+        self.poll_interval = poll_interval
+        self.stop_timeout = stop_timeout
+        self.frames = SharedRing(PREVIEW_BYTES, slots=3)
+        self.results = SharedRing(RESULT.size, slots=result_slots)
+        self.preview = SharedPreview(self.frames, self.options.get("preview_fps", 15))
+        self.running = True
+        self.conn = None
+        self._send_lock = threading.Lock()  # stop() sends from the GUI thread
+        self.process = None
+        self.restarts = 0
+        self.lost_results = 0
+        self._read = self.results.head
+        self._sent = None
+        self._stop_at = None
+        self._closed = False
+
+    def _preview_enabled(self):
+        return self.overlay is None or self.overlay.preview_enabled
+
+    def _spawn(self):
+        # spawn, not fork: the GUI process has Qt (and maybe torch) threads running
+        ctx = mp.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self._sent = (self._preview_enabled(), self.get_process_name(), self.get_process_id())
+        self.process = ctx.Process(target=serve, name="eye-tracker", daemon=True,
+                                   args=(child, self.frames.name, self.results.name, self.options,
+                                         self.dispatch, self._sent[0], self._sent[1:]))
+        self.process.start()
+        child.close()
+
+    def _forward(self):
+        """Pass preview on/off and foreground-process changes on to the worker."""
+        now = (self._preview_enabled(), self.get_process_name(), self.get_process_id())
+        if now == self._sent:
+            return
+        with self._send_lock:
+            if now[0] != self._sent[0]:
+                self.conn.send(("preview", now[0]))
+            if now[1:] != self._sent[1:]:
+                self.conn.send(("process",) + now[1:])
+        self._sent = now
+
+    def _drain(self):
+        if self.results.closed:
+            return
+        head = self.results.head
+        if head - self._read > self.results.slots:
+            self.lost_results += head - self._read - self.results.slots
+            self._read = head - self.results.slots
+        for n in range(self._read + 1, head + 1):
+            record = self.results.read(n, lambda payload, shape: RESULT.unpack_from(payload))
+            if record is None:
+                self.lost_results += 1
+                continue
+            seq, t_capture, t_start, t_end, gaze, confirmed = record
+            self.frame_processed.emit((seq, t_capture, t_start, t_end, None if gaze == NO_STATE else gaze,
+                                       None if confirmed == NO_STATE else confirmed))
+        self._read = head
+
+    def _handle(self, kind, *args):
+        if kind == "gaze":
+            self.gaze_updated.emit(args[0])
+        elif kind == "pdf_mode":
+            self.pdf_mode.emit(args[0])
+        elif kind == "status":
+            self.status_changed.emit(args[0])
+        elif kind == "hud":
+            self.metrics_updated.emit(args[0])
+        elif kind == "preview":
+            if not self.preview.pending:  # one queued signal at a time; take() reads the newest
+                self.preview.pending = True
+                self.preview_frame.emit(self.preview)
+
+    def _supervise(self):
+        """Relay one worker's messages until it exits; True when it exited on its own terms."""
+        self._spawn()
+        clean = False
+        while True:
+            try:
+                if self.conn.poll(self.poll_interval):
+                    kind, *args = self.conn.recv()
+                    if kind == "exit":
+                        clean = True
+                    else:
+                        self._handle(kind, *args)
+                if self.running:
+                    self._forward()
+            except (OSError, EOFError):  # pipe closed: the worker is gone
+                self.process.join(self.stop_timeout)
+            self._drain()
+            if not self.process.is_alive():
+                break
+            if self._stop_at is not None and time.monotonic() > self._stop_at:
+                print("⚠️ Tracker worker did not stop in time; terminating it")
+                self.process.terminate()
+                self.process.join()
+        self._drain()
+        self.conn.close()
+        return clean or self.process.exitcode == 0
+
+    def run(self):
+        crashes = 0
+        while self.running:
+            started = time.monotonic()
+            if self._supervise() or not self.running:
+                break
+            crashes = 1 if time.monotonic() - started >= self.stable else crashes + 1
+            if crashes > self.max_restarts:
+                print(f"❌ Tracker worker crashed {crashes} times in a row; giving up")
+                self.status_changed.emit("❌ Tracker stopped")
+                break
+            self.restarts += 1
+            print(f"💥 Tracker worker exited with code {self.process.exitcode}; "
+                  f"restarting ({crashes}/{self.max_restarts})")
+            self.status_changed.emit("Tracker crashed, restarting...")
+            deadline = time.monotonic() + self.restart_delay
+            while self.running and time.monotonic() < deadline:
+                time.sleep(0.05)
+        print("🧵 Worker:", self.stats())
+
+    def stats(self):
+        return {"restarts": self.restarts, "results_lost": self.lost_results,
+                "preview_taken": self.preview.taken, "preview_replaced": self.preview.replaced}
+
+    def stop(self):
+        self.running = False
+        if self._stop_at is None:
+            self._stop_at = time.monotonic() + self.stop_timeout
+        if self.process is not None and self.process.is_alive():
+            try:
+                with self._send_lock:
+                    self.conn.send(("stop",))
+            except (OSError, EOFError):
+                pass
+        self.quit()
+        self.wait()
+        if not self._closed:
+            self._closed = True
+            self.preview._frame = None
+            self.frames.close()
+            self.results.close()
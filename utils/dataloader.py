@@ -0,0 +1,138 @@
+# Random-access readers for the packed shards (utils/pack_dataset.py) and for the loose layout.
+#
+#   ds = ShardDataset("data/packed/train")
+#   sample = ds[123]          # {"img": (h, w, 3) uint8 view into the shard, "cls": ..., "segments": [...]}
+#   loader = make_loader(ds, batch_size=64, workers=8, shuffle=True)
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.pack_dataset import IMAGE_EXTS, label_path, read_polygons
+
+
+class ShardDataset:
+    """Samples of a packed dataset, read straight out of memory-mapped shards.
+
+    Raw-encoded images are returned as read-only views into the mapping, so
+    nothing is copied or decoded until a transform touches the pixels.  The
+    shards are mapped lazily, which keeps the dataset cheap to pickle into
+    DataLoader workers (each worker maps them on first use).
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index = np.load(self.root / "index.npy")
+        self.polygons = np.load(self.root / "polygons.npy")
+        self.points = np.load(self.root / "points.npy", mmap_mode="r")
+        meta = json.loads((self.root / "meta.json").read_text())
+        self.imgsz = meta["imgsz"]
+        self.encoding = meta["encoding"]
+        self.names = meta.get("names")
+        self.paths = meta["paths"]
+        self.n_shards = meta["shards"]
+        self._shards = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = None
+        return state
+
+    def shard(self, i):
+        if self._shards is None:
+            self._shards = [np.memmap(self.root / f"shard_{k:03d}.bin", dtype=np.uint8, mode="r")
+                            for k in range(self.n_shards)]
+        return self._shards[i]
+
+    def image(self, i):
+        row = self.index[i]
+        data = self.shard(row["shard"])[row["offset"]:row["offset"] + row["nbytes"]]
+        if self.encoding == "jpg":
+            return cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return data.reshape(int(row["h"]), int(row["w"]), 3)
+
+    def labels(self, i):
+        row = self.index[i]
+        polys = self.polygons[row["poly_start"]:row["poly_start"] + row["poly_count"]]
+        segments = [self.points[p["start"]:p["start"] + p["count"]] for p in polys]
+        return polys["cls"].astype(np.int64), segments
+
+    def __getitem__(self, i):
+        row = self.index[i]
+        cls, segments = self.labels(i)
+        return {
+            "img": self.image(i),
+            "cls": cls,
+            "segments": segments,
+            "orig_shape": (int(row["orig_h"]), int(row["orig_w"])),
+            "path": self.paths[i],
+        }
+
+
+class LooseDataset:
+    """The same samples read from loose image files and per-image `.txt` labels."""
+
+    def __init__(self, images_root, labels_root=None, imgsz=0):
+        self.images_root = Path(images_root)
+        self.labels_root = Path(labels_root or str(images_root).replace("images", "labels", 1))
+        self.imgsz = imgsz
+        self.files = sorted(p for p in self.images_root.rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, i):
+        path = self.files[i]
+        img = cv2.imread(str(path))
+        oh, ow = img.shape[:2]
+        if self.imgsz:
+            r = self.imgsz / max(oh, ow)
+            if r != 1:
+                interp = cv2.INTER_LINEAR if r > 1 else cv2.INTER_AREA
+                img = cv2.resize(img, (min(round(ow * r), self.imgsz), min(round(oh * r), self.imgsz)),
+                                 interpolation=interp)
+        polys = read_polygons(label_path(path, self.images_root, self.labels_root))
+        return {
+            "img": img,
+            "cls": np.array([c for c, _ in polys], dtype=np.int64),
+            "segments": [pts for _, pts in polys],
+            "orig_shape": (oh, ow),
+            "path": str(path.relative_to(self.images_root)),
+        }
+
+
+def collate(samples):
+    """Pad a batch to its largest image (top-left) into one (B, 3, H, W) uint8 tensor.
+
+    Polygon points stay normalized to the padded image, with one row of
+    `targets` per polygon: `[batch_index, cls]` plus the matching `segments`.
+    """
+    import torch
+
+    H = max(s["img"].shape[0] for s in samples)
+    W = max(s["img"].shape[1] for s in samples)
+    imgs = np.zeros((len(samples), H, W, 3), dtype=np.uint8)
+    targets, segments = [], []
+    for b, s in enumerate(samples):
+        h, w = s["img"].shape[:2]
+        imgs[b, :h, :w] = s["img"]
+        for cls, seg in zip(s["cls"], s["segments"]):
+            targets.append((b, cls))
+            segments.append(torch.from_numpy(np.asarray(seg) * np.array([w / W, h / H], dtype=np.float32)))
+    return {
+        "img": torch.from_numpy(imgs).permute(0, 3, 1, 2),
+        "targets": torch.tensor(targets, dtype=torch.int64).reshape(-1, 2),
+        "segments": segments,
+        "paths": [s["path"] for s in samples],
+    }
+
+
+def make_loader(dataset, batch_size=64, workers=8, shuffle=True, **kwargs):
+    from torch.utils.data import DataLoader
+
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, num_workers=workers,
+                      collate_fn=collate, persistent_workers=workers > 0, **kwargs)
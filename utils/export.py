@@ -0,0 +1,126 @@
+# Export models/best.pt to ONNX / OpenVINO, optionally with INT8 post-training quantization.
+#
+#   python -m utils.export --weights models/best.pt --formats onnx openvino
+#   python -m utils.export --weights models/best.pt --formats onnx openvino --int8 --calib data/images/val
+import argparse
+import os
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.backends import artifact_path
+from src.capture import IMAGE_EXTS
+
+
+def calibration_images(root, limit, seed=0):
+    files = [p for p in Path(root).rglob("*") if p.suffix.lower() in IMAGE_EXTS]
+    if not files:
+        raise FileNotFoundError(f"No calibration images under {root}")
+    rng = np.random.default_rng(seed)
+    rng.shuffle(files)
+    return files[:limit]
+
+
+def preprocess(path, imgsz):
+    """Same letterbox/normalisation ultralytics applies before the network."""
+    from ultralytics.data.augment import LetterBox
+
+    img = LetterBox((imgsz, imgsz), auto=False)(image=cv2.imread(str(path)))
+    img = img[:, :, ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+    return np.ascontiguousarray(img, dtype=np.float32)[None] / 255.0
+
+
+def quantize_onnx(src, dst, calib_files, imgsz):
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class Reader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.files = iter(calib_files)
+
+        def get_next(self):
+            path = next(self.files, None)
+            return None if path is None else {self.input_name: preprocess(path, imgsz)}
+
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    prepared = dst + ".prep.onnx"
+    quant_pre_process(src, prepared, skip_symbolic_shape=True)
+    quantize_static(prepared, dst, Reader(input_name), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    per_channel=True)
+    os.remove(prepared)
+
+
+def export_onnx(model, weights, imgsz, int8, calib, calib_size):
+    # dynamic axes so ROI crops can run at their own imgsz
+    path = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if not int8:
+        return path
+    dst = artifact_path(weights, "onnx", int8=True)
+    quantize_onnx(path, dst, calibration_images(calib, calib_size), imgsz)
+    return dst
+
+
+def export_openvino(model, weights, imgsz, int8, calib, data, calib_size):
+    if not int8:
+        path = model.export(format="openvino", imgsz=imgsz, dynamic=True)
+    else:
+        # ultralytics calibrates with NNCF on the val split of the dataset yaml
+        if calib and os.path.isdir(calib):
+            data = write_calib_yaml(calib, calib_size)
+        path = model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True, data=data)
+    dst = artifact_path(weights, "openvino", int8)
+    if os.path.abspath(path) != os.path.abspath(dst):
+        shutil.rmtree(dst, ignore_errors=True)
+        shutil.move(path, dst)
+    return dst
+
+
+def write_calib_yaml(calib, calib_size):
+    """A throwaway dataset yaml whose val split is a sample of the calibration images."""
+    import yaml
+
+    root = Path("runs/export/calib")
+    shutil.rmtree(root, ignore_errors=True)
+    (root / "images").mkdir(parents=True)
+    for i, path in enumerate(calibration_images(calib, calib_size)):
+        shutil.copy(path, root / "images" / f"{i:05d}{path.suffix.lower()}")
+    with open("data/train.yaml", "r", encoding="utf-8") as f:
+        names = yaml.safe_load(f)["names"]
+    cfg = root / "calib.yaml"
+    cfg.write_text(yaml.safe_dump({"path": str(root.resolve()), "train": "images",
+                                   "val": "images", "names": names}))
+    return str(cfg)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", default="models/best.pt")
+    ap.add_argument("--formats", nargs="+", default=["onnx", "openvino"], choices=["onnx", "openvino"])
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--int8", action="store_true", help="INT8 post-training quantization")
+    ap.add_argument("--calib", default="data/images/val", help="calibration image directory")
+    ap.add_argument("--calib-size", type=int, default=300, help="number of calibration images")
+    ap.add_argument("--data", default="data/train.yaml", help="dataset yaml for OpenVINO calibration")
+    args = ap.parse_args()
+
+    from ultralytics import YOLO
+
+    for fmt in args.formats:
+        model = YOLO(args.weights)
+        if fmt == "onnx":
+            path = export_onnx(model, args.weights, args.imgsz, args.int8, args.calib, args.calib_size)
+        else:
+            path = export_openvino(model, args.weights, args.imgsz, args.int8, args.calib,
+                                   args.data, args.calib_size)
+        print(f"✅ {fmt}{' int8' if args.int8 else ''}: {path}")
+
+
+if __name__ == "__main__":
+    main()
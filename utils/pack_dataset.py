@@ -0,0 +1,170 @@
+# Pack loose JPEGs + YOLO polygon labels into a few large memory-mapped shards.
+#
+#   python -m utils.pack_dataset --images data/images/train --labels data/labels/train \
+#                                --out data/packed/train --imgsz 640 --workers 16
+#
+# Layout of --out:
+#   shard_000.bin ...  decoded BGR pixels (or the original JPEG bytes with --encoding jpg),
+#                      every sample 64-byte aligned
+#   index.npy          one INDEX_DTYPE row per sample: shard, offset, size, shape, polygon range
+#   polygons.npy       one POLYGON_DTYPE row per polygon: class, point range
+#   points.npy         (P, 2) float32 normalized polygon points
+#   meta.json          imgsz, encoding, class names and the source path of every sample
+# Read it back with utils.dataloader.ShardDataset.
+import os
+import json
+import argparse
+from pathlib import Path
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+
+from src.capture import IMAGE_EXTS
+
+ALIGN = 64
+INDEX_DTYPE = np.dtype([
+    ("shard", "<u2"), ("offset", "<u8"), ("nbytes", "<u8"),
+    ("h", "<u2"), ("w", "<u2"), ("orig_h", "<u2"), ("orig_w", "<u2"),
+    ("poly_start", "<u8"), ("poly_count", "<u4"),
+])
+POLYGON_DTYPE = np.dtype([("cls", "<u2"), ("start", "<u8"), ("count", "<u4")])
+
+
+def label_path(image, images_root, labels_root):
+    return labels_root / image.relative_to(images_root).with_suffix(".txt")
+
+
+def read_polygons(path):
+    """YOLO segmentation txt -> list of (cls, (K, 2) float32 normalized points)."""
+    polys = []
+    if not path.exists():
+        return polys
+    for line in path.read_text().splitlines():
+        vals = line.split()
+        if len(vals) < 7:
+            continue
+        pts = np.asarray(vals[1:], dtype=np.float32)
+        polys.append((int(vals[0]), pts[: len(pts) // 2 * 2].reshape(-1, 2)))
+    return polys
+
+
+def load_sample(job):
+    """Decode (and optionally resize) one image; runs on the worker pool."""
+    image, label, imgsz, encoding = job
+    polys = read_polygons(label)
+    data = np.fromfile(image, dtype=np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if img is None:
+        return None, None, None, polys
+    if encoding == "jpg" and not imgsz:
+        return data.tobytes(), img.shape[:2], img.shape[:2], polys  # the original file, untouched
+    oh, ow = img.shape[:2]
+    if imgsz:
+        # same long-side resize ultralytics' load_image does, so training skips it
+        r = imgsz / max(oh, ow)
+        if r != 1:
+            interp = cv2.INTER_LINEAR if r > 1 else cv2.INTER_AREA
+            img = cv2.resize(img, (min(round(ow * r), imgsz), min(round(oh * r), imgsz)), interpolation=interp)
+    if encoding == "jpg":
+        return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes(), img.shape[:2], (oh, ow), polys
+    return np.ascontiguousarray(img).tobytes(), img.shape[:2], (oh, ow), polys
+
+
+class ShardWriter:
+    def __init__(self, out, shard_bytes):
+        self.out = out
+        self.shard_bytes = shard_bytes
+        self.shard = -1
+        self.f = None
+        self.pos = 0
+
+    def write(self, data):
+        if self.f is None or (self.pos and self.pos + len(data) > self.shard_bytes):
+            self._next()
+        pad = -self.pos % ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+            self.pos += pad
+        offset = self.pos
+        self.f.write(data)
+        self.pos += len(data)
+        return self.shard, offset
+
+    def _next(self):
+        self.close()
+        self.shard += 1
+        self.f = open(self.out / f"shard_{self.shard:03d}.bin", "wb")
+        self.pos = 0
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+def pack(images_root, labels_root, out, imgsz=0, encoding="raw", shard_gb=4.0, workers=1, names=None):
+    images_root, labels_root, out = Path(images_root), Path(labels_root), Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    images = sorted(p for p in images_root.rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+    jobs = [(p, label_path(p, images_root, labels_root), imgsz, encoding) for p in images]
+
+    index, polygons, points, paths = [], [], [], []
+    n_points = 0
+    writer = ShardWriter(out, int(shard_gb * (1 << 30)))
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap(load_sample, jobs, chunksize=16) if pool else map(load_sample, jobs)
+        for (image, *_), (data, shape, orig, polys) in zip(jobs, results):
+            if data is None:
+                print(f"⚠️ Skipping unreadable image {image}")
+                continue
+            shard, offset = writer.write(data)
+            index.append((shard, offset, len(data), shape[0], shape[1], orig[0], orig[1], len(polygons), len(polys)))
+            for cls, pts in polys:
+                polygons.append((cls, n_points, len(pts)))
+                points.append(pts)
+                n_points += len(pts)
+            paths.append(str(image.relative_to(images_root)))
+            if len(index) % 5000 == 0:
+                print(f"{len(index)}/{len(jobs)} packed")
+    finally:
+        writer.close()
+        if pool:
+            pool.close()
+            pool.join()
+
+    np.save(out / "index.npy", np.array(index, dtype=INDEX_DTYPE))
+    np.save(out / "polygons.npy", np.array(polygons, dtype=POLYGON_DTYPE))
+    np.save(out / "points.npy", np.concatenate(points).astype(np.float32) if points else np.zeros((0, 2), np.float32))
+    meta = {"imgsz": imgsz, "encoding": encoding, "shards": writer.shard + 1, "names": names, "paths": paths}
+    (out / "meta.json").write_text(json.dumps(meta))
+    print(f"✅ Packed {len(index)} samples into {writer.shard + 1} shard(s) under {out}")
+    return out
+
+
+def main():
+    import yaml
+
+    ap = argparse.ArgumentParser(description="Pack images and polygon labels into memory-mapped shards")
+    ap.add_argument("--images", required=True, help="image root, e.g. data/images/train")
+    ap.add_argument("--labels", help="label root mirroring --images (default: images -> labels)")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--imgsz", type=int, default=640, help="pre-resize the long side (0 = keep)")
+    ap.add_argument("--encoding", default="raw", choices=["raw", "jpg"],
+                    help="raw pixels read zero-copy, or JPEG bytes (smaller, decoded on read)")
+    ap.add_argument("--shard-gb", type=float, default=4.0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--data", default="data/train.yaml", help="dataset yaml for the class names")
+    args = ap.parse_args()
+
+    labels = args.labels or args.images.replace("images", "labels", 1)
+    names = None
+    if os.path.exists(args.data):
+        with open(args.data, "r", encoding="utf-8") as f:
+            names = yaml.safe_load(f).get("names")
+    pack(args.images, labels, args.out, args.imgsz, args.encoding, args.shard_gb, args.workers, names)
+
+
+if __name__ == "__main__":
+    main()
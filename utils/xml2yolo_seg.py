@@ -1,31 +1,91 @@
 # xml2yolo_seg.py  — <image> 루프 추가 버전
+#
+#   python -m utils.xml2yolo_seg --src data/labels/train/TL --dst data/labels/train --workers 8
+#   python -m utils.xml2yolo_seg --src data/labels/val/VL --dst data/labels/val --class-map merged
+#
+# XML files are streamed with iterparse and converted on a process pool.  A
+# manifest (`.xml2yolo_manifest.json` under --dst) remembers each source's
+# mtime/size/sha1, so a rerun only converts files that changed.
+import os
+import sys
+import json
+import time
+import hashlib
+import itertools, argparse
 import xml.etree.ElementTree as ET
 from pathlib import Path
-import itertools, argparse
+from functools import partial
+from multiprocessing import Pool
 
-CLASS_MAP = {
-    'right_iris': 0, 'left_iris': 1,
-    'right_eyelid_open': 2, 'right_eyelid_closed': 3,
-    'left_eyelid_open': 4,  'left_eyelid_closed': 5,
+# status: open/closed eyelids are separate classes, each line is box + polygon
+# merged: one class per eyelid whatever its status, each line is the polygon (the app's 4 classes)
+CLASS_MAPS = {
+    'status': {
+        'right_iris': 0, 'left_iris': 1,
+        'right_eyelid_open': 2, 'right_eyelid_closed': 3,
+        'left_eyelid_open': 4,  'left_eyelid_closed': 5,
+    },
+    'merged': {
+        'right_iris': 0, 'left_iris': 1,
+        'right_eyelid': 2, 'left_eyelid': 3,
+    },
 }
+CLASS_MAP = CLASS_MAPS['status']
+SPLITS = ('TL', 'VL')
+MANIFEST = '.xml2yolo_manifest.json'
 
-def polygon_to_yolo(points, w, h):
+
+def polygon_to_yolo(points, w, h, box=True):
     xs, ys = zip(*points)
     cx, cy = (min(xs)+max(xs))/(2*w), (min(ys)+max(ys))/(2*h)
     bw, bh = (max(xs)-min(xs))/w, (max(ys)-min(ys))/h
     poly = list(itertools.chain.from_iterable([(x/w, y/h) for x, y in points]))
-    return [cx, cy, bw, bh] + poly
+    return [cx, cy, bw, bh] + poly if box else poly
+
+
+def base_dirs(xml_path: Path, split='auto', src_root: Path = None):
+    """Directories after the split folder ( G1/001/30 ), which the label tree mirrors."""
+    parts = xml_path.parts
+    names = SPLITS if split == 'auto' else (split,)
+    for name in names:
+        if name in parts:
+            return list(parts[parts.index(name)+1:-1])
+    if split == 'auto' and src_root is not None:
+        return list(xml_path.relative_to(src_root).parts[:-1])
+    raise ValueError(f"'{split}' not in {xml_path}")
+
+
+def object_label(obj, class_map):
+    label = obj.attrib.get('label')
+    if label is None:
+        return None
+    if label.endswith('_eyelid') and label not in class_map:
+        status = obj.find("./attribute[@name='status']")
+        st = (status.text.strip() if status is not None and status.text else 'open')
+        if st not in ('open', 'closed'):
+            return None                                   # 'half' 등은 건너뜀
+        label = f'{label}_{st}'
+    return label if label in class_map else None
+
 
-def convert_xml(xml_path: Path, dst_root: Path):
-    root  = ET.parse(xml_path).getroot()
+def iter_images(xml_path: Path):
+    """Yield each <image> element as soon as it is parsed, then free it."""
+    context = ET.iterparse(xml_path, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'image':
+            yield elem
+            root.clear()                                  # 처리한 image 는 메모리에서 제거
 
-    # ── XML 경로 중 TL 이후 디렉터리( G1/001/30 )만 추출 ──
-    parts   = xml_path.parts
-    idx     = parts.index('TL') # val 은 VL
-    base_rel = list(parts[idx+1:-1])          # ['G1','001','30']
 
-    # ── XML 안의 모든 <image> 태그를 순회 ──
-    for img_tag in root.findall('./image'):
+def convert_xml(xml_path: Path, dst_root: Path, class_map='status', split='TL', src_root: Path = None):
+    """Write one YOLO txt per annotated <image>; returns the written paths."""
+    box = class_map == 'status'
+    classes = CLASS_MAPS[class_map] if isinstance(class_map, str) else class_map
+    base_rel = base_dirs(Path(xml_path), split, src_root)  # ['G1','001','30']
+
+    written = []
+    for img_tag in iter_images(xml_path):
         w, h     = float(img_tag.attrib['width']), float(img_tag.attrib['height'])
         img_name = img_tag.attrib['name']                    # *.jpg 이름
 
@@ -35,39 +95,156 @@ def convert_xml(xml_path: Path, dst_root: Path):
 
         lines = []
         for obj in img_tag:                                   # ← 이 image의 객체만
-            label = obj.attrib.get('label')
-            if label.endswith('_eyelid'):
-                status = obj.find("./attribute[@name='status']")
-                st = (status.text.strip() if status is not None else 'open')
-                if st not in ('open', 'closed'):
-                    continue          # 'half' 등은 건너뜀
-                label = f'{label}_{st}'
-
-            if label not in CLASS_MAP or 'points' not in obj.attrib:
+            label = object_label(obj, classes)
+            if label is None or 'points' not in obj.attrib:
                 continue
 
             pts = [(float(x), float(y))
                    for x, y in (p.split(',') for p in obj.attrib['points'].split(';'))]
-            nums = polygon_to_yolo(pts, w, h)
-            lines.append(f"{CLASS_MAP[label]} " +
+            nums = polygon_to_yolo(pts, w, h, box)
+            lines.append(f"{classes[label]} " +
                          " ".join(f"{n:.6f}" for n in nums))
 
         if lines:                                        # 객체가 하나라도 있을 때만 저장
             txt_path.parent.mkdir(parents=True, exist_ok=True)
             txt_path.write_text("\n".join(lines))
+            written.append(str(txt_path))
+    return written
 
-def walk_and_convert(src_root: Path, dst_root: Path):
-    xml_files = list(src_root.rglob('*.xml'))
-    for i, xml_f in enumerate(xml_files, 1):
-        convert_xml(xml_f, dst_root)
-        if i % 500 == 0:
-            print(f"{i}/{len(xml_files)} converted")
 
-if __name__ == "__main__":
+def iter_xml(src_root: Path):
+    """Walk `src_root` lazily (sorted per directory) instead of collecting every path first."""
+    stack = [str(src_root)]
+    while stack:
+        top = stack.pop()
+        dirs = []
+        with os.scandir(top) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.name.endswith('.xml'):
+                    yield Path(entry.path)
+        stack.extend(reversed(dirs))
+
+
+def sha1_of(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Source mtime/size/sha1 and outputs of every converted XML, stored under dst."""
+
+    def __init__(self, dst_root: Path, options):
+        self.path = dst_root / MANIFEST
+        self.options = options
+        self.files = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            if data.get('options') == options:            # class map / split changed → 전부 다시 변환
+                self.files = data.get('files', {})
+
+    def check(self, key, path: Path):
+        """Return (changed, stat_entry); hashes only when mtime or size moved."""
+        st = path.stat()
+        old = self.files.get(key)
+        if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+            return False, old
+        digest = sha1_of(path)
+        if old and old['sha1'] == digest:
+            old.update(mtime=st.st_mtime_ns, size=st.st_size)  # touched, same content
+            return False, old
+        return True, {'mtime': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest, 'outputs': []}
+
+    def record(self, key, entry, outputs):
+        old = self.files.get(key) or {}
+        stale = set(old.get('outputs', [])) - set(outputs)
+        for p in stale:                                   # images removed from a changed XML
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        entry['outputs'] = outputs
+        self.files[key] = entry
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'options': self.options, 'files': self.files}))
+        os.replace(tmp, self.path)
+
+
+def _convert_job(job, dst_root, class_map, split, src_root):
+    key, path, entry = job
+    return key, entry, convert_xml(path, dst_root, class_map, split, src_root)
+
+
+def walk_and_convert(src_root: Path, dst_root: Path, class_map='status', split='TL',
+                     workers=1, incremental=True, log_every=500):
+    """Convert every XML under `src_root`; returns a stats dict."""
+    src_root, dst_root = Path(src_root), Path(dst_root)
+    manifest = Manifest(dst_root, {'class_map': class_map, 'split': split}) if incremental else None
+    stats = {'seen': 0, 'converted': 0, 'skipped': 0, 'labels': 0}
+
+    def jobs():
+        for path in iter_xml(src_root):
+            stats['seen'] += 1
+            key = str(path.relative_to(src_root))
+            if manifest is None:
+                yield key, path, {}
+                continue
+            changed, entry = manifest.check(key, path)
+            if changed:
+                yield key, path, entry
+            else:
+                stats['skipped'] += 1
+
+    work = partial(_convert_job, dst_root=dst_root, class_map=class_map, split=split, src_root=src_root)
+    t0 = time.perf_counter()
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(work, jobs(), chunksize=8) if pool else map(work, jobs())
+        for key, entry, outputs in results:
+            stats['converted'] += 1
+            stats['labels'] += len(outputs)
+            if manifest is not None:
+                manifest.record(key, entry, outputs)
+            if stats['converted'] % log_every == 0:
+                rate = stats['converted'] / (time.perf_counter() - t0)
+                print(f"{stats['converted']} converted, {stats['skipped']} unchanged ({rate:.1f} files/s)")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if manifest is not None:
+            manifest.save()
+
+    stats['seconds'] = time.perf_counter() - t0
+    stats['files_per_sec'] = stats['seen'] / stats['seconds'] if stats['seconds'] else 0.0
+    print(f"✅ {stats['seen']} XML files: {stats['converted']} converted, {stats['skipped']} unchanged, "
+          f"{stats['labels']} label files, {stats['seconds']:.1f}s ({stats['files_per_sec']:.1f} files/s)")
+    return stats
+
+
+def main(argv=None, class_map='status', split='TL'):
     ap = argparse.ArgumentParser()
     ap.add_argument("--src", required=True, help="labels/train/TL 등 XML 루트")
     ap.add_argument("--dst", required=True, help="YOLO txt 최상위 (labels/train)")
-    args = ap.parse_args()
-    walk_and_convert(Path(args.src), Path(args.dst))
+    ap.add_argument("--class-map", default=class_map, choices=list(CLASS_MAPS),
+                    help="status: open/closed eyelid classes + box, merged: 4 classes, polygon only")
+    ap.add_argument("--split", default=split, choices=list(SPLITS) + ['auto'],
+                    help="folder the label tree starts after (auto: TL or VL, else relative to --src)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--full", action="store_true", help="ignore the manifest and convert everything")
+    args = ap.parse_args(argv)
+    walk_and_convert(Path(args.src), Path(args.dst), args.class_map, args.split,
+                     workers=args.workers, incremental=not args.full)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
 
-# python utils/xml2yolo_seg.py     --src data/labels/train/TL     --dst data/labels/train
\ No newline at end of file
+# python utils/xml2yolo_seg.py     --src data/labels/train/TL     --dst data/labels/train